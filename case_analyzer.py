@@ -1,6 +1,11 @@
 import os
+import re
 import json
-from pathlib import Path
+import math
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 # Ollama (local LLM)
 try:
@@ -11,20 +16,63 @@ except Exception as e:
     OLLAMA_AVAILABLE = False
     print(f"✗ Failed to import ollama: {type(e).__name__}: {e}")
 
+# Optional C Aho-Corasick automaton for the rule-based keyword scan
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 # Using TinyLlama for better performance on resource-constrained servers
 
-OLLAMA_MODEL = "tinyllama"
+OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "tinyllama")
+# Bump whenever the prompt below changes; cached analyses are keyed on it
+PROMPT_VERSION = 1
+
+# One Ollama client per timeout value; clients are safe to share across threads.
+# The Ollama client takes its timeout at construction only, so timeouts are
+# rounded down to whole seconds (tenths below one second, so a deadline is
+# never overrun) and the least recently used clients beyond MAX_CLIENTS are
+# dropped, keeping deadline-derived timeouts from piling up.
+MAX_CLIENTS = 8
+_clients = OrderedDict()
+_clients_lock = threading.Lock()
 
 
-def analyze_case_with_ai(case_number, case_type, description, filed_date, timeout=30):
+def _get_client(timeout):
+    if timeout:
+        timeout = math.floor(timeout) if timeout >= 1 else max(math.floor(timeout * 10), 1) / 10
+    with _clients_lock:
+        client = _clients.get(timeout)
+        if client is None:
+            client = _clients[timeout] = ollama.Client(timeout=timeout)
+            if len(_clients) > MAX_CLIENTS:
+                _clients.popitem(last=False)
+        else:
+            _clients.move_to_end(timeout)
+        return client
+
+
+def analyze_case_with_ai(case_number, case_type, description, filed_date, timeout=30, deadline=None):
     """
     Analyze case using local Ollama tinyllama.
     timeout: seconds before falling back (None = unlimited)
+    deadline: optional time.monotonic() value shared by a batch of calls;
+              the request gets whatever is left of it, capped by timeout
     Falls back to enhanced rule-based if Ollama is unavailable, fails, or times out.
+    The timeout is enforced by the HTTP client, so this is safe to call from
+    any thread (unlike signal.alarm, which only works in the main thread).
     """
     if not description or not description.strip():
         return analyze_case_rule_based(case_type, description)
 
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print(f"Analysis budget exhausted for {case_number}. Using enhanced rule-based.")
+            return analyze_case_rule_based(case_type, description)
+        timeout = min(timeout, remaining) if timeout else remaining
+
     prompt = f"""
 You are a legal case analyzer for an Indian court system (Nya-Alaya). Analyze the following case and provide assessments.
 
@@ -59,37 +107,22 @@ Respond ONLY with strict JSON (no markdown, no extra text):
 
     if OLLAMA_AVAILABLE:
         try:
-            import signal
-            
-            def timeout_handler(signum, frame):
-                raise TimeoutError(f"AI analysis timed out after {timeout} seconds")
-            
-            # Set timeout only if specified
-            if timeout:
-                signal.signal(signal.SIGALRM, timeout_handler)
-                signal.alarm(timeout)
-            
-            try:
-                resp = ollama.chat(
-                    model=OLLAMA_MODEL,
-                    messages=[
-                        {"role": "system", "content": "Respond only with valid JSON. No markdown."},
-                        {"role": "user", "content": prompt},
-                    ],
-                    options={"temperature": 0.2},
-                )
-                if timeout:
-                    signal.alarm(0)  # Cancel timeout
-                result_text = resp["message"]["content"].strip()
-                return _normalize_json(result_text, case_type)
-            except TimeoutError as e:
-                if timeout:
-                    signal.alarm(0)  # Cancel timeout
-                print(f"AI analysis timed out for {case_number}. Falling back to enhanced rule-based.")
-                return analyze_case_rule_based(case_type, description)
-                
+            resp = _get_client(timeout).chat(
+                model=OLLAMA_MODEL,
+                messages=[
+                    {"role": "system", "content": "Respond only with valid JSON. No markdown."},
+                    {"role": "user", "content": prompt},
+                ],
+                options={"temperature": 0.2},
+            )
+            result_text = resp["message"]["content"].strip()
+            return _normalize_json(result_text, case_type)
         except Exception as e:
-            print(f"Ollama failed: {e}. Falling back to enhanced rule-based.")
+            # httpx raises ReadTimeout/ConnectTimeout etc. when the client timeout hits
+            if isinstance(e, TimeoutError) or "Timeout" in type(e).__name__:
+                print(f"AI analysis timed out for {case_number}. Falling back to enhanced rule-based.")
+            else:
+                print(f"Ollama failed: {e}. Falling back to enhanced rule-based.")
 
     # Fallback
     return analyze_case_rule_based(case_type, description)
@@ -114,60 +147,157 @@ def _normalize_json(text: str, case_type: str):
         data["complexity"] = "medium"
     if "reasoning" not in data:
         data["reasoning"] = f"Model analysis for {case_type} case"
+    data["source"] = "ai"
     return data
 
 
+# Keyword tables for analyze_case_rule_based. Courts can override any of
+# them with a JSON file named by CASE_RULES_PATH, e.g.
+#   {"critical_keywords": {"bail": 0.3}, "special_cases": {"murder": [0.3, 60, "high"]}}
+# Keywords match at the start of a word, so "witness" also hits "witnesses".
+DEFAULT_RULES = {
+    # Base values by case type
+    'base_urgency': {'criminal': 0.75, 'family': 0.65, 'civil': 0.45, 'other': 0.35},
+    'base_duration': {'criminal': 90, 'family': 75, 'civil': 60, 'other': 45},
+    # HIGH URGENCY indicators (+0.15 to +0.35)
+    'critical_keywords': {
+        'emergency': 0.35, 'immediate': 0.3, 'urgent': 0.25,
+        'bail': 0.3, 'habeas corpus': 0.35, 'life threat': 0.35,
+        'domestic violence': 0.3, 'child abuse': 0.35, 'danger': 0.25,
+        'custody': 0.2, 'injunction': 0.2, 'restraining': 0.2
+    },
+    # COMPLEXITY indicators
+    'complex_indicators': [
+        'multiple parties', 'witnesses', 'expert testimony', 'forensic',
+        'extensive evidence', 'complex', 'cross-examination', 'appeal',
+        'precedent', 'constitutional', 'interpretation'
+    ],
+    'simple_indicators': [
+        'simple', 'straightforward', 'uncontested', 'agreed',
+        'minor', 'routine', 'procedural'
+    ],
+    # DURATION-SPECIFIC keywords
+    'time_keywords': {
+        'brief': -15, 'quick': -10, 'lengthy': +30,
+        'detailed': +20, 'extensive': +30, 'summary': -20
+    },
+    # SPECIAL CASE TYPES: (urgency modifier, duration modifier, complexity); first listed match wins
+    'special_cases': {
+        'murder': (0.3, 60, 'high'),
+        'rape': (0.35, 60, 'high'),
+        'kidnapping': (0.35, 45, 'high'),
+        'fraud': (0.1, 30, 'medium'),
+        'divorce': (0.0, -15, 'medium'),
+        'property dispute': (-0.1, 15, 'medium'),
+        'traffic': (-0.2, -20, 'low'),
+    },
+}
+
+
+_WITNESS_COUNT = re.compile(r'(\d+)\s+witness')
+
+
+def _starts_word(text, start):
+    return start == 0 or not (text[start - 1].isalnum() or text[start - 1] == '_')
+
+
+class RuleSet:
+    """
+    Keyword tables compiled into one matcher, so a description is scanned
+    once for every table instead of once per keyword. Uses an Aho-Corasick
+    automaton when pyahocorasick is installed; without it each distinct
+    keyword is looked up once with str.find, which at the default table
+    size is as fast as any single-pass regex in pure Python.
+    """
+    def __init__(self, tables):
+        self.tables = tables
+        keywords = set(tables['critical_keywords']) | set(tables['complex_indicators']) \
+            | set(tables['simple_indicators']) | set(tables['time_keywords']) | set(tables['special_cases'])
+        keywords.add('witness')  # triggers the witness count
+        if AHOCORASICK_AVAILABLE:
+            self.automaton = ahocorasick.Automaton()
+            for keyword in keywords:
+                self.automaton.add_word(keyword, keyword)
+            self.automaton.make_automaton()
+        else:
+            self.automaton = None
+            self.keywords = sorted(keywords)
+
+    def _hits(self, text):
+        hits = set()
+        if self.automaton is not None:
+            for end, keyword in self.automaton.iter(text):
+                if _starts_word(text, end - len(keyword) + 1):
+                    hits.add(keyword)
+        else:
+            for keyword in self.keywords:
+                if keyword not in text:
+                    continue
+                start = text.find(keyword)
+                while start != -1 and not _starts_word(text, start):
+                    start = text.find(keyword, start + 1)
+                if start != -1:
+                    hits.add(keyword)
+        return hits
+
+    def scan(self, text):
+        """Returns (matched keywords, number before the first 'witness' or None)."""
+        hits, witnesses = self._hits(text), None
+        if 'witness' in hits:
+            match = _WITNESS_COUNT.search(text)
+            if match:
+                witnesses = int(match.group(1))
+        return hits, witnesses
+
+
+def load_rules(path=None):
+    """
+    (Re)compiles the rule tables, overriding DEFAULT_RULES table by table
+    with the JSON file at `path` (default: CASE_RULES_PATH, if set).
+    """
+    global RULES
+    tables = {name: table.copy() for name, table in DEFAULT_RULES.items()}
+    path = path or os.environ.get("CASE_RULES_PATH")
+    if path:
+        with open(path, encoding="utf-8") as fh:
+            overrides = json.load(fh)
+        unknown = set(overrides) - set(tables)
+        if unknown:
+            raise ValueError(f"Unknown rule tables in {path}: {', '.join(sorted(unknown))}")
+        tables.update(overrides)
+    for name in ('critical_keywords', 'time_keywords'):
+        tables[name] = {k.lower(): v for k, v in tables[name].items()}
+    for name in ('complex_indicators', 'simple_indicators'):
+        tables[name] = [k.lower() for k in tables[name]]
+    tables['special_cases'] = {k.lower(): tuple(v) for k, v in tables['special_cases'].items()}
+    RULES = RuleSet(tables)
+    return RULES
+
+
+RULES = load_rules()
+
+
 def analyze_case_rule_based(case_type, description):
     """Enhanced rule-based fallback with sophisticated heuristics."""
-    
+    tables = RULES.tables
+
     # Base values by case type
-    base_urgency = {
-        'criminal': 0.75,
-        'family': 0.65,
-        'civil': 0.45,
-        'other': 0.35
-    }.get(case_type, 0.5)
-
-    base_duration = {
-        'criminal': 90,
-        'family': 75,
-        'civil': 60,
-        'other': 45
-    }.get(case_type, 60)
+    base_urgency = tables['base_urgency'].get(case_type, 0.5)
+    base_duration = tables['base_duration'].get(case_type, 60)
 
     complexity = 'medium'
     urgency_modifier = 0.0
     duration_modifier = 0
     
     if description:
-        desc_lower = description.lower()
-        
-        # HIGH URGENCY indicators (+0.15 to +0.35)
-        critical_keywords = {
-            'emergency': 0.35, 'immediate': 0.3, 'urgent': 0.25,
-            'bail': 0.3, 'habeas corpus': 0.35, 'life threat': 0.35,
-            'domestic violence': 0.3, 'child abuse': 0.35, 'danger': 0.25,
-            'custody': 0.2, 'injunction': 0.2, 'restraining': 0.2
-        }
-        
-        for keyword, boost in critical_keywords.items():
-            if keyword in desc_lower:
+        hits, num_witnesses = RULES.scan(description.lower())
+
+        for keyword, boost in tables['critical_keywords'].items():
+            if keyword in hits:
                 urgency_modifier = max(urgency_modifier, boost)
-        
-        # COMPLEXITY indicators
-        complex_indicators = [
-            'multiple parties', 'witnesses', 'expert testimony', 'forensic',
-            'extensive evidence', 'complex', 'cross-examination', 'appeal',
-            'precedent', 'constitutional', 'interpretation'
-        ]
-        
-        simple_indicators = [
-            'simple', 'straightforward', 'uncontested', 'agreed',
-            'minor', 'routine', 'procedural'
-        ]
-        
-        complex_count = sum(1 for ind in complex_indicators if ind in desc_lower)
-        simple_count = sum(1 for ind in simple_indicators if ind in desc_lower)
+
+        complex_count = sum(1 for ind in tables['complex_indicators'] if ind in hits)
+        simple_count = sum(1 for ind in tables['simple_indicators'] if ind in hits)
         
         if complex_count >= 2:
             complexity = 'high'
@@ -181,37 +311,15 @@ def analyze_case_rule_based(case_type, description):
         
         # COUNT-BASED adjustments
         # Count witnesses (adds 10 min per witness mentioned)
-        if 'witness' in desc_lower:
-            import re
-            # Look for numbers before "witness"
-            witness_match = re.search(r'(\d+)\s+witness', desc_lower)
-            if witness_match:
-                num_witnesses = int(witness_match.group(1))
-                duration_modifier += min(num_witnesses * 10, 60)  # Cap at +60 min
-        
-        # DURATION-SPECIFIC keywords
-        time_keywords = {
-            'brief': -15, 'quick': -10, 'lengthy': +30,
-            'detailed': +20, 'extensive': +30, 'summary': -20
-        }
-        
-        for keyword, time_mod in time_keywords.items():
-            if keyword in desc_lower:
+        if num_witnesses is not None:
+            duration_modifier += min(num_witnesses * 10, 60)  # Cap at +60 min
+
+        for keyword, time_mod in tables['time_keywords'].items():
+            if keyword in hits:
                 duration_modifier += time_mod
-        
-        # SPECIAL CASE TYPES
-        special_cases = {
-            'murder': (0.3, 60, 'high'),
-            'rape': (0.35, 60, 'high'),
-            'kidnapping': (0.35, 45, 'high'),
-            'fraud': (0.1, 30, 'medium'),
-            'divorce': (0.0, -15, 'medium'),
-            'property dispute': (-0.1, 15, 'medium'),
-            'traffic': (-0.2, -20, 'low'),
-        }
-        
-        for case_term, (urg_mod, dur_mod, comp) in special_cases.items():
-            if case_term in desc_lower:
+
+        for case_term, (urg_mod, dur_mod, comp) in tables['special_cases'].items():
+            if case_term in hits:
                 urgency_modifier = max(urgency_modifier, urg_mod)
                 duration_modifier += dur_mod
                 complexity = comp
@@ -231,7 +339,8 @@ def analyze_case_rule_based(case_type, description):
         'urgency': round(final_urgency, 2),
         'estimated_duration': final_duration,
         'complexity': complexity,
-        'reasoning': reasoning
+        'reasoning': reasoning,
+        'source': 'rules'
     }
 
 
@@ -254,4 +363,42 @@ def calculate_ai_priority(case, ai_analysis):
     # Urgency now has 70% weight instead of 50%
     priority = (0.7 * urgency) + (0.15 * age_score) + (0.15 * type_weight)
 
-    return round(min(priority, 1.0), 3)
\ No newline at end of file
+    return round(min(priority, 1.0), 3)
+
+
+def analyze_cases_bulk(items, workers=4, max_pending=None, timeout=30, budget=None, analyze=None):
+    """
+    Analyze many cases concurrently against the local Ollama server.
+    items: iterable of dicts with case_number, case_type, description, filed_date
+    Yields (item, analysis) as each call completes (not in input order).
+    At most max_pending requests are in flight (default 2 x workers); the
+    input iterable is only consumed as slots free up, so huge backlogs can
+    be streamed without queueing them all in memory.
+    timeout: per-request cap in seconds; budget: seconds for the whole run,
+    after which the remaining cases get the rule-based analysis at once
+    analyze: per-case function with analyze_case_with_ai's signature (default)
+    """
+    analyze = analyze or analyze_case_with_ai
+    deadline = time.monotonic() + budget if budget else None
+    max_pending = max_pending or workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for item in items:
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+            future = pool.submit(
+                analyze,
+                case_number=item['case_number'],
+                case_type=item['case_type'],
+                description=item['description'],
+                filed_date=item['filed_date'],
+                timeout=timeout,
+                deadline=deadline,
+            )
+            pending[future] = item
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
@@ -148,3 +148,58 @@ import os
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID", '')
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN", '')
 TWILIO_PHONE_NUMBER = os.environ.get("TWILIO_PHONE_NUMBER", '')
+
+# Notification outbox worker (python manage.py send_notifications)
+SMS_WORKERS = int(os.environ.get("SMS_WORKERS", 4))
+SMS_RATE_PER_SECOND = float(os.environ.get("SMS_RATE_PER_SECOND", 1))
+# Rows a worker claimed but never finished (it crashed) are sent again after this
+SMS_CLAIM_TIMEOUT = int(os.environ.get("SMS_CLAIM_TIMEOUT", 300))  # seconds
+
+# Background planner jobs (POST /regenerate/)
+PLANNER_WORKERS = int(os.environ.get("PLANNER_WORKERS", 1))
+# A job whose worker reports no progress for this long is taken to be dead
+# and loses its lock; each solver stage reports, and none runs over a minute
+PLANNER_JOB_TIMEOUT = int(os.environ.get("PLANNER_JOB_TIMEOUT", 600))  # seconds
+
+# Policy embedding index; set to a directory to memory-map it across restarts
+POLICY_INDEX_PATH = os.environ.get("POLICY_INDEX_PATH") or None
+# How often a query re-checks the Policy table for rows added, deleted or
+# re-embedded elsewhere (load_policies, other workers); 0 checks every query
+POLICY_INDEX_TTL = float(os.environ.get("POLICY_INDEX_TTL", 30))  # seconds
+POLICY_QUERY_CACHE_SIZE = int(os.environ.get("POLICY_QUERY_CACHE_SIZE", 256))
+POLICY_EMBEDDING_MODEL = os.environ.get("POLICY_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+POLICY_EMBEDDING_DTYPE = os.environ.get("POLICY_EMBEDDING_DTYPE", "float32")  # or "int8"
+
+# Persistent LLM case-analysis cache (python manage.py analysis_cache)
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", 10000))
+
+# Background AI analysis of new/edited cases (Case.analysis_status)
+INTAKE_WORKERS = int(os.environ.get("INTAKE_WORKERS", 2))
+
+# Fitted hearing-duration table (python manage.py fit_durations)
+DURATION_MODEL_PATH = os.environ.get("DURATION_MODEL_PATH") or str(BASE_DIR / "duration_model.json")
+DURATION_SEED = int(os.environ.get("DURATION_SEED", 0))  # changes the per-case jitter of unfitted estimates
+
+# REST API list endpoints: cursor pages, per-view query filters and ?ordering=
+REST_FRAMEWORK = {
+    "DEFAULT_PAGINATION_CLASS": "scheduler.pagination.CursorPage",
+    "PAGE_SIZE": int(os.environ.get("API_PAGE_SIZE", 50)),
+    "DEFAULT_FILTER_BACKENDS": ["scheduler.filters.ParamFilter", "rest_framework.filters.OrderingFilter"],
+}
+
+# Cached API and dashboard responses with ETags (scheduler.tools.response_cache):
+# "file", "locmem" or "off". locmem is per process: writes from other
+# processes (run_planner, other web workers) don't invalidate it, so only
+# use it with a single web worker
+RESPONSE_CACHE = os.environ.get("RESPONSE_CACHE", "file")
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {
+        "BACKEND": ("django.core.cache.backends.filebased.FileBasedCache" if RESPONSE_CACHE == "file"
+                    else "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": (os.environ.get("RESPONSE_CACHE_DIR") or str(BASE_DIR / "response_cache")
+                     if RESPONSE_CACHE == "file" else "responses"),
+        "TIMEOUT": int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 300)),  # seconds
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1000))},
+    },
+}
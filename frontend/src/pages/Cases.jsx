@@ -15,13 +15,17 @@ import {
 	Brain,
 	Clock
 } from "lucide-react";
-import { casesAPI, schedulesAPI, judgesAPI } from "../services/api";
+import api, { casesAPI, judgesAPI, fetchAllPages } from "../services/api";
 import SearchBar from "../components/SearchBar";
 import "./Cases.css";
 
+// Columns the case cards need; ai_analysis stays on the server
+const CASE_LIST_FIELDS = "id,case_number,case_type,description,filed_in,urgency,estimated_duration,assigned_judge,analysis_status";
+
 const Cases = () => {
 	const [cases, setCases] = useState([]);
-	const [schedules, setSchedules] = useState([]);
+	const [nextPage, setNextPage] = useState(null);
+	const [loadingMore, setLoadingMore] = useState(false);
 	const [judges, setJudges] = useState([]);
 	const [loading, setLoading] = useState(true);
 	const [showModal, setShowModal] = useState(false);
@@ -38,16 +42,25 @@ const Cases = () => {
 	});
 
 	useEffect(() => {
-		fetchCases();
-		fetchSchedules();
 		fetchJudges();
 	}, []);
 
+	// Search runs on the server once typing pauses
+	useEffect(() => {
+		const timer = setTimeout(fetchCases, searchTerm ? 300 : 0);
+		return () => clearTimeout(timer);
+	}, [filterType, searchTerm]);
+
 	const fetchCases = async () => {
 		try {
 			setLoading(true);
-			const response = await casesAPI.getAll();
-			setCases(response.data);
+			const { data } = await casesAPI.getAll({
+				fields: CASE_LIST_FIELDS,
+				case_type: filterType === "all" ? undefined : filterType,
+				q: searchTerm.trim() || undefined,
+			});
+			setCases(data.results);
+			setNextPage(data.next);
 		} catch (error) {
 			console.error("Error fetching cases:", error);
 		} finally {
@@ -55,24 +68,39 @@ const Cases = () => {
 		}
 	};
 
-	const fetchSchedules = async () => {
+	const loadMoreCases = async () => {
 		try {
-			const response = await schedulesAPI.getAll();
-			setSchedules(response.data);
+			setLoadingMore(true);
+			const { data } = await api.get(nextPage);
+			setCases((prev) => [...prev, ...data.results]);
+			setNextPage(data.next);
 		} catch (error) {
-			console.error("Error fetching schedules:", error);
+			console.error("Error fetching cases:", error);
+		} finally {
+			setLoadingMore(false);
 		}
 	};
 
 	const fetchJudges = async () => {
 		try {
-			const response = await judgesAPI.getAll();
-			setJudges(response.data);
+			setJudges(await fetchAllPages(judgesAPI.getAll, { fields: "id,name" }));
 		} catch (error) {
 			console.error("Error fetching judges:", error);
 		}
 	};
 
+	const refreshWhenAnalyzed = async (caseId) => {
+		// AI analysis runs in the background; swap in the refined values once ready
+		for (let attempt = 0; attempt < 60; attempt++) {
+			await new Promise((resolve) => setTimeout(resolve, 2000));
+			const { data } = await casesAPI.getById(caseId);
+			if (data.analysis_status !== "pending" && data.analysis_status !== "running") {
+				setCases((prev) => prev.map((c) => (c.id === data.id ? data : c)));
+				return;
+			}
+		}
+	};
+
 	const handleSubmit = async (e) => {
 		e.preventDefault();
 
@@ -87,15 +115,18 @@ const Cases = () => {
 		try {
 			setIsAnalyzing(true);
 
-			if (selectedCase) {
-				await casesAPI.update(selectedCase.id, dataToSend);
-			} else {
-				await casesAPI.create(dataToSend);
-			}
+			const { data: saved } = selectedCase
+				? await casesAPI.update(selectedCase.id, dataToSend)
+				: await casesAPI.create(dataToSend);
 
 			setShowModal(false);
 			resetForm();
 			await fetchCases();
+			if (saved.analysis_status === "pending") {
+				refreshWhenAnalyzed(saved.id).catch((error) =>
+					console.error("Error polling case analysis:", error)
+				);
+			}
 		} catch (error) {
 			console.error("Error saving case:", error);
 			alert("Error saving case. Please check the form data.");
@@ -136,15 +167,6 @@ const Cases = () => {
 		});
 	};
 
-	const filteredCases = cases.filter((c) => {
-		const matchesSearch = c.case_number
-			.toLowerCase()
-			.includes(searchTerm.toLowerCase());
-		const matchesFilter =
-			filterType === "all" || c.case_type === filterType;
-		return matchesSearch && matchesFilter;
-	});
-
 	return (
 		<div className="cases-page">
 			<header className="page-header">
@@ -190,7 +212,7 @@ const Cases = () => {
 					value={searchTerm}
 					onChange={setSearchTerm}
 					onClear={() => setSearchTerm("")}
-					placeholder="Search cases by number..."
+					placeholder="Search cases by number or description..."
 					filterOptions={[
 						{ value: "all", label: "All Types" },
 						{ value: "civil", label: "Civil" },
@@ -209,7 +231,7 @@ const Cases = () => {
 						<div className="spinner"></div>
 						<p>Loading cases...</p>
 					</div>
-				) : filteredCases.length === 0 ? (
+				) : cases.length === 0 ? (
 					<div className="empty-state">
 						<FileText size={48} className="text-tertiary" />
 						<h3>No cases found</h3>
@@ -217,7 +239,7 @@ const Cases = () => {
 					</div>
 				) : (
 					<div className="cases-grid">
-						{filteredCases.map((caseItem, index) => (
+						{cases.map((caseItem, index) => (
 							<motion.div
 								key={caseItem.id}
 								className="case-card glass-panel"
@@ -276,6 +298,13 @@ const Cases = () => {
 						))}
 					</div>
 				)}
+				{!loading && nextPage && (
+					<div style={{ display: "flex", justifyContent: "center", marginTop: "24px" }}>
+						<button className="btn btn-secondary" onClick={loadMoreCases} disabled={loadingMore}>
+							{loadingMore ? "Loading..." : "Load more cases"}
+						</button>
+					</div>
+				)}
 			</div>
 
 			<AnimatePresence>
@@ -10,7 +10,7 @@ import {
   Scale,
   Sparkles
 } from 'lucide-react';
-import { casesAPI, judgesAPI, lawyersAPI, planningAPI } from '../services/api';
+import { casesAPI, judgesAPI, lawyersAPI, planningAPI, fetchAllPages } from '../services/api';
 import './Dashboard.css';
 
 const Dashboard = () => {
@@ -28,24 +28,23 @@ const Dashboard = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [casesRes, judgesRes, lawyersRes] = await Promise.all([
-          casesAPI.getAll(),
-          judgesAPI.getAll(),
-          lawyersAPI.getAll()
+        // Counts come from the server; only the 5 latest cases are downloaded
+        const [statsRes, recentRes, judges, lawyers] = await Promise.all([
+          casesAPI.getStats({ days: 7 }),
+          casesAPI.getAll({ ordering: '-filed_in', page_size: 5, fields: 'id,case_number,filed_in' }),
+          fetchAllPages(judgesAPI.getAll, { fields: 'id' }),
+          fetchAllPages(lawyersAPI.getAll, { fields: 'id' })
         ]);
 
         setStats({
-          totalCases: casesRes.data.length,
-          activeJudges: judgesRes.data.length,
-          activeLawyers: lawyersRes.data.length,
-          pendingCases: casesRes.data.filter(c => !c.is_resolved).length
+          totalCases: statsRes.data.total,
+          activeJudges: judges.length,
+          activeLawyers: lawyers.length,
+          pendingCases: statsRes.data.open
         });
         
         // Get recent cases (last 5)
-        const recent = casesRes.data
-          .sort((a, b) => new Date(b.filed_in) - new Date(a.filed_in))
-          .slice(0, 5);
-        setRecentCases(recent);
+        setRecentCases(recentRes.data.results);
         
         // Calculate case trend for last 7 days
         const today = new Date();
@@ -55,12 +54,7 @@ const Dashboard = () => {
           return date.toISOString().split('T')[0];
         });
         
-        const trend = last7Days.map(date => {
-          const count = casesRes.data.filter(c => 
-            c.filed_in === date
-          ).length;
-          return count;
-        });
+        const trend = last7Days.map(date => statsRes.data.filed_per_day[date] || 0);
         
         setCasesTrend(trend);
       } catch (error) {
@@ -73,10 +67,21 @@ const Dashboard = () => {
     fetchData();
   }, []);
 
+  const waitForJob = async (jobId) => {
+    // Planner runs in the background; poll until it finishes
+    for (;;) {
+      const { data: job } = await planningAPI.getJob(jobId);
+      if (job.status === 'succeeded' || job.status === 'failed') return job;
+      await new Promise(resolve => setTimeout(resolve, 2000));
+    }
+  };
+
   const handleRegenerateSchedule = async () => {
     try {
       setRegenerating(true);
-      await planningAPI.regenerate();
+      const { data } = await planningAPI.regenerate();
+      const job = await waitForJob(data.job.id);
+      if (job.status === 'failed') throw new Error(job.error);
       alert('Schedule regenerated successfully! AI has optimized all case assignments.');
     } catch (error) {
       console.error("Error regenerating schedule:", error);
@@ -1,7 +1,7 @@
 import { useState, useEffect } from "react";
 import { motion, AnimatePresence } from "framer-motion";
 import { Scale, Mail, Phone, MapPin, Plus, X, Calendar, Clock } from "lucide-react";
-import { judgesAPI, schedulesAPI, casesAPI } from "../services/api";
+import { judgesAPI, schedulesAPI, fetchAllPages } from "../services/api";
 import SearchBar from "../components/SearchBar";
 import "./Judges.css";
 
@@ -46,8 +46,7 @@ const Judges = () => {
 
   const fetchJudges = async () => {
     try {
-      const response = await judgesAPI.getAll();
-      setJudges(response.data);
+      setJudges(await fetchAllPages(judgesAPI.getAll));
     } catch (error) {
       console.error("Error fetching judges:", error);
     } finally {
@@ -66,23 +65,13 @@ const Judges = () => {
     setLoadingSchedules(true);
     
     try {
-      const [schedulesRes, casesRes] = await Promise.all([
-        schedulesAPI.getAll(),
-        casesAPI.getAll()
-      ]);
-      
-      // Filter schedules for this judge and enrich with case data
-      const judgeScheduleData = schedulesRes.data
-        .filter(s => String(s.judge) === String(judge.id))
-        .map(schedule => {
-          const caseData = casesRes.data.find(c => c.id === schedule.case);
-          return {
-            ...schedule,
-            caseNumber: caseData?.case_number || 'Unknown',
-            caseType: caseData?.case_type || 'Unknown'
-          };
-        })
-        .sort((a, b) => new Date(a.start_time) - new Date(b.start_time));
+      // Schedules come filtered by judge, in start_time order, with case details
+      const schedules = await fetchAllPages(schedulesAPI.getAll, { judge: judge.id });
+      const judgeScheduleData = schedules.map(schedule => ({
+        ...schedule,
+        caseNumber: schedule.case_number || 'Unknown',
+        caseType: schedule.case_type || 'Unknown'
+      }));
       
       setJudgeSchedules(judgeScheduleData);
     } catch (error) {
@@ -1,7 +1,7 @@
 import { useState, useEffect } from "react";
 import { motion, AnimatePresence } from "framer-motion";
 import { Users, Mail, Phone, Briefcase, Plus, X, Calendar, Clock, FileText } from "lucide-react";
-import { lawyersAPI, casesAPI } from "../services/api";
+import { lawyersAPI, casesAPI, fetchAllPages } from "../services/api";
 import SearchBar from "../components/SearchBar";
 import "./Lawyers.css";
 
@@ -46,18 +46,13 @@ const Lawyers = () => {
 
   const fetchLawyers = async () => {
     try {
-      const [lawyersRes, casesRes] = await Promise.all([
-        lawyersAPI.getAll(),
-        casesAPI.getAll()
-      ]);
-      setLawyers(lawyersRes.data);
+      const lawyerRows = await fetchAllPages(lawyersAPI.getAll);
+      setLawyers(lawyerRows);
       
-      // Calculate case counts for each lawyer
+      // Case counts are annotated by the server
       const counts = {};
-      lawyersRes.data.forEach(lawyer => {
-        counts[lawyer.id] = casesRes.data.filter(c => 
-          c.lawyers && c.lawyers.includes(lawyer.id)
-        ).length;
+      lawyerRows.forEach(lawyer => {
+        counts[lawyer.id] = lawyer.case_count;
       });
       setLawyerCaseCounts(counts);
     } catch (error) {
@@ -77,12 +72,11 @@ const Lawyers = () => {
     setLoadingCases(true);
     
     try {
-      const casesRes = await casesAPI.getAll();
-      
-      // Filter cases assigned to this lawyer
-      const assignedCases = casesRes.data
-        .filter(c => c.lawyers && c.lawyers.map(String).includes(String(lawyer.id)))
-        .sort((a, b) => new Date(b.filed_in) - new Date(a.filed_in));
+      // Cases assigned to this lawyer, newest first
+      const assignedCases = await fetchAllPages(casesAPI.getAll, {
+        lawyer: lawyer.id,
+        ordering: '-filed_in'
+      });
       
       setLawyerCases(assignedCases);
     } catch (error) {
@@ -37,18 +37,31 @@ api.interceptors.request.use(config => {
   return config;
 }, error => Promise.reject(error));
 
+// List endpoints return cursor pages: { next, previous, results }.
+// Follows `next` until the end; meant for small tables or filtered lists.
+export const fetchAllPages = async (getAll, params = {}) => {
+  let { data } = await getAll({ page_size: 1000, ...params });
+  const rows = [...data.results];
+  while (data.next) {
+    ({ data } = await api.get(data.next));
+    rows.push(...data.results);
+  }
+  return rows;
+};
+
 // Cases API
 export const casesAPI = {
-  getAll: () => api.get('/cases/'),
+  getAll: (params = {}) => api.get('/cases/', { params }),
   getById: (id) => api.get(`/cases/${id}/`),
   create: (data) => api.post('/cases/', data),
   update: (id, data) => api.put(`/cases/${id}/`, data),
   delete: (id) => api.delete(`/cases/${id}/`),
+  getStats: (params = {}) => api.get('/cases/stats/', { params }),
 };
 
 // Judges API
 export const judgesAPI = {
-  getAll: () => api.get('/judges/'),
+  getAll: (params = {}) => api.get('/judges/', { params }),
   getById: (id) => api.get(`/judges/${id}/`),
   create: (data) => api.post('/judges/', data),
   update: (id, data) => api.put(`/judges/${id}/`, data),
@@ -57,7 +70,7 @@ export const judgesAPI = {
 
 // Lawyers API
 export const lawyersAPI = {
-  getAll: () => api.get('/lawyers/'),
+  getAll: (params = {}) => api.get('/lawyers/', { params }),
   getById: (id) => api.get(`/lawyers/${id}/`),
   create: (data) => api.post('/lawyers/', data),
   update: (id, data) => api.put(`/lawyers/${id}/`, data),
@@ -66,7 +79,7 @@ export const lawyersAPI = {
 
 // Schedules API
 export const schedulesAPI = {
-  getAll: () => api.get('/schedules/'),
+  getAll: (params = {}) => api.get('/schedules/', { params }),
   getById: (id) => api.get(`/schedules/${id}/`),
   create: (data) => api.post('/schedules/', data),
   update: (id, data) => api.put(`/schedules/${id}/`, data),
@@ -75,7 +88,13 @@ export const schedulesAPI = {
 
 // Planning API
 export const planningAPI = {
-  regenerate: () => api.get('/regenerate/'),
+  regenerate: (options = {}) => api.post('/regenerate/', options),
+  getJob: (id) => api.get(`/regenerate/${id}/`),
+};
+
+// Full-text search over cases, judges and lawyers
+export const searchAPI = {
+  search: (q, params = {}) => api.get('/search/', { params: { q, ...params } }),
 };
 
 export default api;
@@ -1,8 +1,12 @@
 from django.contrib import admin
-from .models import Judge, Lawyer, Case, Schedule
+from .models import Judge, Lawyer, Case, Schedule, Notification, PlannerJob, AnalysisCache, HearingRecord
 # Register your models here.
 
 admin.site.register(Judge)
 admin.site.register(Lawyer)
 admin.site.register(Case)
 admin.site.register(Schedule)
+admin.site.register(Notification)
+admin.site.register(PlannerJob)
+admin.site.register(AnalysisCache)
+admin.site.register(HearingRecord)
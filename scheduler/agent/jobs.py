@@ -0,0 +1,185 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from scheduler.models import PlannerJob
+from scheduler.tools import response_cache
+
+# PlannerJob.lock value held by the single active job
+LOCK_NAME = "planner"
+# HybridPlannerAgent options a job may carry
+JOB_OPTIONS = ("decompose", "incremental", "top_k_judges", "top_k_lawyers", "target_day",
+               "horizon_days", "freeze_days", "time_budget")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("1", "true", "yes", "on"):
+        return True
+    if text in ("0", "false", "no", "off"):
+        return False
+    raise ValueError("must be true or false")
+
+def _whole(minimum, maximum):
+    def parse(value):
+        try:
+            if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+                raise ValueError
+            number = int(value)
+        except (TypeError, ValueError):
+            raise ValueError("must be a whole number") from None
+        if not minimum <= number <= maximum:
+            raise ValueError(f"must be between {minimum} and {maximum}")
+        return number
+    return parse
+
+def _seconds(value):
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        seconds = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("must be a number of seconds") from None
+    if not seconds > 0:
+        raise ValueError("must be positive")
+    return seconds
+
+def _day(value):
+    try:
+        return date.fromisoformat(str(value)).isoformat()
+    except ValueError:
+        raise ValueError("must be a date (YYYY-MM-DD)") from None
+
+# Parser per JOB_OPTIONS entry; each returns the JSON-safe value stored on the job
+OPTION_PARSERS = {
+    "decompose": _flag,
+    "incremental": _flag,
+    "top_k_judges": _whole(1, 1000),
+    "top_k_lawyers": _whole(1, 1000),
+    "target_day": _day,
+    "horizon_days": _whole(1, 31),
+    "freeze_days": _whole(0, 30),
+    "time_budget": _seconds,
+}
+
+def clean_job_options(data):
+    """
+    JOB_OPTIONS from a request body, coerced to their types. Blank values
+    are left out; a bad value raises ValueError naming the option.
+    """
+    options = {}
+    for name in JOB_OPTIONS:
+        value = data.get(name)
+        if value is None or value == "":
+            continue
+        try:
+            options[name] = OPTION_PARSERS[name](value)
+        except ValueError as e:
+            raise ValueError(f"{name} {e}") from None
+    return options
+
+def _init_worker(settings_module):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+
+def _get_executor():
+    """Process pool shared by all jobs of this web worker, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PLANNER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(os.environ["DJANGO_SETTINGS_MODULE"],),
+            )
+    return _executor
+
+def _finish(job_id, status, **fields):
+    PlannerJob.objects.filter(id=job_id).update(
+        status=status, lock=None, finished_at=timezone.now(), **fields
+    )
+
+def _expire_stale_jobs():
+    """
+    Releases the lock of jobs whose worker died without finishing: no
+    progress report (or, while still queued, no start) for
+    PLANNER_JOB_TIMEOUT seconds. A long run keeps its lock as long as it
+    keeps reporting.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.PLANNER_JOB_TIMEOUT)
+    (PlannerJob.objects.filter(lock=LOCK_NAME)
+     .annotate(last_seen=Coalesce("heartbeat_at", "created_at"))
+     .filter(last_seen__lt=cutoff)
+     .update(status="failed", lock=None, error="Timed out", finished_at=timezone.now()))
+
+class LockLost(Exception):
+    """The job was timed out while its worker was still running."""
+
+def _planner_job_done(future):
+    # The planner's own bump happens in the worker process, which a locmem
+    # response cache in this one never sees
+    response_cache.bump("schedules", "cases", "lawyers")
+
+def submit_planner_job(**options):
+    """
+    Queues a planner run in the worker pool and returns (job, created).
+    Only one job may be queued or running at a time; while one is active,
+    it is returned instead of starting a second solve.
+    """
+    _expire_stale_jobs()
+    options = {k: v for k, v in options.items() if k in JOB_OPTIONS and v is not None}
+    try:
+        with transaction.atomic():
+            job = PlannerJob.objects.create(lock=LOCK_NAME, options=options)
+    except IntegrityError:
+        return PlannerJob.objects.get(lock=LOCK_NAME), False
+
+    try:
+        future = _get_executor().submit(run_planner_job, job.id)
+    except Exception as e:
+        _finish(job.id, "failed", error=str(e))
+        raise
+    future.add_done_callback(_planner_job_done)
+    return job, True
+
+def run_planner_job(job_id):
+    """Runs in a worker process: executes the planner and records progress."""
+    from scheduler.agent.planner_agent_v2 import HybridPlannerAgent
+
+    close_old_connections()
+    now = timezone.now()
+    PlannerJob.objects.filter(id=job_id).update(status="running", started_at=now, heartbeat_at=now)
+    options = dict(PlannerJob.objects.get(id=job_id).options)
+    if options.get("target_day"):
+        options["target_day"] = date.fromisoformat(options["target_day"])
+
+    def progress(stage, objective):
+        # Doubles as the heartbeat. If the lock was taken away, another job
+        # may be running, so stop before writing anything ("persist" comes
+        # right before act())
+        held = PlannerJob.objects.filter(id=job_id, lock=LOCK_NAME).update(
+            stage=stage, objective=objective, heartbeat_at=timezone.now())
+        if not held:
+            raise LockLost(f"Lost the planner lock before stage '{stage}'; nothing was saved")
+
+    try:
+        agent = HybridPlannerAgent(progress=progress, **options)
+        agent.run()
+        unscheduled = [{"case_number": c.case_number, "reason": reason} for c, reason in agent.unscheduled]
+        _finish(job_id, "succeeded", stage="done", objective=agent.objective, unscheduled=unscheduled)
+    except LockLost as e:
+        # The row already records the timeout; keep its status, add why we stopped
+        PlannerJob.objects.filter(id=job_id).update(error=str(e))
+    except Exception as e:
+        _finish(job_id, "failed", error=str(e))
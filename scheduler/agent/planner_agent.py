@@ -5,6 +5,7 @@ from scheduler.tools.policy_retriever import retrieve_policies
 from scheduler.tools.duration_model import get_duration
 from scheduler.tools.priority_model import compute_priority
 from scheduler.tools.constraint_solver import check_conflicts
+from scheduler.tools import response_cache
 
 class PlannerAgent:
     def __init__(self, target_day = None):
@@ -57,6 +58,7 @@ class PlannerAgent:
             print("Not saving due to found conflicts.")
             return
         Schedule.objects.all().delete()
+        response_cache.bump("schedules")  # the bulk delete sends no signals
         for a in self.draft:
             case = Case.objects.get(case_number=a["case"])
             judge = Judge.objects.get(name=a["judge"])
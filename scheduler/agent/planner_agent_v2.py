@@ -1,22 +1,221 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.fields.json import KT
+from django.utils import timezone
 from scheduler.models import Case, Judge, Schedule, Lawyer
-from scheduler.tools.priority_model import compute_priority
-from scheduler.tools.duration_model import get_duration
+from scheduler.tools.priority_model import compute_priorities
+from scheduler.tools.duration_model import get_durations
 from scheduler.tools.policy_retriever import retrieve_policies
-import json, os
+from scheduler.tools.query_counter import QueryCounter, chunked
+from scheduler.tools.notifier import enqueue
+from scheduler.tools import response_cache
+from scheduler.tools.calendar_utils import get_working_windows, get_busy_slots, day_range
+from scheduler.tools.candidate_generator import (
+    candidate_scores, top_k_candidates,
+    SPEC_MATCH, SPEC_GENERAL, JUDGE_MISMATCH, LAWYER_MISMATCH,
+)
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, defaultdict
+import hashlib, json, os
+
+MAX_JUDGE_LOAD = 8  # default when a judge has no max_daily_cases
+MAX_LAWYER_LOAD = 5
+LOAD_PENALTY = 10
+# With top-K pruning on, instances up to this many (case, resource) pairs are
+# also solved unpruned so the run reports the objective gap.
+GAP_CHECK_MAX_PAIRS = 2000
+# Reward for seating a case at all (Stage 1 judge, Stage 2 lawyer). It
+# dominates any score/penalty trade-off so that every case is placed while
+# capacity remains, without making an overloaded day infeasible.
+PLACEMENT_BONUS = 1000
+# Stage 3 reward for keeping a hearing on the docket; larger than the
+# minutes in a day so it always outweighs packing the day tighter
+TIMELINE_BONUS = 2000
+TIMELINE_TIME_LIMIT = 30  # seconds
+# Upper bound on Stage 1-3 repair rounds per day (see _plan_day)
+MAX_REPAIR_ROUNDS = 5
+WRITE_BATCH_SIZE = 500
+# Case columns the solver reads; description and ai_analysis stay in the
+# database (see observe and _load_descriptions). Anything read per case
+# must be listed here, or each access costs a deferred-field query.
+PLANNER_CASE_FIELDS = ("id", "case_number", "case_type", "filed_in", "urgency",
+                       "estimated_duration", "priority", "is_resolved", "assigned_judge")
+
+def case_fingerprint(case):
+    """
+    Hash of the case inputs a plan was built from (see incremental mode).
+    The estimated duration is included because a kept row keeps its old
+    end time. Priority is left out: it is derived from these inputs and
+    the planning date, so it drifts every day without the case changing.
+    """
+    raw = f"{case.case_type}|{case.urgency}|{case.filed_in}|{case.estimated_duration}|{case.description}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
 
 class HybridPlannerAgent:
-    def __init__(self, target_day=None):
+    def __init__(self, target_day=None, decompose=False, workers=None, top_k_judges=None, top_k_lawyers=None,
+                 incremental=False, progress=None, horizon_days=1, freeze_days=0, time_budget=None):
         self.target_day = target_day or datetime.now().date() + timedelta(days=1)
         self.llm_plan = {"priorities": [], "policy_summary": ""}
         self.full_plan = [] 
+        # decompose=True solves Stage 1 per specialization in parallel
+        # instead of one cases x judges model (see optimize_judges)
+        self.decompose = decompose
+        self.workers = workers or os.cpu_count() or 1
+        self.unassigned = []
+        # Only the K best-scoring judges/lawyers per case become solver
+        # variables (None = full cartesian product)
+        self.top_k_judges = top_k_judges
+        self.top_k_lawyers = top_k_lawyers
+        # incremental=True keeps the target day's unchanged Schedule rows and
+        # only re-plans new, changed or resolved cases (see _load_previous_plan)
+        self.incremental = incremental
+        self.kept_plan = []
+        self.stale_schedule_ids = []
+        self.hints = {}
+        # progress(stage, objective) is called as the run advances; used by
+        # background planner jobs to expose their state
+        self.progress = progress
+        self.objective = None
+        self._windows = {}
+        # horizon_days > 1 plans that many court days in one run, carrying
+        # each day's leftovers into the next; the first freeze_days days that
+        # already have a schedule are left untouched (see _run_horizon).
+        # Days can overflow, so Stage 1 always uses the decomposed model there.
+        self.horizon_days = horizon_days or 1
+        self.freeze_days = freeze_days or 0
+        self.decompose = self.decompose or self.horizon_days > 1
+        if self.horizon_days > 1 and self.incremental:
+            print("Incremental mode does not apply to horizon runs; use freeze_days instead.")
+            self.incremental = False
+        # Horizon runs replace every schedule from replan_from on, except on frozen_days
+        self.replan_from = None
+        self.frozen_days = []
+        # time_budget (seconds) caps all solver time in run(); the best
+        # partial plan found so far is kept when it runs out
+        self.time_budget = time_budget
+        self.deadline = None
+        # (case id, judge id) and (case id, lawyer id) pairs that failed a
+        # later stage; Stages 1 and 2 avoid them
+        self.tabu = set()
+        self.lawyer_tabu = set()
+        # [(case, reason)] left off the schedule by the last run
+        self.unscheduled = []
+
+    def _report(self, stage):
+        if self.progress:
+            self.progress(stage, self.objective)
+
+    def _time_limit(self, default=None):
+        """Solver time limit: `default` seconds, cut to what is left of the budget."""
+        if self.deadline is None:
+            return default
+        remaining = max(self.deadline - datetime.now().timestamp(), 0.1)
+        return remaining if default is None else min(default, remaining)
+
+    def _apply_time_limit(self, solver, default=None):
+        limit = self._time_limit(default)
+        if limit is not None:
+            solver.parameters.max_time_in_seconds = limit
     
     def observe(self):
-        self.cases = list(Case.objects.all())
+        # Open cases only, with just the solver's columns; the complexity the
+        # duration model needs is read out of the ai_analysis JSON in SQL.
+        # The solver needs every open case at once, so they are all held in
+        # memory; the saving is in the columns left out, not in streaming
+        open_cases = (Case.objects.filter(is_resolved=False).only(*PLANNER_CASE_FIELDS)
+                      .annotate(complexity=KT("ai_analysis__complexity")).order_by("id"))
+        self.cases = list(open_cases)
         self.judges = list(Judge.objects.all())
         self.lawyers = list(Lawyer.objects.all())
         self.policies = retrieve_policies("court scheduling and fairness policies")
         print(f"Observed {len(self.cases)} cases, {len(self.judges)} judges, {len(self.lawyers)} lawyers.")
+        if self.horizon_days == 1:
+            self._skip_cases_scheduled_elsewhere()
+        if self.incremental:
+            self._load_previous_plan()
+
+    def _skip_cases_scheduled_elsewhere(self):
+        """
+        A single-day run only replaces the target day's schedule, so cases
+        with an upcoming hearing on another day keep that hearing instead
+        of being booked twice.
+        """
+        start, end = day_range(self.target_day)
+        elsewhere = set(Schedule.objects.filter(start_time__gte=day_range(timezone.localdate())[0])
+                        .exclude(start_time__gte=start, start_time__lt=end).values_list("case_id", flat=True))
+        cases = [c for c in self.cases if c.id not in elsewhere]
+        if len(cases) < len(self.cases):
+            print(f"Skipping {len(self.cases) - len(cases)} cases already scheduled on other days.")
+        self.cases = cases
+
+    def _load_descriptions(self, cases):
+        """Fetches description (deferred by observe) for `cases`, for fingerprinting."""
+        cases = [c for c in cases if "description" not in c.__dict__]
+        for batch in chunked(cases, WRITE_BATCH_SIZE):
+            texts = dict(Case.objects.filter(id__in=[c.id for c in batch]).values_list("id", "description"))
+            for c in batch:
+                c.description = texts[c.id]
+
+    def _load_previous_plan(self):
+        """
+        Splits the target day's existing schedule into rows we keep as-is
+        (case unchanged, judge and lawyer still present) and stale rows to
+        replace. Cases behind stale rows are re-planned, with their previous
+        judge/lawyer passed to CP-SAT as solution hints.
+        """
+        judges = {j.id: j for j in self.judges}
+        lawyers = {l.id: l for l in self.lawyers}
+        open_cases = {c.id: c for c in self.cases if not c.is_resolved}
+        case_lawyer = dict(Case.lawyers.through.objects.values_list("case_id", "lawyer_id"))
+        start, end = day_range(self.target_day)
+        rows = list(Schedule.objects.filter(start_time__gte=start, start_time__lt=end))
+        self._load_descriptions([open_cases[r.case_id] for r in rows if r.case_id in open_cases])
+
+        self.kept_plan, self.stale_schedule_ids, self.hints = [], [], {}
+        kept_ids = set()
+        for row in rows:
+            c = open_cases.get(row.case_id)
+            judge = judges.get(row.judge_id)
+            lawyer = lawyers.get(case_lawyer.get(row.case_id))
+            if c and judge and lawyer and c.id not in kept_ids and row.fingerprint == case_fingerprint(c):
+                self.kept_plan.append({"case": c, "judge": judge, "lawyer": lawyer, "schedule": row,
+                                       "start": row.start_time, "end": row.end_time})
+                kept_ids.add(c.id)
+            else:
+                self.stale_schedule_ids.append(row.id)
+                if c and judge:
+                    self.hints[c.id] = (judge.id, lawyer.id if lawyer else None)
+
+        self.cases = [c for c in self.cases if c.id in open_cases and c.id not in kept_ids]
+        print(f"Incremental: keeping {len(self.kept_plan)} schedules, replacing {len(self.stale_schedule_ids)}, "
+              f"re-planning {len(self.cases)} cases.")
+
+    def _kept_judge_loads(self):
+        return Counter(item["judge"].id for item in self.kept_plan)
+
+    def _judge_cap(self, judge):
+        return judge.max_daily_cases or MAX_JUDGE_LOAD
+
+    def _minute(self, moment):
+        """Minutes since midnight of the target day."""
+        if timezone.is_aware(moment):
+            moment = timezone.make_naive(moment)
+        return int((moment - datetime.combine(self.target_day, time.min)).total_seconds() // 60)
+
+    def _judge_windows(self, judge):
+        """Sitting windows on the target day as (start, end) minutes."""
+        if judge.id not in self._windows:
+            self._windows[judge.id] = [(self._minute(s), self._minute(e))
+                                       for s, e in get_working_windows(judge, self.target_day)]
+        return self._windows[judge.id]
+
+    def _free_judge_minutes(self):
+        """Sitting minutes per judge left after kept hearings."""
+        free = {j.id: sum(e - s for s, e in self._judge_windows(j)) for j in self.judges}
+        for item in self.kept_plan:
+            free[item["judge"].id] -= self._minute(item["end"]) - self._minute(item["start"])
+        return free
 
     # ... [JSON normalization and LLM logic remains the same] ...
     def _normalize_json(self, text: str):
@@ -35,12 +234,16 @@ class HybridPlannerAgent:
         return {"priorities": [], "policy_summary": ""}
 
     def compute_case_scores(self):
-        for c in self.cases:
-            c.estimated_duration = get_duration(c)
-            c.priority = compute_priority(c)
-            if c.case_number in self.llm_plan.get("priorities", []):
-                c.priority *= 1.2
-            c.save()
+        # Scores are persisted together with the schedule in act()
+        case_types = [c.case_type for c in self.cases]
+        urgency = [c.urgency for c in self.cases]
+        durations = get_durations(case_types, urgency, [c.case_number for c in self.cases],
+                                  [c.complexity for c in self.cases])
+        priorities = compute_priorities(case_types, urgency, [c.filed_in for c in self.cases])
+        boosted = set(self.llm_plan.get("priorities", []))
+        for c, duration, priority in zip(self.cases, durations.tolist(), priorities.tolist()):
+            c.estimated_duration = duration
+            c.priority = priority * 1.2 if c.case_number in boosted else priority
 
     def _get_urgency_multiplier(self, case):
         """
@@ -59,218 +262,913 @@ class HybridPlannerAgent:
         # Assuming raw urgency is 1 to 5:
         return max(1, float(u_val or 1))
 
-    def optimize_judges(self):
-        """Stage 1: Assign Judges (Urgency-Weighted Specialization)"""
+    def _judge_score(self, case, judge):
+        """Objective coefficient for assigning `case` to `judge` in Stage 1."""
+        # 1. Base Score (Priority)
+        base_score = int(case.priority * 100)
+
+        # 2. Specialization Score
+        if judge.specialization == case.case_type:
+            spec_score = SPEC_MATCH
+        elif judge.specialization == "general":
+            spec_score = SPEC_GENERAL
+        else:
+            spec_score = JUDGE_MISMATCH
+
+        # 3. APPLY MULTIPLIER
+        # If Urgent (mult=3): Match becomes +150, Mismatch becomes -90
+        # If Low (mult=1): Match stays +50, Mismatch stays -30
+        weighted_spec_score = int(spec_score * self._get_urgency_multiplier(case))
+
+        return base_score + weighted_spec_score
+
+    def _build_judge_plan(self, assignments):
+        """
+        Turns (case, judge) pairs into plan items after the kept ones
+        (incremental mode); Stage 3 gives them their times.
+        """
+        self.full_plan = list(self.kept_plan)
+        for c, judge in assignments:
+            self.full_plan.append({
+                "case": c,
+                "judge": judge,
+                "lawyer": None
+            })
+
+    def _judge_candidates(self, cases, judges, loads=None):
+        """
+        Top-K judge indices per case, or None when pruning is disabled.
+        `loads` overrides the current caseload used to spread candidates.
+        """
+        if not self.top_k_judges or self.top_k_judges >= len(judges):
+            return None
+        if loads is None:
+            current = Counter(c.assigned_judge_id for c in cases)
+            loads = [current.get(j.id, 0) for j in judges]
+        scores = candidate_scores(
+            [c.case_type for c in cases],
+            [j.specialization for j in judges],
+            [self._get_urgency_multiplier(c) for c in cases],
+            JUDGE_MISMATCH,
+            base=[int(c.priority * 100) for c in cases],
+            loads=loads,
+            load_weight=LOAD_PENALTY,
+        )
+        return top_k_candidates(scores, self.top_k_judges)
+
+    def _solve_judges_model(self, cases, judges, candidates=None):
+        """
+        Builds and solves the Stage 1 CP-SAT model. `candidates[i]` restricts
+        case i to a subset of judge indices; None means every judge.
+        Seats held by kept schedules count towards each judge's load.
+        Returns (assignments, objective) or (None, None) if infeasible; the
+        objective is the solver's, PLACEMENT_BONUS included.
+        """
         from ortools.sat.python import cp_model
         model = cp_model.CpModel()
-        judges, cases = self.judges, self.cases
-        
-        if not cases or not judges: return
-        print(f"--- Stage 1: Optimizing Judges ({len(cases)} cases) ---")
 
         x = {} 
         for i, c in enumerate(cases):
-            for j, judge in enumerate(judges):
+            js = range(len(judges)) if candidates is None else candidates[i]
+            for j in js:
+                if (c.id, judges[j].id) in self.tabu:
+                    continue
                 x[(i,j)] = model.NewBoolVar(f"x_judge_{i}_{j}")
 
-        # Constraints
+        by_case, by_judge, judge_minutes = defaultdict(list), defaultdict(list), defaultdict(list)
+        for (i,j), var in x.items():
+            by_case[i].append(var)
+            by_judge[j].append(var)
+            judge_minutes[j].append((cases[i].estimated_duration or 60) * var)
+
+        # Constraints: at most one judge per case, so an overloaded day still
+        # yields a partial plan; PLACEMENT_BONUS makes seating a case always pay
         for i in range(len(cases)):
-            model.Add(sum(x[(i,j)] for j in range(len(judges))) == 1)
+            model.Add(sum(by_case[i]) <= 1)
         
-        judge_load = [model.NewIntVar(0, 8, f'j_load_{j}') for j in range(len(judges))]
-        for j in range(len(judges)):
-            model.Add(judge_load[j] == sum(x[(i,j)] for i in range(len(cases))))
+        kept = self._kept_judge_loads()
+        free_minutes = self._free_judge_minutes()
+        judge_load = [model.NewIntVar(0, self._judge_cap(judge), f'j_load_{j}') for j, judge in enumerate(judges)]
+        for j, judge in enumerate(judges):
+            model.Add(judge_load[j] == kept.get(judge.id, 0) + sum(by_judge[j]))
+            # Hearings must fit in the judge's sitting hours
+            model.Add(sum(judge_minutes[j]) <= max(free_minutes[judge.id], 0))
 
-        # --- Objective with URGENCY SCALING ---
-        obj_terms = []
+        # Warm start from the previous plan for cases being re-planned
+        judge_index = {judge.id: j for j, judge in enumerate(judges)}
         for i, c in enumerate(cases):
-            urgency_mult = self._get_urgency_multiplier(c)
-            
-            for j, judge in enumerate(judges):
-                # 1. Base Score (Priority)
-                base_score = int(c.priority * 100)
-                
-                # 2. Specialization Score
-                spec_score = 0
-                if judge.specialization == c.case_type:
-                    spec_score = 50
-                elif judge.specialization == "general":
-                    spec_score = 10
-                else:
-                    spec_score = -30
-                
-                # 3. APPLY MULTIPLIER
-                # If Urgent (mult=3): Match becomes +150, Mismatch becomes -90
-                # If Low (mult=1): Match stays +50, Mismatch stays -30
-                weighted_spec_score = int(spec_score * urgency_mult)
-                
-                total_score = base_score + weighted_spec_score
-                obj_terms.append(total_score * x[(i,j)])
+            hint = self.hints.get(c.id)
+            if hint and (i, judge_index.get(hint[0])) in x:
+                model.AddHint(x[(i, judge_index[hint[0]])], 1)
+
+        # --- Objective with URGENCY SCALING ---
+        obj_terms = [(PLACEMENT_BONUS + self._judge_score(cases[i], judges[j])) * var for (i,j), var in x.items()]
 
         # Quadratic Load Penalty
         sq_loads = []
         for j, load in enumerate(judge_load):
-            sq = model.NewIntVar(0, 64, f"sq_load_{j}")
+            sq = model.NewIntVar(0, self._judge_cap(judges[j]) ** 2, f"sq_load_{j}")
             model.AddMultiplicationEquality(sq, [load, load])
             sq_loads.append(sq)
         
-        model.Maximize(sum(obj_terms) - sum(sq_loads) * 10)
+        model.Maximize(sum(obj_terms) - sum(sq_loads) * LOAD_PENALTY)
 
         solver = cp_model.CpSolver()
+        self._apply_time_limit(solver, 30)
         status = solver.Solve(model)
+        if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            return None, None
 
-        self.full_plan = []
-        if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-            judge_counters = {j.id: 0 for j in judges}
-            for i, c in enumerate(cases):
-                for j, judge in enumerate(judges):
-                    if solver.BooleanValue(x[(i,j)]):
-                        slot = judge_counters[judge.id]
-                        judge_counters[judge.id] += 1
-                        self.full_plan.append({
-                            "case": c,
-                            "judge": judge,
-                            "slot": slot,
-                            "lawyer": None
-                        })
-            print(f"Judge assignment complete. Assigned {len(self.full_plan)} cases.")
+        assignments = [(cases[i], judges[j]) for (i,j), var in x.items() if solver.BooleanValue(var)]
+        return assignments, solver.ObjectiveValue()
 
-    def optimize_lawyers(self):
-        """Stage 2: Assign Lawyers (Urgency-Weighted Specialization)"""
+    def _report_gap(self, stage, pruned, full):
+        """
+        `pruned` and `full` are (objective, placed) or None when infeasible.
+        The objectives are compared as the solver saw them, bonus included,
+        since two plans that seat different numbers of cases are not
+        comparable once it is taken out.
+        """
+        if full is None:
+            print(f"{stage}: full model infeasible, no gap to report.")
+        elif pruned is None:
+            print(f"{stage}: pruned model infeasible, full model objective {full[0]:.0f} ({full[1]} placed).")
+        else:
+            gap = (full[0] - pruned[0]) / max(abs(full[0]), 1e-9)
+            print(f"{stage}: pruned objective {pruned[0]:.0f} vs full {full[0]:.0f} (gap {gap:.2%}), "
+                  f"placed {pruned[1]} vs {full[1]}.")
+
+    def optimize_judges(self):
+        """Stage 1: Assign Judges (Urgency-Weighted Specialization)"""
+        if self.decompose:
+            return self._optimize_judges_decomposed()
+
+        judges, cases = self.judges, self.cases
+        
+        if not cases or not judges: return
+        print(f"--- Stage 1: Optimizing Judges ({len(cases)} cases) ---")
+
+        candidates = self._judge_candidates(cases, judges)
+        assignments, objective = self._solve_judges_model(cases, judges, candidates)
+        if candidates is not None:
+            n_vars = sum(len(js) for js in candidates)
+            print(f"Top-{self.top_k_judges} pruning: {n_vars} of {len(cases) * len(judges)} judge variables.")
+            if len(cases) * len(judges) <= GAP_CHECK_MAX_PAIRS:
+                full_assignments, full_objective = self._solve_judges_model(cases, judges)
+                self._report_gap("Stage 1",
+                                 None if assignments is None else (objective, len(assignments)),
+                                 None if full_assignments is None else (full_objective, len(full_assignments)))
+            if assignments is None:
+                print("Pruned judge model infeasible, retrying with all judges.")
+                assignments, objective = self._solve_judges_model(cases, judges)
+
+        self.full_plan = list(self.kept_plan)
+        if assignments is not None:
+            # The plan's objective is reported without the placement bonus
+            self.objective = objective - PLACEMENT_BONUS * len(assignments)
+            self._build_judge_plan(assignments)
+            placed = {c.id for c, _ in assignments}
+            self.unassigned = [c for c in cases if c.id not in placed]
+            print(f"Judge assignment complete. Assigned {len(assignments)} cases, {len(self.unassigned)} left unassigned.")
+
+    # --- Decomposed Stage 1 ---
+    # The monolithic model above has one Boolean per (case, judge) pair,
+    # which stops scaling on large backlogs. For those we instead:
+    #   1. solve each specialization (case_type) against its own specialists,
+    #      in parallel, keeping only cases that can still win a seat;
+    #   2. place the overflow on general/leftover capacity, pruning mismatched
+    #      pairs whenever a matching judge still has room;
+    #   3. seat whatever is still left on any judge with room, since step 2
+    #      can leave a case out when the judges it was pruned to fill up;
+    #   4. run a local-search reconciliation that moves cases between judges
+    #      of different partitions while it improves the global objective.
+    # Cases that do not fit anywhere are left in self.unassigned.
+
+    def _solve_partition(self, cases, judges, capacity, minutes, label):
+        """
+        Assigns each case to at most one judge in `judges`, respecting
+        `capacity` (judge.id -> free seats) and `minutes` (judge.id -> free
+        sitting minutes). Returns a list of (case, judge).
+        """
         from ortools.sat.python import cp_model
+
+        judges = [j for j in judges if capacity.get(j.id, 0) > 0 and minutes.get(j.id, 0) > 0]
+        if not cases or not judges:
+            return []
+
+        # Prune cases that can never win a seat: a case only competes for
+        # judges of the same specialization, and a judge column ranks cases
+        # purely by score, so anything outside the top-N of every column
+        # (N = seats left in this partition) is dropped before modelling.
+        total_capacity = sum(capacity[j.id] for j in judges)
+        if len(cases) > total_capacity:
+            keep = set()
+            columns = {}
+            for judge in judges:
+                columns.setdefault(judge.specialization, judge)
+            for judge in columns.values():
+                ranked = sorted(range(len(cases)), key=lambda i: self._judge_score(cases[i], judge), reverse=True)
+                keep.update(ranked[:total_capacity])
+            cases = [cases[i] for i in sorted(keep)]
+
+        # Prune mismatched pairs when the case has a specialist or a general
+        # judge with room in this partition. Those judges may still fill up
+        # before every such case is seated; _place_leftovers catches those.
+        shortlist = self._judge_candidates(cases, judges, loads=[self._judge_cap(j) - capacity[j.id] for j in judges])
+        candidates = {}
+        for i, c in enumerate(cases):
+            js = [j for j in (range(len(judges)) if shortlist is None else shortlist[i])
+                  if (c.id, judges[j].id) not in self.tabu]
+            matched = [j for j in js if judges[j].specialization in (c.case_type, "general")]
+            candidates[i] = matched or js
+
         model = cp_model.CpModel()
-        lawyers = self.lawyers
-        plan = self.full_plan
-        
-        if not plan or not lawyers: return
-        print(f"--- Stage 2: Optimizing Lawyers ({len(lawyers)} available) ---")
+        x = {}
+        judge_index = {judge.id: j for j, judge in enumerate(judges)}
+        for i, js in candidates.items():
+            for j in js:
+                x[(i,j)] = model.NewBoolVar(f"x_{label}_{i}_{j}")
+            model.Add(sum(x[(i,j)] for j in js) <= 1)
+            hint = self.hints.get(cases[i].id)
+            if hint and (i, judge_index.get(hint[0])) in x:
+                model.AddHint(x[(i, judge_index[hint[0]])], 1)
+
+        sq_loads = []
+        for j, judge in enumerate(judges):
+            cap = capacity[judge.id]
+            col = [i for i in candidates if (i,j) in x]
+            load = model.NewIntVar(0, cap, f"load_{label}_{j}")
+            model.Add(load == sum(x[(i,j)] for i in col))
+            model.Add(sum((cases[i].estimated_duration or 60) * x[(i,j)] for i in col) <= minutes[judge.id])
+            sq = model.NewIntVar(0, cap * cap, f"sq_{label}_{j}")
+            model.AddMultiplicationEquality(sq, [load, load])
+            sq_loads.append(sq)
+
+        obj_terms = [(PLACEMENT_BONUS + self._judge_score(cases[i], judges[j])) * var for (i,j), var in x.items()]
+        model.Maximize(sum(obj_terms) - sum(sq_loads) * LOAD_PENALTY)
+
+        solver = cp_model.CpSolver()
+        solver.parameters.num_workers = max(1, (os.cpu_count() or 1) // self.workers)
+        self._apply_time_limit(solver, 30)
+        status = solver.Solve(model)
+        if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            print(f"Partition '{label}' found no feasible assignment.")
+            return []
+
+        return [(cases[i], judges[j]) for (i,j), var in x.items() if solver.BooleanValue(var)]
+
+    def _place_leftovers(self, assignments, leftovers):
+        """
+        Seats `leftovers` greedily, highest priority first, on the judge with
+        the best score net of the load penalty among those with a free seat
+        and enough sitting minutes. Appends to `assignments`; returns the
+        number placed.
+        """
+        load = defaultdict(int, self._kept_judge_loads())
+        free = self._free_judge_minutes()
+        for c, judge in assignments:
+            load[judge.id] += 1
+            free[judge.id] -= c.estimated_duration or 60
+
+        placed = 0
+        for c in sorted(leftovers, key=lambda c: -c.priority):
+            duration = c.estimated_duration or 60
+            options = [j for j in self.judges
+                       if load[j.id] < self._judge_cap(j) and free[j.id] >= duration and (c.id, j.id) not in self.tabu]
+            if not options:
+                continue
+            judge = max(options, key=lambda j: self._judge_score(c, j) - LOAD_PENALTY * (2 * load[j.id] + 1))
+            load[judge.id] += 1
+            free[judge.id] -= duration
+            assignments.append((c, judge))
+            placed += 1
+        return placed
+
+    def _reconcile_loads(self, assignments, max_passes=20):
+        """
+        Greedy cross-partition rebalancing. Moves a case to another judge
+        whenever that improves score minus the quadratic load penalty.
+        """
+        load = defaultdict(int, self._kept_judge_loads())
+        free = self._free_judge_minutes()
+        for c, judge in assignments:
+            load[judge.id] += 1
+            free[judge.id] -= c.estimated_duration or 60
+
+        def move_gain(c, src, dst):
+            ls, ld = load[src.id], load[dst.id]
+            score_delta = self._judge_score(c, dst) - self._judge_score(c, src)
+            penalty_delta = ((ld + 1) ** 2 - ld ** 2) - (ls ** 2 - (ls - 1) ** 2)
+            return score_delta - penalty_delta * LOAD_PENALTY
+
+        moves = 0
+        for _ in range(max_passes):
+            improved = False
+            for idx, (c, src) in enumerate(assignments):
+                for dst in self.judges:
+                    if dst.id == src.id or load[dst.id] >= self._judge_cap(dst) or (c.id, dst.id) in self.tabu:
+                        continue
+                    if free[dst.id] < (c.estimated_duration or 60):
+                        continue
+                    if move_gain(c, src, dst) > 0:
+                        load[src.id] -= 1
+                        load[dst.id] += 1
+                        free[src.id] += c.estimated_duration or 60
+                        free[dst.id] -= c.estimated_duration or 60
+                        assignments[idx] = (c, dst)
+                        moves += 1
+                        improved = True
+                        break
+            if not improved:
+                break
+        return moves
+
+    def _optimize_judges_decomposed(self):
+        judges, cases = self.judges, self.cases
+        if not cases or not judges: return
+        print(f"--- Stage 1 (decomposed): Optimizing Judges ({len(cases)} cases) ---")
+
+        kept = self._kept_judge_loads()
+        capacity = {j.id: self._judge_cap(j) - kept.get(j.id, 0) for j in judges}
+        minutes = self._free_judge_minutes()
+        specialists = defaultdict(list)
+        for judge in judges:
+            specialists[judge.specialization].append(judge)
+
+        partitions = defaultdict(list)
+        for c in cases:
+            partitions[c.case_type].append(c)
+
+        # 1. Per-specialization solves. Judge sets are disjoint, so the
+        #    partitions are independent and can run concurrently.
+        jobs = {t: cs for t, cs in partitions.items() if specialists.get(t)}
+        print(f"Solving {len(jobs)} partitions with {self.workers} workers...")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                t: pool.submit(self._solve_partition, cs, specialists[t], capacity, minutes, t)
+                for t, cs in jobs.items()
+            }
+            assignments = []
+            for t, fut in futures.items():
+                assignments.extend(fut.result())
+
+        # 2. Overflow onto general judges and any remaining capacity
+        for c, judge in assignments:
+            capacity[judge.id] -= 1
+            minutes[judge.id] -= c.estimated_duration or 60
+        placed = {c.id for c, _ in assignments}
+        overflow = [c for c in cases if c.id not in placed]
+        if overflow:
+            print(f"Placing {len(overflow)} overflow cases on remaining capacity...")
+            assignments.extend(self._solve_partition(overflow, judges, capacity, minutes, "overflow"))
+
+        # 3. Anything the pruned solves could not seat
+        placed = {c.id for c, _ in assignments}
+        leftovers = [c for c in cases if c.id not in placed]
+        if leftovers:
+            print(f"Seated {self._place_leftovers(assignments, leftovers)} of {len(leftovers)} leftover cases.")
+
+        # 4. Cross-partition load balance
+        moves = self._reconcile_loads(assignments)
+        print(f"Reconciliation moved {moves} cases.")
+
+        placed = {c.id for c, _ in assignments}
+        self.unassigned = [c for c in cases if c.id not in placed]
+        loads = Counter(judge.id for _, judge in assignments) + self._kept_judge_loads()
+        self.objective = (sum(self._judge_score(c, judge) for c, judge in assignments)
+                          - LOAD_PENALTY * sum(n * n for n in loads.values()))
+        self._build_judge_plan(assignments)
+        print(f"Judge assignment complete. Assigned {len(assignments)} cases, {len(self.unassigned)} left unassigned.")
+
+    def _lawyer_score(self, case, lawyer):
+        """Objective coefficient for assigning `lawyer` to `case` in Stage 2."""
+        # Calculate Base Spec Score
+        if lawyer.specialization == case.case_type:
+            spec_score = SPEC_MATCH
+        elif lawyer.specialization == "general":
+            spec_score = SPEC_GENERAL
+        else:
+            spec_score = LAWYER_MISMATCH
+
+        # Apply Multiplier
+        # High urgency forces the solver to pick the specialist
+        return int(spec_score * self._get_urgency_multiplier(case))
+
+    def _lawyer_candidates(self, plan, lawyers):
+        """Top-K lawyer indices per plan item, or None when pruning is disabled."""
+        if not self.top_k_lawyers or self.top_k_lawyers >= len(lawyers):
+            return None
+        through = Case.lawyers.through
+        current = dict(through.objects.values_list("lawyer_id").annotate(n=Count("id")))
+        scores = candidate_scores(
+            [item['case'].case_type for item in plan],
+            [l.specialization for l in lawyers],
+            [self._get_urgency_multiplier(item['case']) for item in plan],
+            LAWYER_MISMATCH,
+            loads=[current.get(l.id, 0) for l in lawyers],
+            load_weight=LOAD_PENALTY,
+        )
+        return top_k_candidates(scores, self.top_k_lawyers)
+
+    def _solve_lawyers_model(self, plan, lawyers, candidates=None):
+        """
+        Builds and solves the Stage 2 CP-SAT model. `candidates[p]` restricts
+        plan item p to a subset of lawyer indices; None means every lawyer.
+        Kept schedules (incremental mode) count towards the lawyer's load.
+        Hearing times are left to Stage 3, whose per-lawyer NoOverlap keeps
+        a lawyer out of two courtrooms at once.
+        Returns ({p_idx: lawyer}, objective) or (None, None) if infeasible; the
+        objective is the solver's, PLACEMENT_BONUS included.
+        """
+        from ortools.sat.python import cp_model
+        model = cp_model.CpModel()
+
+        kept = Counter(item['lawyer'].id for item in self.kept_plan)
+        lawyer_index = {l.id: l_idx for l_idx, l in enumerate(lawyers)}
 
         y = {}
         for p_idx, item in enumerate(plan):
-            for l_idx, lawyer in enumerate(lawyers):
+            ls = range(len(lawyers)) if candidates is None else candidates[p_idx]
+            for l_idx in ls:
+                if (item['case'].id, lawyers[l_idx].id) in self.lawyer_tabu:
+                    continue
                 y[(p_idx, l_idx)] = model.NewBoolVar(f"y_lawyer_{p_idx}_{l_idx}")
+            hint = self.hints.get(item['case'].id)
+            if hint and (p_idx, lawyer_index.get(hint[1])) in y:
+                model.AddHint(y[(p_idx, lawyer_index[hint[1]])], 1)
 
-        # Constraints (Coverage, Conflict, Capacity)
-        for p_idx in range(len(plan)):
-            model.Add(sum(y[(p_idx, l_idx)] for l_idx in range(len(lawyers))) == 1)
+        by_item, by_lawyer = defaultdict(list), defaultdict(list)
+        for (p_idx, l_idx), var in y.items():
+            by_item[p_idx].append(var)
+            by_lawyer[l_idx].append(var)
 
-        cases_by_slot = {}
-        for p_idx, item in enumerate(plan):
-            slot = item['slot']
-            if slot not in cases_by_slot: cases_by_slot[slot] = []
-            cases_by_slot[slot].append(p_idx)
-        
-        for slot, p_indices in cases_by_slot.items():
-            if len(p_indices) > 1:
-                for l_idx in range(len(lawyers)):
-                    model.Add(sum(y[(p, l_idx)] for p in p_indices) <= 1)
+        # Constraints (Coverage, Capacity). At most one lawyer per
+        # item: when lawyers run out the rest stay unstaffed instead of
+        # making the whole model infeasible
+        for p_idx in range(len(plan)):
+            model.Add(sum(by_item[p_idx]) <= 1)
 
-        lawyer_load = [model.NewIntVar(0, 5, f'l_load_{l}') for l in range(len(lawyers))]
-        for l_idx in range(len(lawyers)):
-            model.Add(lawyer_load[l_idx] == sum(y[(p, l_idx)] for p in range(len(plan))))
+        lawyer_load = [model.NewIntVar(0, MAX_LAWYER_LOAD, f'l_load_{l}') for l in range(len(lawyers))]
+        for l_idx, lawyer in enumerate(lawyers):
+            model.Add(lawyer_load[l_idx] == kept.get(lawyer.id, 0) + sum(by_lawyer[l_idx]))
 
         # --- Objective with URGENCY SCALING ---
-        obj_terms = []
-        for p_idx, item in enumerate(plan):
-            case = item['case']
-            urgency_mult = self._get_urgency_multiplier(case)
-            
-            for l_idx, lawyer in enumerate(lawyers):
-                # Calculate Base Spec Score
-                spec_score = 0
-                if lawyer.specialization == case.case_type:
-                    spec_score = 50
-                elif lawyer.specialization == "general":
-                    spec_score = 10
-                else:
-                    spec_score = -20 
-                
-                # Apply Multiplier
-                # High urgency forces the solver to pick the specialist
-                weighted_score = int(spec_score * urgency_mult)
-                
-                obj_terms.append(weighted_score * y[(p_idx, l_idx)])
+        obj_terms = [(PLACEMENT_BONUS + self._lawyer_score(plan[p_idx]['case'], lawyers[l_idx])) * var
+                     for (p_idx, l_idx), var in y.items()]
 
         # Quadratic Load Penalty
         sq_loads = []
         for l_idx, load in enumerate(lawyer_load):
-            sq = model.NewIntVar(0, 25, f"sq_l_load_{l_idx}")
+            sq = model.NewIntVar(0, MAX_LAWYER_LOAD ** 2, f"sq_l_load_{l_idx}")
             model.AddMultiplicationEquality(sq, [load, load])
             sq_loads.append(sq)
 
-        model.Maximize(sum(obj_terms) - sum(sq_loads) * 10)
+        model.Maximize(sum(obj_terms) - sum(sq_loads) * LOAD_PENALTY)
 
         solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 5
+        self._apply_time_limit(solver, 5)
         status = solver.Solve(model)
+        if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            return None, None
 
-        if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-            print(f"Lawyer assignment success! Status: {status}")
-            for p_idx, item in enumerate(plan):
-                for l_idx, lawyer in enumerate(lawyers):
-                    if solver.BooleanValue(y[(p_idx, l_idx)]):
-                        item['lawyer'] = lawyer
+        chosen = {p_idx: lawyers[l_idx] for (p_idx, l_idx), var in y.items() if solver.BooleanValue(var)}
+        return chosen, solver.ObjectiveValue()
+
+    def optimize_lawyers(self):
+        """Stage 2: Assign Lawyers (Urgency-Weighted Specialization)"""
+        lawyers = self.lawyers
+        # Kept schedules and earlier repair rounds already have their lawyer
+        plan = [item for item in self.full_plan if not item['lawyer']]
+        
+        if not plan or not lawyers: return
+        print(f"--- Stage 2: Optimizing Lawyers ({len(lawyers)} available) ---")
+
+        candidates = self._lawyer_candidates(plan, lawyers)
+        chosen, objective = self._solve_lawyers_model(plan, lawyers, candidates)
+        if candidates is not None:
+            n_vars = sum(len(ls) for ls in candidates)
+            print(f"Top-{self.top_k_lawyers} pruning: {n_vars} of {len(plan) * len(lawyers)} lawyer variables.")
+            if len(plan) * len(lawyers) <= GAP_CHECK_MAX_PAIRS:
+                full_chosen, full_objective = self._solve_lawyers_model(plan, lawyers)
+                self._report_gap("Stage 2",
+                                 None if chosen is None else (objective, len(chosen)),
+                                 None if full_chosen is None else (full_objective, len(full_chosen)))
+            if chosen is None:
+                print("Pruned lawyer model infeasible, retrying with all lawyers.")
+                chosen, objective = self._solve_lawyers_model(plan, lawyers)
+
+        if chosen is not None:
+            objective -= PLACEMENT_BONUS * len(chosen)
+            self.objective = (self.objective or 0) + objective
+            print(f"Lawyer assignment success! Objective: {objective:.0f}, "
+                  f"{len(plan) - len(chosen)} of {len(plan)} cases without a lawyer.")
+            for p_idx, lawyer in chosen.items():
+                plan[p_idx]['lawyer'] = lawyer
         else:
             print("CRITICAL: Could not find valid lawyer schedule.")
+        for item in plan:
+            if not item['lawyer']:
+                item['reason'] = "no lawyer available"
+
+    # --- Stage 3: timeline ---
+    # Stages 1-2 decide who hears a case; this stage decides when. Each
+    # hearing is an interval of its estimated duration that must lie inside
+    # one of its judge's sitting windows, with no overlap per judge and per
+    # lawyer (including kept hearings and lawyers' busy_slots).
+
+    def _busy_intervals(self):
+        """Fixed (start, end) minutes per judge id and per lawyer id."""
+        judge_busy, lawyer_busy = defaultdict(list), defaultdict(list)
+        for item in self.kept_plan:
+            span = (self._minute(item["start"]), self._minute(item["end"]))
+            judge_busy[item["judge"].id].append(span)
+            lawyer_busy[item["lawyer"].id].append(span)
+        for lawyer in self.lawyers:
+            for start, end in get_busy_slots(lawyer, self.target_day):
+                lawyer_busy[lawyer.id].append((self._minute(start), self._minute(end)))
+        return judge_busy, lawyer_busy
+
+    @staticmethod
+    def _earliest_fit(windows, busy, duration):
+        for window_start, window_end in windows:
+            t = window_start
+            while t + duration <= window_end:
+                clash = max((e for s, e in busy if s < t + duration and t < e), default=None)
+                if clash is None:
+                    return t
+                t = clash
+        return None
+
+    def _greedy_timeline(self, items, judge_busy, lawyer_busy):
+        """
+        Earliest-fit list scheduling in priority order. Used as the CP-SAT
+        hint and as the fallback. Returns {item index: start minute}.
+        """
+        judge_busy = defaultdict(list, {k: list(v) for k, v in judge_busy.items()})
+        lawyer_busy = defaultdict(list, {k: list(v) for k, v in lawyer_busy.items()})
+        kept = self._kept_judge_loads()
+        seats = {j.id: self._judge_cap(j) - kept.get(j.id, 0) for j in self.judges}
+        starts = {}
+        for p in sorted(range(len(items)), key=lambda p: -items[p]["case"].priority):
+            judge, lawyer = items[p]["judge"], items[p]["lawyer"]
+            duration = items[p]["case"].estimated_duration or 60
+            if seats.get(judge.id, 0) <= 0:
+                continue
+            t = self._earliest_fit(self._judge_windows(judge), judge_busy[judge.id] + lawyer_busy[lawyer.id], duration)
+            if t is None:
+                continue
+            starts[p] = t
+            seats[judge.id] -= 1
+            judge_busy[judge.id].append((t, t + duration))
+            lawyer_busy[lawyer.id].append((t, t + duration))
+        return starts
+
+    def _solve_timeline_model(self, items, judge_busy, lawyer_busy, hint):
+        """
+        CP-SAT interval model: keep as many (and as high-priority) hearings
+        as possible, then finish each judge's day as early as possible,
+        which closes idle gaps. Returns {item index: start minute} or None.
+        """
+        from ortools.sat.python import cp_model
+        model = cp_model.CpModel()
+        kept = self._kept_judge_loads()
+
+        starts, present = {}, {}
+        by_judge, by_lawyer = defaultdict(list), defaultdict(list)
+        day_end = {j.id: model.NewIntVar(0, 24 * 60, f"day_end_{j.id}") for j in self.judges}
+        for p, item in enumerate(items):
+            judge, lawyer = item["judge"], item["lawyer"]
+            duration = item["case"].estimated_duration or 60
+            ranges = [[ws, we - duration] for ws, we in self._judge_windows(judge) if we - duration >= ws]
+            if not ranges:
+                continue
+            starts[p] = model.NewIntVarFromDomain(cp_model.Domain.FromIntervals(ranges), f"start_{p}")
+            present[p] = model.NewBoolVar(f"placed_{p}")
+            interval = model.NewOptionalFixedSizeIntervalVar(starts[p], duration, present[p], f"hearing_{p}")
+            by_judge[judge.id].append((interval, present[p]))
+            by_lawyer[lawyer.id].append(interval)
+            model.Add(day_end[judge.id] >= starts[p] + duration).OnlyEnforceIf(present[p])
+            if p in hint:
+                model.AddHint(present[p], 1)
+                model.AddHint(starts[p], hint[p])
+            else:
+                model.AddHint(present[p], 0)
+
+        def fixed(spans, name):
+            return [model.NewFixedSizeIntervalVar(s, e - s, f"{name}_{k}") for k, (s, e) in enumerate(spans) if e > s]
+
+        for judge in self.judges:
+            hearings = by_judge.get(judge.id, [])
+            if not hearings:
+                continue
+            model.AddNoOverlap([iv for iv, _ in hearings] + fixed(judge_busy.get(judge.id, []), f"jb_{judge.id}"))
+            model.Add(sum(pr for _, pr in hearings) <= self._judge_cap(judge) - kept.get(judge.id, 0))
+        for lawyer_id, hearings in by_lawyer.items():
+            blocked = fixed(lawyer_busy.get(lawyer_id, []), f"lb_{lawyer_id}")
+            if len(hearings) + len(blocked) > 1:
+                model.AddNoOverlap(hearings + blocked)
+
+        model.Maximize(sum((TIMELINE_BONUS + int(items[p]["case"].priority * 100)) * present[p] for p in present)
+                       - sum(day_end.values()))
+
+        solver = cp_model.CpSolver()
+        self._apply_time_limit(solver, TIMELINE_TIME_LIMIT)
+        solver.parameters.num_workers = self.workers
+        status = solver.Solve(model)
+        if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            return None
+        return {p: solver.Value(starts[p]) for p in present if solver.BooleanValue(present[p])}
+
+    def optimize_timeline(self):
+        """Stage 3: Place hearings on each judge's sitting hours"""
+        items = [item for item in self.full_plan if 'start' not in item and item['lawyer']]
+        if not items: return
+        print(f"--- Stage 3: Packing {len(items)} hearings into sitting hours ---")
+
+        judge_busy, lawyer_busy = self._busy_intervals()
+        greedy = self._greedy_timeline(items, judge_busy, lawyer_busy)
+        starts = self._solve_timeline_model(items, judge_busy, lawyer_busy, greedy)
+        if starts is None or len(starts) < len(greedy):
+            print("Timeline model found nothing better; using earliest-fit placement.")
+            starts = greedy
+
+        midnight = datetime.combine(self.target_day, time.min)
+        dropped = []
+        for p, item in enumerate(items):
+            if p in starts:
+                item['start'] = midnight + timedelta(minutes=starts[p])
+                item['end'] = item['start'] + timedelta(minutes=item['case'].estimated_duration or 60)
+                judge_busy[item['judge'].id].append((starts[p], starts[p] + (item['case'].estimated_duration or 60)))
+            else:
+                dropped.append(item)
+        self._blame_dropped(dropped, judge_busy)
+
+        sitting = sum(e - s for j in self.judges for s, e in self._judge_windows(j))
+        heard = sum(self._minute(item['end']) - self._minute(item['start']) for item in self.full_plan if 'start' in item)
+        print(f"Timeline: placed {len(starts)} hearings, {len(dropped)} did not fit "
+              f"({heard / max(sitting, 1):.0%} of sitting time used).")
+
+    def _blame_dropped(self, dropped, judge_busy):
+        """
+        Sets the reason for hearings Stage 3 could not place, and which side
+        the repair loop should rule out: the lawyer when the judge still has
+        a seat and a gap long enough, otherwise the judge.
+        """
+        seats = {j.id: self._judge_cap(j) for j in self.judges}
+        for item in self.full_plan:
+            if 'start' in item:
+                seats[item['judge'].id] -= 1
+        for item in dropped:
+            judge, duration = item['judge'], item['case'].estimated_duration or 60
+            if seats[judge.id] > 0 and self._earliest_fit(self._judge_windows(judge), judge_busy[judge.id], duration) is not None:
+                item['reason'], item['blame'] = "lawyer busy in sitting hours", "lawyer"
+            else:
+                item['reason'], item['blame'] = "does not fit sitting hours", "judge"
 
     def act(self):
-        # (Same as previous)
-        Schedule.objects.all().delete()
-        base_time = datetime.combine(self.target_day, datetime.strptime("10:00", "%H:%M").time())
-        
-        saved_count = 0
+        """
+        Persists case scores, the new schedule and its outgoing notifications
+        in one transaction using bulk writes.
+        """
+        through = Case.lawyers.through
+        self._load_descriptions([item['case'] for item in self.full_plan
+                                 if not item.get('schedule') and 'start' in item])
+
+        schedules, scheduled_cases, lawyer_links, messages = [], [], [], []
         for item in self.full_plan:
+            if item.get('schedule'):
+                continue
             case = item['case']
             judge = item['judge']
             lawyer = item['lawyer']
-            slot = item['slot']
-            
-            start_time = base_time + timedelta(minutes=90 * slot)
-            end_time = start_time + timedelta(minutes=case.estimated_duration or 60)
-            
-            if not lawyer: continue
+            if not lawyer or 'start' not in item: continue
 
-            Schedule.objects.create(
+            start_time = item['start']
+            end_time = item['end']
+
+            schedules.append(Schedule(
                 case=case,
                 judge=judge,
                 start_time=start_time,
                 end_time=end_time,
                 room=f"Room-{judge.id}",
-                version=4
-            )
-            
+                version=4,
+                fingerprint=case_fingerprint(case),
+            ))
             case.assigned_judge = judge
-            case.lawyers.clear()
-            case.lawyers.add(lawyer)
-            case.save()
-            saved_count += 1
-            
-            # Send SMS Notifications
-            from scheduler.tools.sms_utils import send_sms
-            
-            msg_body = f"New Schedule: Case {case.case_number} on {start_time.strftime('%Y-%m-%d %H:%M')} at {judge.court}."
-            
-            print(f"Attempting to send SMS for Case {case.case_number}...")
-            if judge.phone_number:
-                print(f"Sending to Judge {judge.name} ({judge.phone_number})")
-                send_sms(judge.phone_number, f"Judge {judge.name}: {msg_body}")
-            else:
-                print(f"Judge {judge.name} has no phone number.")
-                
-            if lawyer.phone_number:
-                print(f"Sending to Lawyer {lawyer.name} ({lawyer.phone_number})")
-                send_sms(lawyer.phone_number, f"Lawyer {lawyer.name}: {msg_body}")
+            scheduled_cases.append(case)
+            lawyer_links.append(through(case_id=case.id, lawyer_id=lawyer.id))
+
+            # Notifications go to the outbox in the same transaction; the
+            # send_notifications worker delivers one digest per recipient
+            msg_body = f"Case {case.case_number} on {start_time.strftime('%Y-%m-%d %H:%M')} at {judge.court}."
+            messages.append((judge.phone_number, f"Judge {judge.name}", msg_body))
+            messages.append((lawyer.phone_number, f"Lawyer {lawyer.name}", msg_body))
+
+        with QueryCounter() as queries, transaction.atomic():
+            if self.incremental:
+                # Only the diff: drop stale rows, keep unchanged ones untouched
+                for ids in chunked(self.stale_schedule_ids, WRITE_BATCH_SIZE):
+                    Schedule.objects.filter(id__in=ids).delete()
+            elif self.horizon_days > 1:
+                # Frozen days (and anything before the horizon) stay as they are
+                if self.replan_from:
+                    stale = Schedule.objects.filter(start_time__gte=day_range(self.replan_from)[0])
+                    for day in self.frozen_days:
+                        start, end = day_range(day)
+                        stale = stale.exclude(start_time__gte=start, start_time__lt=end)
+                    stale.delete()
             else:
-                print(f"Lawyer {lawyer.name} has no phone number.")
-            
-        print(f"Finalized and saved {saved_count} schedules.")
+                # Other days of an earlier horizon run stay as they are
+                start, end = day_range(self.target_day)
+                Schedule.objects.filter(start_time__gte=start, start_time__lt=end).delete()
+
+            Case.objects.bulk_update(self.cases, ["estimated_duration", "priority"], batch_size=WRITE_BATCH_SIZE)
+            Schedule.objects.bulk_create(schedules, batch_size=WRITE_BATCH_SIZE)
+            Case.objects.bulk_update(scheduled_cases, ["assigned_judge"], batch_size=WRITE_BATCH_SIZE)
+            for ids in chunked([c.id for c in scheduled_cases], WRITE_BATCH_SIZE):
+                through.objects.filter(case_id__in=ids).delete()
+            through.objects.bulk_create(lawyer_links, batch_size=WRITE_BATCH_SIZE)
+            queued = enqueue(messages)
+            # Bulk writes send no signals; invalidate cached responses on commit
+            response_cache.bump("schedules", "cases", "lawyers")
+
+        saved_count = len(schedules)
+        print(f"Finalized and saved {saved_count} schedules in one transaction ({queries.count} queries).")
+        print(f"Queued {queued} notifications ({len(messages) - queued} skipped, no phone number).")
+
+    # --- Repair loop ---
+    # Stages 1-3 are solved one after the other, so a judge assignment can
+    # leave a case with no free lawyer or no room in the sitting hours. Every
+    # case not yet placed goes back to Stage 1, with the judge or lawyer that
+    # kept it out of Stage 3 ruled out for it, while everything already
+    # placed is held fixed like a kept schedule.
+
+    def _out_of_time(self):
+        return self.deadline is not None and datetime.now().timestamp() >= self.deadline
+
+    def _plan_day(self, label=""):
+        """
+        Runs Stages 1-3 for target_day, re-planning the cases left out for up
+        to MAX_REPAIR_ROUNDS rounds while a round places a case or rules out
+        a judge or lawyer. Leaves the placed hearings in self.full_plan and
+        the rest, with a reason, in self.unscheduled.
+        """
+        base_kept, all_cases = self.kept_plan, self.cases
+        placed, failed = [], {}
+        self.tabu, self.lawyer_tabu, self.unassigned = set(), set(), []
+        objective = None
+        for round_no in range(1, MAX_REPAIR_ROUNDS + 1):
+            placed_ids = {item['case'].id for item in placed}
+            pending = [c for c in all_cases if c.id not in placed_ids]
+            if round_no > 1:
+                print(f"--- Repair round {round_no}: re-planning {len(pending)} cases ---")
+            self.kept_plan, self.cases = base_kept + placed, pending
+            self.full_plan, self.unassigned, self.objective = list(self.kept_plan), [], None
+            self._report(f"judges{label}")
+            self.optimize_judges()
+            self._report(f"lawyers{label}")
+            self.optimize_lawyers()
+            self._report(f"timeline{label}")
+            self.optimize_timeline()
+            if self.objective is not None:
+                objective = (objective or 0) + self.objective
+
+            fixed = {id(item) for item in self.kept_plan}
+            new = [item for item in self.full_plan if id(item) not in fixed]
+            ruled_out = len(self.tabu) + len(self.lawyer_tabu)
+            for item in new:
+                if 'start' in item:
+                    placed.append(item)
+                    continue
+                failed[item['case'].id] = item['reason']
+                if item.get('blame') == "lawyer":
+                    self.lawyer_tabu.add((item['case'].id, item['lawyer'].id))
+                elif item.get('blame') == "judge":
+                    self.tabu.add((item['case'].id, item['judge'].id))
+            seated = {item['case'].id for item in new}
+            for c in pending:
+                if c.id not in seated:
+                    failed.setdefault(c.id, "no judge capacity")
+            progress = any('start' in item for item in new) or len(self.tabu) + len(self.lawyer_tabu) > ruled_out
+            if len(placed) == len(all_cases) or not progress or self._out_of_time():
+                break
+
+        placed_ids = {item['case'].id for item in placed}
+        self.kept_plan, self.cases = base_kept, all_cases
+        self.full_plan = base_kept + placed
+        self.objective = objective
+        self.unscheduled = [(c, failed[c.id]) for c in all_cases if c.id not in placed_ids]
+        self.unassigned = [c for c, _ in self.unscheduled]
+        self._report_unscheduled()
+
+    def _report_unscheduled(self):
+        if not self.unscheduled:
+            return
+        by_reason = defaultdict(list)
+        for c, reason in self.unscheduled:
+            by_reason[reason].append(c.case_number)
+        print(f"{len(self.unscheduled)} cases left unscheduled:")
+        for reason, numbers in sorted(by_reason.items()):
+            more = f" and {len(numbers) - 5} more" if len(numbers) > 5 else ""
+            print(f"  {reason}: {', '.join(numbers[:5])}{more}")
+
+    # --- Multi-day horizon ---
+
+    def _horizon_dates(self):
+        """The next horizon_days court days from target_day; weekends only if some judge sits then."""
+        sitting_weekdays = {slot.get("day") for j in self.judges for slot in (j.availability or [])}
+        days, day = [], self.target_day
+        while len(days) < self.horizon_days:
+            if day.weekday() < 5 or day.strftime("%A") in sitting_weekdays:
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def _run_horizon(self):
+        """
+        Plans each day of the horizon in turn over the shrinking backlog.
+        Cases left over from a day move to the next one with their priority
+        re-aged to that date. All days are written in a single act().
+        """
+        print(f"-=-=- Hybrid-Planning {self.horizon_days} days from {self.target_day} -=-=-")
+        if self.time_budget:
+            self.deadline = datetime.now().timestamp() + self.time_budget
+        self._report("observe")
+        self.observe()
+        self.think_with_llm()
+        self._report("score")
+        self.compute_case_scores()
+        requested_day = self.target_day
+        days = self._horizon_dates()
+
+        frozen = []
+        for day in days[:self.freeze_days]:
+            start, end = day_range(day)
+            if not Schedule.objects.filter(start_time__gte=start, start_time__lt=end).exists():
+                break
+            frozen.append(day)
+        frozen_cases = set()
+        for day in frozen:
+            start, end = day_range(day)
+            frozen_cases.update(Schedule.objects.filter(start_time__gte=start, start_time__lt=end)
+                                .values_list("case_id", flat=True))
+        if frozen:
+            print(f"Keeping the published schedule for {', '.join(str(d) for d in frozen)}.")
+
+        scored_cases = self.cases
+        base_priority = {c.id: c.priority for c in scored_cases}
+        boosted = set(self.llm_plan.get("priorities", []))
+        backlog = [c for c in scored_cases if not c.is_resolved and c.id not in frozen_cases]
+        plan, objective, reasons = [], 0, {}
+        for n, day in enumerate(days[len(frozen):], start=len(frozen) + 1):
+            if not backlog or self._out_of_time():
+                break
+            self.target_day, self._windows, self.unassigned, self.objective = day, {}, [], None
+            aged = compute_priorities([c.case_type for c in backlog], [c.urgency for c in backlog],
+                                      [c.filed_in for c in backlog], today=day)
+            for c, priority in zip(backlog, aged.tolist()):
+                c.priority = priority * 1.2 if c.case_number in boosted else priority
+            self.cases = backlog
+
+            self._plan_day(f" {n}/{len(days)}")
+            reasons = {c.id: reason for c, reason in self.unscheduled}
+
+            day_plan = [item for item in self.full_plan if 'schedule' not in item]
+            planned = {item['case'].id for item in day_plan}
+            backlog = [c for c in backlog if c.id not in planned]
+            plan.extend(day_plan)
+            objective += self.objective or 0
+            print(f"Day {day}: {len(day_plan)} hearings, {len(backlog)} cases carried forward.")
+
+        # Persist the scores as of the first day
+        for c in scored_cases:
+            c.priority = base_priority[c.id]
+        self.cases, self.full_plan, self.unassigned, self.objective = scored_cases, plan, backlog, objective
+        self.unscheduled = [(c, reasons.get(c.id, "time budget exhausted")) for c in backlog]
+        # From the requested day rather than the first court day: rows on a
+        # non-sitting target day (an earlier single-day run) would survive
+        # while their cases get planned again on later days
+        self.replan_from = requested_day if len(frozen) < len(days) else None
+        self.frozen_days = frozen
+        self.target_day = days[0]
+        self._report("persist")
+        self.act()
+        print(f"-=-=- Planning Complete: {len(plan)} hearings over {len(days) - len(frozen)} days, "
+              f"{len(backlog)} cases still waiting -=-=-")
 
     def run(self):
+        if self.horizon_days > 1:
+            return self._run_horizon()
         print(f"-=-=- Hybrid-Planning for {self.target_day} -=-=-")
+        if self.time_budget:
+            self.deadline = datetime.now().timestamp() + self.time_budget
+        self._report("observe")
         self.observe()
         self.think_with_llm()
+        self._report("score")
         self.compute_case_scores()
-        self.optimize_judges()
-        self.optimize_lawyers()
+        self._plan_day()
+        self._report("persist")
         self.act()
         print(f"-=-=- Planning Complete -=-=-")
\ No newline at end of file
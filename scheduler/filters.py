@@ -0,0 +1,22 @@
+from django.core.exceptions import ValidationError as ModelValidationError
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+class ParamFilter(BaseFilterBackend):
+    """
+    Exact-match filters a view declares as filter_params = {"query_param":
+    "orm_lookup"}. "true"/"false" are read as booleans; a value the column
+    cannot take is a 400.
+    """
+    def filter_queryset(self, request, queryset, view):
+        for param, lookup in getattr(view, "filter_params", {}).items():
+            value = request.query_params.get(param)
+            if value in (None, ""):
+                continue
+            if value.lower() in ("true", "false"):
+                value = value.lower() == "true"
+            try:
+                queryset = queryset.filter(**{lookup: value})
+            except (ValueError, ModelValidationError):
+                raise ValidationError({param: f"Invalid value {value!r}"})
+        return queryset
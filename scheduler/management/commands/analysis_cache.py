@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from scheduler.tools import analysis_cache
+
+class Command(BaseCommand):
+    help = "Inspect or invalidate the cached LLM case analyses"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Delete every cached analysis")
+        parser.add_argument("--stale", action="store_true",
+                            help="Delete analyses from another OLLAMA_MODEL or prompt version")
+        parser.add_argument("--evict", action="store_true",
+                            help="Trim the cache to ANALYSIS_CACHE_MAX_ENTRIES (least recently used first)")
+
+    def handle(self, *args, **options):
+        if options["clear"] or options["stale"]:
+            deleted = analysis_cache.invalidate(stale_only=not options["clear"])
+            self.stdout.write(f"Deleted {deleted} cached analyses")
+        if options["evict"]:
+            self.stdout.write(f"Evicted {analysis_cache.evict()} cached analyses")
+        stats = analysis_cache.stats()
+        self.stdout.write(f"Entries: {stats['entries']}")
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from scheduler.models import Case
+from scheduler.tools.bulk_analysis import analyze_queryset, import_cases_jsonl
+
+class Command(BaseCommand):
+    help = "Run AI case analysis in bulk over existing cases or a JSONL intake file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jsonl", help="Import cases from this JSONL file, then analyze them")
+        parser.add_argument("--unanalyzed", action="store_true", help="Only cases without an AI analysis")
+        parser.add_argument("--pending", action="store_true",
+                            help="Only cases whose background analysis is pending, interrupted or failed")
+        parser.add_argument("--open", action="store_true", help="Only unresolved cases")
+        parser.add_argument("--type", dest="case_type", help="Only cases of this type")
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent Ollama requests")
+        parser.add_argument("--max-pending", type=int, default=None, help="In-flight request cap (default 2 x workers)")
+        parser.add_argument("--batch-size", type=int, default=100, help="Cases written per bulk update")
+        parser.add_argument("--timeout", type=float, default=30, help="Per-case AI timeout in seconds")
+        parser.add_argument("--budget", type=float, default=None,
+                            help="Seconds for the whole run; remaining cases fall back to rule-based analysis")
+
+    def handle(self, *args, **options):
+        cases = Case.objects.all()
+        if options["jsonl"]:
+            try:
+                numbers = import_cases_jsonl(options["jsonl"])
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Could not import {options['jsonl']}: {e}")
+            self.stdout.write(f"Imported {len(numbers)} cases from {options['jsonl']}")
+            cases = cases.filter(case_number__in=numbers)
+        if options["unanalyzed"]:
+            cases = cases.filter(ai_analysis={})
+        if options["pending"]:
+            cases = cases.filter(analysis_status__in=["pending", "running", "failed"])
+        if options["open"]:
+            cases = cases.filter(is_resolved=False)
+        if options["case_type"]:
+            cases = cases.filter(case_type=options["case_type"])
+
+        stats = analyze_queryset(
+            cases,
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            max_pending=options["max_pending"],
+            timeout=options["timeout"],
+            budget=options["budget"],
+            log=self.stdout.write,
+        )
+        self.stdout.write(
+            f"Done: {stats['analyzed']} cases in {stats['elapsed']}s ({stats['per_second']} cases/s)"
+        )
@@ -0,0 +1,64 @@
+import json
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from scheduler.models import Policy
+from scheduler.tools.embedding_codec import encode_embedding, decode_embedding
+
+class Command(BaseCommand):
+    help = "Compare JSON, float32 and int8 policy embedding storage: size, parse time and recall"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--n", type=int, default=20000, help="Synthetic corpus size")
+        parser.add_argument("--dim", type=int, default=384)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--k", type=int, default=10, help="Recall@k")
+        parser.add_argument("--from-db", action="store_true", help="Use stored Policy embeddings as the corpus")
+
+    def _corpus(self, options):
+        if options["from_db"]:
+            rows = Policy.objects.exclude(embedding_dim=0).values_list("embedding_blob", "embedding_dtype", "embedding_scale")
+            return np.stack([decode_embedding(*row) for row in rows]).astype(np.float32)
+        # Clustered vectors, like paragraphs from a handful of rulebooks
+        rng = np.random.default_rng(0)
+        centers = rng.standard_normal((max(1, options["n"] // 100), options["dim"]))
+        labels = rng.integers(0, len(centers), options["n"])
+        return (centers[labels] + 0.5 * rng.standard_normal((options["n"], options["dim"]))).astype(np.float32)
+
+    @staticmethod
+    def _normalize(m):
+        return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+    def handle(self, *args, **options):
+        corpus = self._corpus(options)
+        n, dim, k = len(corpus), corpus.shape[1], options["k"]
+        self.stdout.write(f"Corpus: {n} vectors x {dim} dims")
+
+        encoded = {
+            "json": [json.dumps(v.tolist()) for v in corpus],
+            "float32": [encode_embedding(v, "float32") for v in corpus],
+            "int8": [encode_embedding(v, "int8") for v in corpus],
+        }
+
+        decoders = {
+            "json": lambda rows: np.array([json.loads(r) for r in rows], dtype=np.float32),
+            "float32": lambda rows: np.stack([decode_embedding(b, "float32", s) for b, s in rows]),
+            "int8": lambda rows: np.stack([decode_embedding(b, "int8", s) for b, s in rows]),
+        }
+
+        rng = np.random.default_rng(1)
+        picks = rng.integers(0, n, options["queries"])
+        queries = self._normalize(corpus[picks] + 0.3 * rng.standard_normal((len(picks), dim)).astype(np.float32))
+
+        truth = None
+        self.stdout.write(f"{'format':<8} {'bytes/row':>10} {'parse ms':>10} {'recall@' + str(k):>10}")
+        for fmt, rows in encoded.items():
+            size = np.mean([len(r) if fmt == "json" else len(r[0]) for r in rows])
+            start = time.perf_counter()
+            matrix = decoders[fmt](rows)
+            parse_ms = (time.perf_counter() - start) * 1000
+            top = np.argsort(-(self._normalize(matrix) @ queries.T), axis=0)[:k].T
+            if truth is None:
+                truth = top
+            recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(top, truth)])
+            self.stdout.write(f"{fmt:<8} {size:>10.0f} {parse_ms:>10.1f} {recall:>10.3f}")
@@ -0,0 +1,104 @@
+import time
+from datetime import date, datetime, timedelta
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from scheduler.models import Case, Judge, Schedule
+from scheduler.tools.calendar_utils import day_range
+from scheduler.tools.query_counter import QueryCounter, chunked
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = ("Time the dashboard and planner day queries on a seeded Schedule table, "
+            "old (start_time__date, lazy relations) against new (range filter, select_related)")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Schedule rows to seed")
+        parser.add_argument("--days", type=int, default=365, help="Days the rows are spread over")
+        parser.add_argument("--judges", type=int, default=50)
+        parser.add_argument("--cases", type=int, default=20000)
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per query; the median is reported")
+        parser.add_argument("--explain", action="store_true", help="Print the query plan of each query")
+        parser.add_argument("--keep", action="store_true",
+                            help="Commit the seeded rows instead of rolling them back")
+
+    def _seed(self, options):
+        first = date(2000, 1, 3)
+        judges = Judge.objects.bulk_create(
+            [Judge(name=f"Bench judge {j}", court="Bench court") for j in range(options["judges"])])
+        cases = Case.objects.bulk_create(
+            [Case(case_number=f"BENCH-{i}", case_type="civil", filed_in=first) for i in range(options["cases"])],
+            batch_size=5000)
+        rng = np.random.default_rng(0)
+        n = options["rows"]
+        day = rng.integers(0, options["days"], n)
+        minute = 600 + rng.integers(0, 420, n)
+        judge = rng.integers(0, len(judges), n)
+        case = rng.integers(0, len(cases), n)
+        midnight = timezone.make_aware(datetime.combine(first, datetime.min.time()))
+        start = time.perf_counter()
+        for batch in chunked(range(n), 10000):
+            Schedule.objects.bulk_create([
+                Schedule(case_id=cases[case[i]].id, judge_id=judges[judge[i]].id,
+                         start_time=midnight + timedelta(days=int(day[i]), minutes=int(minute[i])),
+                         end_time=midnight + timedelta(days=int(day[i]), minutes=int(minute[i]) + 45))
+                for i in batch])
+        self.stdout.write(f"Seeded {n} schedules over {options['days']} days "
+                          f"in {time.perf_counter() - start:.1f}s")
+        return first + timedelta(days=options["days"] // 2), judges[0]
+
+    def _bench(self, label, run, options):
+        timings = []
+        for _ in range(options["repeat"]):
+            with QueryCounter() as queries:
+                start = time.perf_counter()
+                rows = run()
+                timings.append((time.perf_counter() - start) * 1000)
+        self.stdout.write(f"{label:<32} {rows:>7} {queries.count:>8} {np.median(timings):>10.1f}")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                day, judge = self._seed(options)
+                start, end = day_range(day)
+
+                def dashboard_old():
+                    qs = Schedule.objects.filter(start_time__date=day).order_by("judge__name", "start_time")
+                    return len([(s.judge.name, s.case.case_number) for s in qs])
+
+                def dashboard_new():
+                    qs = (Schedule.objects.filter(start_time__gte=start, start_time__lt=end)
+                          .select_related("judge", "case").order_by("judge__name", "start_time"))
+                    return len([(s.judge.name, s.case.case_number) for s in qs])
+
+                def judge_day_old():
+                    return len(Schedule.objects.filter(judge=judge, start_time__date=day))
+
+                def judge_day_new():
+                    return len(Schedule.objects.filter(judge=judge, start_time__gte=start, start_time__lt=end))
+
+                queries = [
+                    ("dashboard (date, lazy)", dashboard_old,
+                     lambda: Schedule.objects.filter(start_time__date=day).order_by("judge__name", "start_time")),
+                    ("dashboard (range, joined)", dashboard_new,
+                     lambda: Schedule.objects.filter(start_time__gte=start, start_time__lt=end)
+                     .select_related("judge", "case").order_by("judge__name", "start_time")),
+                    ("judge day (date)", judge_day_old,
+                     lambda: Schedule.objects.filter(judge=judge, start_time__date=day)),
+                    ("judge day (range)", judge_day_new,
+                     lambda: Schedule.objects.filter(judge=judge, start_time__gte=start, start_time__lt=end)),
+                ]
+                self.stdout.write(f"Day {day} on {connection.vendor}")
+                self.stdout.write(f"{'query':<32} {'rows':>7} {'queries':>8} {'median ms':>10}")
+                for label, run, qs in queries:
+                    self._bench(label, run, options)
+                if options["explain"]:
+                    for label, _, qs in queries:
+                        self.stdout.write(f"\n{label}:\n{qs().explain()}")
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write("Seeded rows rolled back.")
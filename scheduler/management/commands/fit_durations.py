@@ -0,0 +1,28 @@
+from datetime import date
+from django.core.management.base import BaseCommand
+from scheduler.models import HearingRecord
+from scheduler.tools.duration_model import fit_duration_table, save_table
+
+class Command(BaseCommand):
+    help = "Fit hearing durations per case type and complexity from recorded actual hearing lengths"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--min-samples", type=int, default=5, help="Smallest group that gets its own estimate")
+        parser.add_argument("--since", type=date.fromisoformat, default=None,
+                            help="Only learn from hearings heard on or after this date (YYYY-MM-DD)")
+        parser.add_argument("--path", help="Where to write the table (default: DURATION_MODEL_PATH)")
+        parser.add_argument("--dry-run", action="store_true", help="Print the table without saving it")
+
+    def handle(self, *args, **options):
+        records = HearingRecord.objects.all()
+        if options["since"]:
+            records = records.filter(heard_on__gte=options["since"])
+        table = fit_duration_table(records, min_samples=options["min_samples"])
+        self.stdout.write(f"Fitted from {table['samples']} hearings")
+        for key, minutes in table["by_type_complexity"].items():
+            self.stdout.write(f"  {key}: {minutes} min")
+        for key, minutes in table["by_type"].items():
+            self.stdout.write(f"  {key} (any): {minutes} min")
+        if not options["dry_run"]:
+            save_table(table, options["path"])
+            self.stdout.write(f"Saved to {options['path'] or 'DURATION_MODEL_PATH'}")
@@ -0,0 +1,92 @@
+import json
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from scheduler.models import Policy
+from scheduler.tools.policy_retriever import add_policies, content_hash, split_paragraphs
+
+TEXT_SUFFIXES = {".txt", ".md"}
+
+class Command(BaseCommand):
+    help = "Bulk-ingest court policies from a directory of text files or a JSONL file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Directory of .txt/.md files, or a .jsonl file with title/content[/source]")
+        parser.add_argument("--source", default="internal", help="Source label for policies without one")
+        parser.add_argument("--batch-size", type=int, default=64, help="Chunks embedded and inserted per batch")
+        parser.add_argument("--max-chars", type=int, default=1500, help="Maximum characters per paragraph chunk")
+
+    def _bad_row(self, path, line_no, problem):
+        self.invalid += 1
+        self.stderr.write(f"{path}:{line_no}: skipped, {problem}")
+
+    def _documents(self, path, source):
+        """Yields (title, text, source) one document at a time; bad JSONL rows are reported and skipped."""
+        if path.is_dir():
+            for f in sorted(path.rglob("*")):
+                if f.is_file() and f.suffix.lower() in TEXT_SUFFIXES:
+                    yield f.stem, f.read_text(encoding="utf-8"), source
+        elif path.suffix.lower() == ".jsonl":
+            with path.open(encoding="utf-8") as fh:
+                for line_no, line in enumerate(fh, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        self._bad_row(path, line_no, f"invalid JSON ({e})")
+                        continue
+                    if not isinstance(row, dict):
+                        self._bad_row(path, line_no, "not a JSON object")
+                        continue
+                    content = row.get("content")
+                    if not isinstance(content, str) or not content.strip():
+                        self._bad_row(path, line_no, 'no "content" text')
+                        continue
+                    yield str(row.get("title") or f"{path.stem} #{line_no}"), content, str(row.get("source") or source)
+        else:
+            raise CommandError(f"{path} is neither a directory nor a .jsonl file")
+
+    def _chunks(self, documents, max_chars):
+        for title, text, source in documents:
+            parts = list(split_paragraphs(text, max_chars))
+            for i, part in enumerate(parts, 1):
+                chunk_title = title if len(parts) == 1 else f"{title} (part {i})"
+                yield chunk_title[:200], part, source
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+
+        # Everything already embedded is skipped, so an interrupted run
+        # resumes where it stopped and an unchanged corpus is a no-op
+        seen = set(Policy.objects.exclude(content_hash="").values_list("content_hash", flat=True))
+        start = time.monotonic()
+        added = skipped = self.invalid = 0
+        batch = []
+
+        def flush():
+            nonlocal added
+            with transaction.atomic():
+                add_policies(batch, batch_size=options["batch_size"])
+            added += len(batch)
+            batch.clear()
+
+        for title, text, source in self._chunks(self._documents(path, options["source"]), options["max_chars"]):
+            digest = content_hash(text)
+            if digest in seen:
+                skipped += 1
+                continue
+            seen.add(digest)
+            batch.append((title, text, source))
+            if len(batch) >= options["batch_size"]:
+                flush()
+        if batch:
+            flush()
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(f"Added {added} policy chunks, skipped {skipped} already embedded in {elapsed:.2f}s")
+        if self.invalid:
+            self.stdout.write(f"Skipped {self.invalid} invalid rows (see above)")
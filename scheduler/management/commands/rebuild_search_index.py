@@ -0,0 +1,19 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from scheduler.tools import search_index
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over cases, judges and lawyers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", action="append", choices=list(search_index.KINDS),
+                            help="Only rebuild this kind (repeatable; default all)")
+
+    def handle(self, *args, **options):
+        if not search_index.enabled():
+            raise CommandError("The search index needs SQLite FTS5; other databases search without one.")
+        start = time.monotonic()
+        with transaction.atomic():
+            indexed = search_index.rebuild(options["kind"])
+        self.stdout.write(f"Indexed {indexed} rows in {time.monotonic() - start:.1f}s")
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from scheduler.models import Case
+from scheduler.tools.rescoring import FORMULAS, rescore_cases
+
+class Command(BaseCommand):
+    help = "Recompute case priorities (re-aging) and optionally durations in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--formula", choices=sorted(FORMULAS), default="ai",
+                            help="ai = intake weighting (default), planner = priority_model weighting")
+        parser.add_argument("--durations", action="store_true", help="Also re-estimate durations")
+        parser.add_argument("--open", action="store_true", help="Only unresolved cases")
+        parser.add_argument("--chunk-size", type=int, default=20000, help="Cases read per chunk")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Max ids per UPDATE statement")
+        parser.add_argument("--dry-run", action="store_true", help="Compute and count, but write nothing")
+
+    def handle(self, *args, **options):
+        cases = Case.objects.all()
+        if options["open"]:
+            cases = cases.filter(is_resolved=False)
+        stats = rescore_cases(
+            cases,
+            formula=options["formula"],
+            durations=options["durations"],
+            chunk_size=options["chunk_size"],
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+            log=self.stdout.write,
+        )
+        self.stdout.write(
+            f"Done: {stats['changed']} of {stats['scanned']} cases changed in {stats['elapsed']}s"
+            + (" (dry run)" if options["dry_run"] else "")
+        )
@@ -1,9 +1,54 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from scheduler.agent.jobs import OPTION_PARSERS
 from scheduler.agent.planner_agent_v2 import HybridPlannerAgent
 
+# Command option -> (planner option, flag), validated like /regenerate/ options
+CHECKED_OPTIONS = {
+    "top_k_judges": ("top_k_judges", "--top-k-judges"),
+    "top_k_lawyers": ("top_k_lawyers", "--top-k-lawyers"),
+    "horizon": ("horizon_days", "--horizon"),
+    "freeze_days": ("freeze_days", "--freeze-days"),
+    "time_budget": ("time_budget", "--time-budget"),
+}
+
 class Command(BaseCommand):
     help = "Run the hybrid LLM + OR-Tools planner agent"
 
+    def add_arguments(self, parser):
+        parser.add_argument("--decompose", action="store_true",
+                            help="Solve judge assignment per specialization in parallel (large backlogs)")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Number of partitions solved concurrently (default: CPU count)")
+        parser.add_argument("--top-k-judges", type=int, default=None,
+                            help="Only create solver variables for the K best judges per case")
+        parser.add_argument("--top-k-lawyers", type=int, default=None,
+                            help="Only create solver variables for the K best lawyers per case")
+        parser.add_argument("--incremental", action="store_true",
+                            help="Keep unchanged schedules and only re-plan new, changed or resolved cases")
+        parser.add_argument("--horizon", type=int, default=1,
+                            help="Plan this many court days, carrying each day's overflow to the next")
+        parser.add_argument("--freeze-days", type=int, default=0,
+                            help="With --horizon, keep the existing schedule of the first N days and re-plan the rest")
+        parser.add_argument("--time-budget", type=float, default=None,
+                            help="Stop solving after this many seconds and save the best partial plan")
+
     def handle(self, *args, **options):
-        agent = HybridPlannerAgent()
+        for name, (option, flag) in CHECKED_OPTIONS.items():
+            if options[name] is not None:
+                try:
+                    options[name] = OPTION_PARSERS[option](options[name])
+                except ValueError as e:
+                    raise CommandError(f"{flag} {e}")
+        if options["workers"] is not None and options["workers"] < 1:
+            raise CommandError("--workers must be at least 1")
+        agent = HybridPlannerAgent(
+            decompose=options["decompose"],
+            workers=options["workers"],
+            top_k_judges=options["top_k_judges"],
+            top_k_lawyers=options["top_k_lawyers"],
+            incremental=options["incremental"],
+            horizon_days=options["horizon"],
+            freeze_days=options["freeze_days"],
+            time_budget=options["time_budget"],
+        )
         agent.run()
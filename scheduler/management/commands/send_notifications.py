@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from scheduler.tools.notifier import dispatch_pending, ConsoleTransport
+
+class Command(BaseCommand):
+    help = "Deliver queued schedule notifications, one digest SMS per recipient"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", type=float, default=None,
+                            help="Keep polling the outbox every N seconds")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Concurrent senders (default: settings.SMS_WORKERS)")
+        parser.add_argument("--rate", type=float, default=None,
+                            help="Max messages per second (default: settings.SMS_RATE_PER_SECOND)")
+        parser.add_argument("--console", action="store_true",
+                            help="Print messages instead of sending them")
+
+    def handle(self, *args, **options):
+        transport = ConsoleTransport() if options["console"] else None
+        while True:
+            start = time.monotonic()
+            stats = dispatch_pending(transport=transport, workers=options["workers"], rate=options["rate"])
+            if stats["recipients"]:
+                elapsed = time.monotonic() - start
+                self.stdout.write(
+                    f"Sent {stats['sent']} digests ({stats['messages']} notifications), "
+                    f"{stats['failed']} failed in {elapsed:.2f}s"
+                )
+            if options["loop"] is None:
+                break
+            time.sleep(options["loop"])
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0009_case_ai_analysis_judge_phone_number_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+    ]
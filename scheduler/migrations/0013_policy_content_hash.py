@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:03
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_content_hash(apps, schema_editor):
+    # Same normalization as scheduler.tools.policy_retriever.content_hash
+    Policy = apps.get_model('scheduler', 'Policy')
+    for policy in Policy.objects.only('id', 'content').iterator():
+        normalized = " ".join(policy.content.split())
+        policy.content_hash = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        policy.save(update_fields=['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0012_plannerjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policy',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
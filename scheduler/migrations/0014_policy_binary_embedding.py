@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:04
+
+import numpy as np
+
+from django.db import migrations, models
+
+
+def json_to_blob(apps, schema_editor):
+    # Existing rows were embedded with all-MiniLM-L6-v2 and stored as JSON lists
+    Policy = apps.get_model('scheduler', 'Policy')
+    batch = []
+    for policy in Policy.objects.only('id', 'embedding').iterator(chunk_size=1000):
+        values = policy.embedding or []
+        policy.embedding_blob = np.asarray(values, dtype='<f4').tobytes()
+        policy.embedding_dtype = 'float32'
+        policy.embedding_scale = 1.0
+        policy.embedding_dim = len(values)
+        policy.embedding_model = 'all-MiniLM-L6-v2' if values else ''
+        batch.append(policy)
+        if len(batch) >= 1000:
+            Policy.objects.bulk_update(batch, ['embedding_blob', 'embedding_dtype', 'embedding_scale',
+                                               'embedding_dim', 'embedding_model'])
+            batch = []
+    Policy.objects.bulk_update(batch, ['embedding_blob', 'embedding_dtype', 'embedding_scale',
+                                       'embedding_dim', 'embedding_model'])
+
+
+def blob_to_json(apps, schema_editor):
+    Policy = apps.get_model('scheduler', 'Policy')
+    for policy in Policy.objects.iterator(chunk_size=1000):
+        raw = np.frombuffer(policy.embedding_blob, dtype='<f4' if policy.embedding_dtype == 'float32' else 'i1')
+        policy.embedding = (raw.astype(np.float32) * policy.embedding_scale).tolist()
+        policy.save(update_fields=['embedding'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0013_policy_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policy',
+            name='embedding_blob',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.AddField(
+            model_name='policy',
+            name='embedding_dim',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='policy',
+            name='embedding_dtype',
+            field=models.CharField(choices=[('float32', 'float32'), ('int8', 'int8 (quantized)')], default='float32', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='policy',
+            name='embedding_model',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='policy',
+            name='embedding_scale',
+            field=models.FloatField(default=1.0),
+        ),
+        migrations.RunPython(json_to_blob, blob_to_json),
+        migrations.RemoveField(
+            model_name='policy',
+            name='embedding',
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0014_policy_binary_embedding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('model_name', models.CharField(max_length=100)),
+                ('prompt_version', models.IntegerField()),
+                ('result', models.JSONField(default=dict)),
+                ('hits', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:09
+
+from django.db import migrations, models
+
+
+def mark_analyzed_cases_done(apps, schema_editor):
+    # Cases created before background intake were analyzed synchronously
+    Case = apps.get_model('scheduler', 'Case')
+    Case.objects.exclude(ai_analysis={}).update(analysis_status='done')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0015_analysiscache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='case',
+            name='analysis_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10),
+        ),
+        migrations.RunPython(mark_analyzed_cases_done, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0016_case_analysis_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plannerjob',
+            name='unscheduled',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
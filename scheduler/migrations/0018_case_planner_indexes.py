@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0017_plannerjob_unscheduled'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='case',
+            name='case_type',
+            field=models.CharField(choices=[('civil', 'Civil'), ('criminal', 'Criminal'), ('family', 'Family'), ('other', 'Other')], db_index=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='case',
+            name='filed_in',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='case',
+            name='is_resolved',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AlterField(
+            model_name='case',
+            name='priority',
+            field=models.FloatField(db_index=True, default=0.0),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0018_case_planner_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='case',
+            name='is_resolved',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['is_resolved', 'priority'], name='scheduler_c_is_reso_31038c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['judge', 'start_time'], name='scheduler_s_judge_i_46f9b9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['start_time'], name='scheduler_s_start_t_04065c_idx'),
+        ),
+    ]
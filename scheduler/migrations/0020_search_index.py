@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:09
+
+from django.db import migrations
+
+# rowid = (code << 40) + pk for case 0, judge 1, lawyer 2 (see scheduler.tools.search_index)
+SOURCES = [
+    (0, "scheduler_case", "case_number", "COALESCE(description, '')"),
+    (1, "scheduler_judge", "name", "court || ' ' || specialization"),
+    (2, "scheduler_lawyer", "name", "specialization"),
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other databases use the unranked fallback search
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS scheduler_search_index USING fts5("
+        "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3 4 5 6')"
+    )
+    for code, table, title, body in SOURCES:
+        schema_editor.execute(
+            f"INSERT INTO scheduler_search_index (rowid, title, body) "
+            f"SELECT ({code} << 40) + id, {title}, {body} FROM {table}"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS scheduler_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0019_schedule_day_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0020_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HearingRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('case_type', models.CharField(choices=[('civil', 'Civil'), ('criminal', 'Criminal'), ('family', 'Family'), ('other', 'Other')], max_length=50)),
+                ('complexity', models.CharField(blank=True, default='', max_length=10)),
+                ('heard_on', models.DateField(db_index=True)),
+                ('scheduled_minutes', models.IntegerField(blank=True, null=True)),
+                ('actual_minutes', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('case', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='scheduler.case')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0022_notification_claim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plannerjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
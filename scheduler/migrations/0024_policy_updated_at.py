@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0023_plannerjob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policy',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -51,17 +51,28 @@ class Case(models.Model):
     ]
 
     case_number = models.CharField(max_length=50, unique=True)
-    case_type = models.CharField(max_length=50, choices=CASE_TYPES)
+    case_type = models.CharField(max_length=50, choices=CASE_TYPES, db_index=True)
     description = models.TextField(blank=True, default='')  # NEW: Case description
-    filed_in = models.DateField()
+    filed_in = models.DateField(db_index=True)
     urgency = models.FloatField(default=0.5)
     estimated_duration = models.IntegerField(default=60)
-    priority = models.FloatField(default=0.0)
+    priority = models.FloatField(default=0.0, db_index=True)
     ai_analysis = models.JSONField(default=dict, blank=True)  # Store TinyLlama's complete analysis
+    ANALYSIS_STATUSES = [
+        ("pending", "Pending"),   # rule-based values, AI analysis queued
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+    analysis_status = models.CharField(max_length=10, choices=ANALYSIS_STATUSES, default="pending", db_index=True)
     assigned_judge = models.ForeignKey(Judge, on_delete=models.SET_NULL, null=True, blank=True)
     lawyers = models.ManyToManyField(Lawyer, blank=True)
     is_resolved = models.BooleanField(default=False)
 
+    class Meta:
+        # (is_resolved, priority) also serves plain is_resolved filters
+        indexes = [models.Index(fields=["is_resolved", "priority"])]
+
     def __str__(self):
         return self.case_number
 
@@ -72,16 +83,133 @@ class Schedule(models.Model):
     end_time =  models.DateTimeField()
     room = models.CharField(max_length=50, default = "Courtroom 1")
     version = models.IntegerField(default =1) # what is this for?
+    fingerprint = models.CharField(max_length=40, blank=True, default="")  # Case inputs this row was planned from
 
+    class Meta:
+        # Day views filter on a start_time range, per judge or for all judges
+        indexes = [
+            models.Index(fields=["judge", "start_time"]),
+            models.Index(fields=["start_time"]),
+        ]
 
     def __str__(self):
         return f"{self.case.case_number} -> {self.judge.name}"
 
+class HearingRecord(models.Model):
+    """
+    How long a hearing actually took, as recorded after it was heard. Kept
+    apart from Schedule, which the planner rewrites from its own estimates,
+    so fit_durations learns from real hearing lengths.
+    """
+    case = models.ForeignKey(Case, on_delete=models.SET_NULL, null=True, blank=True)
+    # Snapshot of the case when it was heard; survives later edits and deletion
+    case_type = models.CharField(max_length=50, choices=Case.CASE_TYPES)
+    complexity = models.CharField(max_length=10, blank=True, default="")
+    heard_on = models.DateField(db_index=True)
+    scheduled_minutes = models.IntegerField(null=True, blank=True)
+    actual_minutes = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.case_type} hearing on {self.heard_on}: {self.actual_minutes} min"
+
 class Policy(models.Model):
+    EMBEDDING_DTYPES = [
+        ("float32", "float32"),
+        ("int8", "int8 (quantized)"),
+    ]
+
     title = models.CharField(max_length=200)
     content = models.TextField()
-    embedding = models.JSONField(default = list)
+    # Packed little-endian vector, see scheduler.tools.embedding_codec
+    embedding_blob = models.BinaryField(blank=True, default=b"")
+    embedding_dtype = models.CharField(max_length=10, choices=EMBEDDING_DTYPES, default="float32")
+    embedding_scale = models.FloatField(default=1.0)  # int8 dequantization factor
+    embedding_dim = models.IntegerField(default=0)
+    embedding_model = models.CharField(max_length=100, blank=True, default="")
     source = models.CharField(max_length=100, default = "internal")
+    content_hash = models.CharField(max_length=64, blank=True, default="", db_index=True)  # sha256 of normalized content
+    # Part of the version PolicyIndex checks, so re-embedded rows are picked up
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    @property
+    def embedding(self):
+        from scheduler.tools.embedding_codec import decode_embedding
+        return decode_embedding(self.embedding_blob, self.embedding_dtype, self.embedding_scale)
+
+    def set_embedding(self, vector, dtype="float32", model_name=""):
+        from scheduler.tools.embedding_codec import encode_embedding
+        self.embedding_blob, self.embedding_scale = encode_embedding(vector, dtype)
+        self.embedding_dtype = dtype
+        self.embedding_dim = len(vector)
+        self.embedding_model = model_name
+
+    def __str__(self):
+        return self.title
+
+class Notification(models.Model):
+    """Outbox row for an SMS line item; delivered by the send_notifications worker."""
+    STATUSES = [
+        ("pending", "Pending"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    phone_number = models.CharField(max_length=20)
+    recipient = models.CharField(max_length=255, blank=True, default="")
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUSES, default="pending")
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # Token and time of the worker run sending this row (see notifier._claim)
+    claim = models.CharField(max_length=32, blank=True, default="")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "phone_number"])]
+
+    def __str__(self):
+        return f"{self.recipient or self.phone_number} [{self.status}]"
+
+class PlannerJob(models.Model):
+    """A background HybridPlannerAgent run, polled via /regenerate/<id>/."""
+    STATUSES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("succeeded", "Succeeded"),
+        ("failed", "Failed"),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUSES, default="queued")
+    stage = models.CharField(max_length=20, blank=True, default="")
+    objective = models.FloatField(null=True, blank=True)
+    options = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, default="")
+    # [{"case_number", "reason"}] for cases the finished run could not place
+    unscheduled = models.JSONField(default=list, blank=True)
+    # Set while queued/running; the unique constraint allows one active job
+    lock = models.CharField(max_length=20, null=True, blank=True, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Last progress report from the worker; the lock expires when it goes quiet
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Planner job {self.id} [{self.status}]"
+
+class AnalysisCache(models.Model):
+    """LLM case analysis keyed by hash(model, prompt version, case_type, description)."""
+    key = models.CharField(max_length=64, unique=True)
+    model_name = models.CharField(max_length=100)
+    prompt_version = models.IntegerField()
+    result = models.JSONField(default=dict)
+    hits = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"{self.model_name} v{self.prompt_version} {self.key[:12]}"
@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+class CursorPage(CursorPagination):
+    """
+    Cursor pages in the view's `ordering` (or ?ordering=, see OrderingFilter).
+    Page size comes from REST_FRAMEWORK["PAGE_SIZE"], or ?page_size= up to
+    max_page_size. Responses are {"next", "previous", "results"}.
+    """
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    ordering = "-id"
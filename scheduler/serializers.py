@@ -1,17 +1,36 @@
 from rest_framework import serializers
-from .models import Judge, Lawyer, Case, Schedule
+from django.utils import timezone
+from .models import Judge, Lawyer, Case, Schedule, PlannerJob, HearingRecord
 
-class JudgeSerializer(serializers.ModelSerializer):
+def requested_fields(request):
+    """Field names from ?fields=a,b on a GET request, or None for all fields."""
+    if request is None or request.method != "GET" or not request.query_params.get("fields"):
+        return None
+    return {name.strip() for name in request.query_params["fields"].split(",") if name.strip()}
+
+class SparseFieldsMixin:
+    """Drops the fields a GET request did not ask for with ?fields=."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = requested_fields(self.context.get("request"))
+        if wanted is not None:
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+class JudgeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Judge
         fields = "__all__"
 
-class LawyerSerializer(serializers.ModelSerializer):
+class LawyerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # Annotated by LawyerViewSet
+    case_count = serializers.IntegerField(read_only=True, default=0)
+
     class Meta:
         model = Lawyer
         fields = "__all__"
 
-class CaseSerializer(serializers.ModelSerializer):
+class CaseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     filed_in = serializers.DateField(input_formats=['%Y-%m-%d'], format='%Y-%m-%d')
     description = serializers.CharField(required=False, allow_blank=True)
     
@@ -23,11 +42,47 @@ class CaseSerializer(serializers.ModelSerializer):
             'estimated_duration': {'required': False, 'read_only': True},
             'priority': {'required': False, 'read_only': True},
             'ai_analysis': {'required': False, 'read_only': True},
+            'analysis_status': {'read_only': True},
             'description': {'required': False},
         }
 
-class ScheduleSerializer(serializers.ModelSerializer):
+class CaseImportSerializer(serializers.Serializer):
+    """
+    One row of a bulk case import (see bulk_analysis.import_cases). Not a
+    ModelSerializer: rows for existing case numbers update the case.
+    """
+    case_number = serializers.CharField(max_length=50)
+    case_type = serializers.ChoiceField(choices=Case.CASE_TYPES)
+    filed_in = serializers.DateField(input_formats=['%Y-%m-%d'])
+    description = serializers.CharField(required=False, allow_blank=True)
+
+class ScheduleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    case_number = serializers.CharField(source="case.case_number", read_only=True)
+    case_type = serializers.CharField(source="case.case_type", read_only=True)
+    judge_name = serializers.CharField(source="judge.name", read_only=True)
+
     class Meta:
         model = Schedule
         fields = "__all__"
 
+class HearingRecordSerializer(serializers.ModelSerializer):
+    actual_minutes = serializers.IntegerField(min_value=1, max_value=24 * 60)
+
+    class Meta:
+        model = HearingRecord
+        fields = "__all__"
+        read_only_fields = ["case", "case_type", "complexity", "scheduled_minutes"]
+
+class PlannerJobSerializer(serializers.ModelSerializer):
+    elapsed_seconds = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PlannerJob
+        fields = ["id", "status", "stage", "objective", "error", "options", "unscheduled",
+                  "created_at", "started_at", "finished_at", "elapsed_seconds"]
+
+    def get_elapsed_seconds(self, job):
+        if not job.started_at:
+            return 0.0
+        end = job.finished_at or timezone.now()
+        return round((end - job.started_at).total_seconds(), 2)
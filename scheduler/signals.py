@@ -0,0 +1,41 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from scheduler.models import Case, Judge, Lawyer, Schedule
+from scheduler.tools import response_cache, search_index
+
+# Keep the search index in step with single-object saves and deletes.
+# Bulk writes bypass signals and reindex explicitly (see bulk_analysis).
+
+@receiver(post_save, sender=Case)
+@receiver(post_save, sender=Judge)
+@receiver(post_save, sender=Lawyer)
+def index_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    kind = search_index.kind_of(sender)
+    if raw or (update_fields is not None and not search_index.FIELDS[kind] & set(update_fields)):
+        return
+    search_index.index_objects(kind, [instance])
+
+@receiver(post_delete, sender=Case)
+@receiver(post_delete, sender=Judge)
+@receiver(post_delete, sender=Lawyer)
+def unindex_deleted(sender, instance, **kwargs):
+    search_index.remove(search_index.kind_of(sender), [instance.pk])
+
+# Cached API responses. Schedule has no post_delete receiver on purpose: one
+# would make Django delete schedules row by row in the planner's bulk
+# deletes, so the planner and ScheduleViewSet bump the version themselves.
+
+@receiver(post_save, sender=Case)
+@receiver(post_save, sender=Judge)
+@receiver(post_save, sender=Lawyer)
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Case)
+@receiver(post_delete, sender=Judge)
+@receiver(post_delete, sender=Lawyer)
+def bump_response_cache(sender, **kwargs):
+    response_cache.bump(response_cache.MODEL_GROUPS[sender])
+
+@receiver(m2m_changed, sender=Case.lawyers.through)
+def bump_case_lawyers(sender, action, **kwargs):
+    if action.startswith("post_"):
+        response_cache.bump("cases", "lawyers")
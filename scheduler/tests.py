@@ -1,3 +1,1448 @@
-from django.test import TestCase
+import contextlib
+import io
+import json
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count, F
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import case_analyzer
+from scheduler.agent import jobs
+from scheduler.agent.jobs import clean_job_options
+from scheduler.agent.planner_agent_v2 import MAX_LAWYER_LOAD, HybridPlannerAgent
+from scheduler.models import (AnalysisCache, Case, HearingRecord, Judge, Lawyer, Notification, PlannerJob, Policy,
+                              Schedule)
+from scheduler.tools import analysis_cache, case_intake, notifier, response_cache, search_index
+from scheduler.tools.bulk_analysis import analyze_queryset, import_cases
+from scheduler.tools.candidate_generator import JUDGE_MISMATCH, candidate_scores, top_k_candidates
+from scheduler.tools.duration_model import fit_duration_table
+from scheduler.tools.embedding_codec import decode_embedding, encode_embedding
+from scheduler.tools.policy_retriever import content_hash, split_paragraphs
+from scheduler.tools.notifier import LocalTransport, RateLimiter, dispatch_pending, enqueue
+from scheduler.tools.vector_index import PolicyIndex
 
-# Create your tests here.
+
+class FailingTransport(LocalTransport):
+    """LocalTransport that refuses one phone number."""
+    def __init__(self, bad_number):
+        super().__init__()
+        self.bad_number = bad_number
+
+    def send(self, phone_number, body):
+        if phone_number == self.bad_number:
+            raise ConnectionError("carrier unavailable")
+        return super().send(phone_number, body)
+
+
+class NotificationOutboxTests(TestCase):
+    def test_enqueue_drops_items_without_phone_number(self):
+        queued = enqueue([
+            ("+911111111111", "Judge A", "Case C-1 on 2026-10-19 10:00 at High Court."),
+            ("", "Lawyer B", "Case C-1 on 2026-10-19 10:00 at High Court."),
+            (None, "Lawyer C", "Case C-2 on 2026-10-19 11:00 at High Court."),
+        ])
+        self.assertEqual(queued, 1)
+        self.assertEqual(Notification.objects.filter(status="pending").count(), 1)
+
+    def test_one_digest_per_recipient(self):
+        enqueue([("+911111111111", "Judge A", f"Case C-{i}.") for i in range(8)]
+                + [("+922222222222", "Lawyer B", "Case C-0.")])
+        transport = LocalTransport()
+
+        stats = dispatch_pending(transport=transport, workers=2, rate=0)
+
+        self.assertEqual(stats, {"recipients": 2, "messages": 9, "sent": 2, "failed": 0})
+        sent = dict(transport.sent)
+        self.assertEqual(len(transport.sent), 2)
+        self.assertTrue(sent["+911111111111"].startswith("Judge A: 8 new hearings scheduled:"))
+        self.assertEqual(sent["+911111111111"].count("\n- "), 8)
+        self.assertEqual(sent["+922222222222"], "Lawyer B: New Schedule: Case C-0.")
+        self.assertFalse(Notification.objects.exclude(status="sent").exists())
+        self.assertEqual(dispatch_pending(transport=transport, rate=0)["recipients"], 0)
+
+    def test_failed_sends_are_retried_then_marked_failed(self):
+        enqueue([("+911111111111", "Judge A", "Case C-1."), ("+922222222222", "Lawyer B", "Case C-1.")])
+        transport = FailingTransport("+922222222222")
+
+        for attempt in range(1, notifier.MAX_ATTEMPTS + 1):
+            stats = dispatch_pending(transport=transport, rate=0)
+            failing = Notification.objects.get(phone_number="+922222222222")
+            self.assertEqual(failing.attempts, attempt)
+            self.assertEqual(failing.error, "carrier unavailable")
+            expected = "failed" if attempt == notifier.MAX_ATTEMPTS else "pending"
+            self.assertEqual(failing.status, expected)
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual([phone for phone, _ in transport.sent], ["+911111111111"])
+        self.assertEqual(dispatch_pending(transport=transport, rate=0)["recipients"], 0)
+
+    def test_claimed_rows_are_not_sent_by_a_second_worker(self):
+        enqueue([("+911111111111", "Judge A", "Case C-1."), ("+922222222222", "Lawyer B", "Case C-1.")])
+        token, claimed = notifier._claim()
+        self.assertEqual(len(claimed), 2)
+
+        # A second worker polling while the first is still sending
+        self.assertEqual(notifier._claim()[1], [])
+        transport = LocalTransport()
+        self.assertEqual(dispatch_pending(transport=transport, rate=0)["recipients"], 0)
+        self.assertEqual(transport.sent, [])
+        self.assertEqual(set(Notification.objects.values_list("status", "claim")), {("sending", token)})
+
+    def test_sent_and_retried_rows_release_their_claim(self):
+        enqueue([("+911111111111", "Judge A", "Case C-1."), ("+922222222222", "Lawyer B", "Case C-1.")])
+        dispatch_pending(transport=FailingTransport("+922222222222"), rate=0)
+        self.assertEqual(set(Notification.objects.values_list("phone_number", "status", "claim")),
+                         {("+911111111111", "sent", ""), ("+922222222222", "pending", "")})
+
+    def test_rows_of_a_crashed_worker_are_reclaimed_after_the_timeout(self):
+        enqueue([("+911111111111", "Judge A", "Case C-1."), ("+922222222222", "Lawyer B", "Case C-1.")])
+        now = timezone.now()
+        Notification.objects.filter(phone_number="+911111111111").update(
+            status="sending", claim="dead", claimed_at=now - timedelta(seconds=settings.SMS_CLAIM_TIMEOUT + 1))
+        Notification.objects.filter(phone_number="+922222222222").update(
+            status="sending", claim="busy", claimed_at=now)
+        transport = LocalTransport()
+
+        stats = dispatch_pending(transport=transport, rate=0)
+
+        self.assertEqual(stats["sent"], 1)
+        self.assertEqual([phone for phone, _ in transport.sent], ["+911111111111"])
+        self.assertEqual(Notification.objects.get(phone_number="+922222222222").status, "sending")
+
+    def test_rate_limiter_spaces_sends(self):
+        enqueue([(f"+9100000000{i:02d}", f"Judge {i}", "Case C-1.") for i in range(5)])
+        start = time.monotonic()
+        stats = dispatch_pending(transport=LocalTransport(), workers=5, rate=20)
+        self.assertEqual(stats["sent"], 5)
+        # Five sends at 20/s need at least four 50 ms gaps, even over five threads
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    def test_rate_limiter_without_rate_does_not_wait(self):
+        limiter = RateLimiter(0)
+        start = time.monotonic()
+        for _ in range(100):
+            limiter.wait()
+        self.assertLess(time.monotonic() - start, 0.05)
+
+
+class RegenerateOptionsTests(TestCase):
+    def test_options_are_coerced(self):
+        options = clean_job_options({"decompose": "true", "horizon_days": "3", "time_budget": "12.5",
+                                     "target_day": "2026-10-19", "top_k_judges": "", "unknown": "x"})
+        self.assertEqual(options, {"decompose": True, "horizon_days": 3, "time_budget": 12.5,
+                                   "target_day": "2026-10-19"})
+
+    def test_bad_options_are_rejected_before_queueing(self):
+        bad = [{"horizon_days": "three"}, {"horizon_days": 0}, {"horizon_days": 2.5}, {"incremental": "maybe"},
+               {"target_day": "19/10/2026"}, {"time_budget": -1}, {"top_k_lawyers": True}]
+        for body in bad:
+            with self.subTest(body=body):
+                response = self.client.post("/api/regenerate/", body, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(body)), response.json()["message"])
+        response = self.client.post("/api/regenerate/", {"horizon_days": "x"})  # form data
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PlannerJob.objects.exists())
+
+
+class PlannerJobLockTests(TestCase):
+    def _job(self, age, heartbeat_age=None):
+        now = timezone.now()
+        job = PlannerJob.objects.create(lock=jobs.LOCK_NAME, status="running")
+        PlannerJob.objects.filter(id=job.id).update(
+            created_at=now - timedelta(seconds=age),
+            heartbeat_at=None if heartbeat_age is None else now - timedelta(seconds=heartbeat_age))
+        return job
+
+    def test_long_run_that_keeps_reporting_keeps_its_lock(self):
+        job = self._job(age=settings.PLANNER_JOB_TIMEOUT * 5, heartbeat_age=5)
+        jobs._expire_stale_jobs()
+        self.assertEqual(PlannerJob.objects.get(id=job.id).lock, jobs.LOCK_NAME)
+
+    def test_silent_jobs_lose_their_lock(self):
+        running = self._job(age=settings.PLANNER_JOB_TIMEOUT * 5, heartbeat_age=settings.PLANNER_JOB_TIMEOUT + 1)
+        jobs._expire_stale_jobs()
+        running.refresh_from_db()
+        self.assertEqual((running.lock, running.status, running.error), (None, "failed", "Timed out"))
+
+        never_started = self._job(age=settings.PLANNER_JOB_TIMEOUT + 1)
+        jobs._expire_stale_jobs()
+        self.assertIsNone(PlannerJob.objects.get(id=never_started.id).lock)
+
+    def test_worker_that_lost_its_lock_does_not_save(self):
+        job = self._job(age=0)
+        saved = []
+
+        def run(agent):
+            agent._report("judges")
+            # Timed out meanwhile, e.g. while a second job was submitted
+            PlannerJob.objects.filter(id=job.id).update(lock=None, status="failed", error="Timed out")
+            agent._report("persist")
+            saved.append(agent)
+
+        with mock.patch.object(jobs, "close_old_connections"), \
+             mock.patch("scheduler.agent.planner_agent_v2.HybridPlannerAgent.run", run):
+            jobs.run_planner_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(saved, [])
+        self.assertEqual(job.status, "failed")
+        self.assertIn("Lost the planner lock before stage 'persist'", job.error)
+        self.assertIsNotNone(job.heartbeat_at)
+
+
+class StubOllama(ThreadingHTTPServer):
+    """
+    Local stand-in for the Ollama server: answers /api/chat after `delay`
+    seconds with a fixed analysis and records the peak number of requests
+    in flight.
+    """
+    daemon_threads = True
+
+    def __init__(self, delay=0.05):
+        super().__init__(("127.0.0.1", 0), StubOllamaHandler)
+        self.delay = delay
+        self.requests = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+        time.sleep(server.delay)
+        analysis = {"urgency": 0.8, "estimated_duration": 95, "complexity": "high", "reasoning": "stub"}
+        body = json.dumps({"model": case_analyzer.OLLAMA_MODEL, "created_at": "2026-01-01T00:00:00Z", "done": True,
+                           "message": {"role": "assistant", "content": json.dumps(analysis)}}).encode()
+        with server.lock:
+            server.in_flight -= 1
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out first, as the budget tests intend
+
+    def log_message(self, *args):
+        pass
+
+
+class BulkAnalysisTests(TestCase):
+    def setUp(self):
+        if not case_analyzer.OLLAMA_AVAILABLE:
+            self.skipTest("ollama is not installed")
+        self.server = StubOllama().__enter__()
+        self.addCleanup(self.server.__exit__)
+        host = f"http://127.0.0.1:{self.server.server_address[1]}"
+        patcher = mock.patch.dict(os.environ, {"OLLAMA_HOST": host})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Clients are cached with the host they were created for
+        case_analyzer._clients.clear()
+        self.addCleanup(case_analyzer._clients.clear)
+
+    def _items(self, n):
+        return [{"case_number": f"BULK-{i}", "case_type": "criminal", "description": f"Bail application number {i}",
+                 "filed_date": date(2026, 1, 1)} for i in range(n)]
+
+    def test_bulk_analysis_is_concurrent_and_bounded(self):
+        results = list(case_analyzer.analyze_cases_bulk(self._items(12), workers=3))
+
+        self.assertEqual(sorted(item["case_number"] for item, _ in results), [f"BULK-{i}" for i in sorted(range(12), key=str)])
+        self.assertTrue(all(analysis["source"] == "ai" and analysis["urgency"] == 0.8 for _, analysis in results))
+        self.assertEqual(self.server.requests, 12)
+        self.assertGreater(self.server.peak, 1)
+        self.assertLessEqual(self.server.peak, 3)
+
+    def test_budget_falls_back_to_rules(self):
+        self.server.delay = 0.5
+        start = time.monotonic()
+        results = list(case_analyzer.analyze_cases_bulk(self._items(6), workers=2, budget=0.2))
+
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertTrue(all(analysis["source"] == "rules" for _, analysis in results))
+
+    def test_analyze_queryset_writes_results_in_batches(self):
+        Case.objects.bulk_create([Case(case_number=item["case_number"], case_type=item["case_type"],
+                                       description=item["description"], filed_in=item["filed_date"])
+                                  for item in self._items(7)])
+        logged = []
+
+        # The analysis cache writes from the pool threads, which the test
+        # transaction would lock out; call the model directly instead
+        with mock.patch("scheduler.tools.bulk_analysis.analyze_case_cached", case_analyzer.analyze_case_with_ai):
+            stats = analyze_queryset(Case.objects.all(), workers=3, batch_size=3, log=logged.append)
+
+        self.assertEqual(stats["analyzed"], 7)
+        self.assertGreater(stats["per_second"], 0)
+        self.assertEqual(len(logged), 3)  # 3 + 3 + 1
+        for case in Case.objects.all():
+            self.assertEqual(case.analysis_status, "done")
+            self.assertEqual(case.ai_analysis["source"], "ai")
+            self.assertEqual(case.estimated_duration, 95)
+
+
+class BulkAnalysisEndpointTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("scheduler.tools.bulk_analysis.submit_bulk_analysis")
+        self.submit = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, body):
+        return self.client.post("/api/cases/analyze/", body, content_type="application/json")
+
+    def test_imports_and_queues_cases(self):
+        rows = [{"case_number": f"API-{i}", "case_type": "civil", "filed_in": f"2026-01-0{i + 1}",
+                 "description": "Property dispute"} for i in range(3)]
+
+        response = self._post({"cases": rows, "workers": 2})
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {"status": "queued", "cases": 3})
+        ids, = self.submit.call_args.args
+        self.assertEqual(sorted(ids), sorted(Case.objects.values_list("id", flat=True)))
+        self.assertEqual(self.submit.call_args.kwargs, {"workers": 2})
+
+    def test_workers_is_validated_and_clamped(self):
+        Case.objects.create(case_number="API-1", case_type="civil", filed_in=date(2026, 1, 1))
+
+        self.assertEqual(self._post({"unanalyzed": True, "workers": "many"}).status_code, 400)
+        self.assertEqual(self._post({"unanalyzed": True, "workers": [4]}).status_code, 400)
+        self.submit.assert_not_called()
+
+        self._post({"unanalyzed": True, "workers": 100000})
+        self.assertEqual(self.submit.call_args.kwargs["workers"], 16)
+        self._post({"unanalyzed": True, "workers": -3})
+        self.assertEqual(self.submit.call_args.kwargs["workers"], 1)
+
+    def test_bad_rows_and_empty_requests_are_rejected(self):
+        self.assertEqual(self._post({"cases": [{"case_type": "civil"}]}).status_code, 400)
+        bad_date = {"case_number": "API-9", "case_type": "civil", "filed_in": "someday"}
+        self.assertEqual(self._post({"cases": [bad_date]}).status_code, 400)
+        self.assertEqual(self._post({}).status_code, 400)
+        self.submit.assert_not_called()
+
+    def test_duplicate_and_unknown_type_rows_write_nothing(self):
+        Case.objects.create(case_number="API-0", case_type="civil", filed_in=date(2026, 1, 1), description="Old")
+        good = {"case_number": "API-1", "case_type": "family", "filed_in": "2026-01-02"}
+        cases = {
+            "duplicate": [good, {"case_number": "API-2", "case_type": "civil", "filed_in": "2026-01-03"}, good],
+            "unknown type": [good, {"case_number": "API-3", "case_type": "tax", "filed_in": "2026-01-03"}],
+            "not an object": [good, "API-4"],
+        }
+        for name, rows in cases.items():
+            with self.subTest(name):
+                response = self._post({"cases": rows + [{"case_number": "API-0", "case_type": "other",
+                                                         "filed_in": "2026-01-01"}]})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(f"row {len(rows)}:", response.json()["error"])
+                self.assertEqual(list(Case.objects.values_list("case_number", "case_type")), [("API-0", "civil")])
+        self.submit.assert_not_called()
+
+    def test_existing_cases_are_updated_not_duplicated(self):
+        Case.objects.create(case_number="API-0", case_type="civil", filed_in=date(2026, 1, 1), description="Old")
+        response = self._post({"cases": [{"case_number": "API-0", "case_type": "family", "filed_in": "2026-01-01"}]})
+        self.assertEqual(response.status_code, 202)
+        case = Case.objects.get()
+        self.assertEqual((case.case_type, case.description), ("family", "Old"))
+
+
+class CaseIntakeTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("scheduler.views.queue_analysis")
+        self.queue = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _analysed_case(self, filed_in):
+        analysis = {"urgency": 0.4, "estimated_duration": 45}
+        return Case.objects.create(case_number="INT-1", case_type="civil", filed_in=filed_in, description="Fence",
+                                   urgency=0.4, ai_analysis=analysis, analysis_status="done",
+                                   priority=case_analyzer.calculate_ai_priority(
+                                       Case(case_type="civil", filed_in=filed_in), analysis))
+
+    def test_filed_in_edit_recomputes_priority_without_llm(self):
+        case = self._analysed_case(date.today())
+
+        response = self.client.patch(f"/api/cases/{case.id}/", {"filed_in": str(date.today() - timedelta(days=365))},
+                                     content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        case.refresh_from_db()
+        self.assertEqual(case.priority, round(0.7 * 0.4 + 0.15 + 0.15 * 0.7, 3))
+        self.assertEqual(case.analysis_status, "done")
+        self.queue.assert_not_called()
+
+    def test_use_ai_is_parsed_as_a_boolean(self):
+        row = {"case_number": "INT-2", "case_type": "civil", "filed_in": "2026-01-05", "description": "Fence"}
+
+        response = self.client.post("/api/cases/", {**row, "use_ai": "false"})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Case.objects.get(case_number="INT-2").analysis_status, "done")
+        self.queue.assert_not_called()
+
+        response = self.client.post("/api/cases/", {**row, "case_number": "INT-3", "use_ai": "sometimes"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("use_ai", response.json())
+        self.assertFalse(Case.objects.filter(case_number="INT-3").exists())
+
+        self.client.post("/api/cases/", {**row, "case_number": "INT-4", "use_ai": "true"})
+        self.assertEqual(Case.objects.get(case_number="INT-4").analysis_status, "pending")
+        self.queue.assert_called_once()
+
+
+class CaseUpgradeTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("scheduler.tools.case_intake.analyze_case_cached")
+        self.analyze = patcher.start()
+        self.addCleanup(patcher.stop)
+        log = tempfile.NamedTemporaryFile(delete=False)
+        log.close()
+        self.addCleanup(os.unlink, log.name)
+        patcher = mock.patch.object(case_intake, "LOG_PATH", log.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.case = Case.objects.create(case_number="UP-1", case_type="civil", filed_in=date.today(),
+                                        description="Fence", analysis_status="pending")
+
+    def _status(self):
+        return Case.objects.values_list("analysis_status", flat=True).get(pk=self.case.id)
+
+    def test_pending_case_runs_then_stores_the_analysis(self):
+        seen = []
+        def analyze(**kwargs):
+            seen.append(self._status())
+            return {"urgency": 0.9, "estimated_duration": 90}
+        self.analyze.side_effect = analyze
+
+        case_intake.upgrade_case(self.case.id)
+
+        self.assertEqual(seen, ["running"])
+        self.case.refresh_from_db()
+        self.assertEqual((self.case.analysis_status, self.case.urgency, self.case.estimated_duration),
+                         ("done", 0.9, 90))
+        self.assertEqual(self.case.priority, round(0.7 * 0.9 + 0.15 * 0.7, 3))
+
+    def test_queue_analysis_submits_after_commit(self):
+        self.analyze.return_value = {"urgency": 0.9, "estimated_duration": 90}
+        pool = mock.Mock()
+        pool.submit.side_effect = lambda fn, *args: fn(*args)
+
+        with mock.patch.object(case_intake, "_get_pool", return_value=pool):
+            with self.captureOnCommitCallbacks(execute=True):
+                case_intake.queue_analysis(self.case.id)
+                pool.submit.assert_not_called()
+
+        self.assertEqual(self._status(), "done")
+
+    def test_failed_analysis_marks_the_case_failed(self):
+        self.analyze.side_effect = RuntimeError("ollama down")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            case_intake.upgrade_case(self.case.id)
+
+        self.assertEqual(self._status(), "failed")
+
+    def test_edit_during_analysis_discards_the_result(self):
+        def analyze(**kwargs):
+            Case.objects.filter(pk=self.case.id).update(description="Boundary wall", analysis_status="pending")
+            return {"urgency": 0.9, "estimated_duration": 90}
+        self.analyze.side_effect = analyze
+
+        case_intake.upgrade_case(self.case.id)
+
+        self.case.refresh_from_db()
+        self.assertEqual((self.case.analysis_status, self.case.ai_analysis), ("pending", {}))
+
+    def test_only_pending_cases_are_picked_up(self):
+        Case.objects.filter(pk=self.case.id).update(analysis_status="running")
+
+        case_intake.upgrade_case(self.case.id)
+
+        self.analyze.assert_not_called()
+        self.assertEqual(self._status(), "running")
+
+
+class RuleBasedAnalysisTests(TestCase):
+    # (case_type, description, (urgency, duration, complexity)) on DEFAULT_RULES
+    UNCHANGED = [
+        ("criminal", "Bail application after arrest; urgent hearing sought", (1.0, 90, "medium")),
+        ("criminal", "Murder trial with 3 witnesses and forensic evidence", (1.0, 225, "high")),
+        ("civil", "Simple uncontested procedural matter, brief hearing", (0.45, 30, "low")),
+        ("family", "Divorce with child custody dispute, extensive evidence", (0.85, 110, "medium")),
+        ("civil", "Complexity of the appeal, multiple parties", (0.45, 105, "high")),
+        ("other", "Traffic challan, quick summary hearing", (0.35, 30, "low")),
+    ]
+    # Keywords must start a word; the old substring scan gave the second value
+    CHANGED = [
+        ("civil", "Property dispute over a grape vineyard", (0.45, 75, "medium"), (0.8, 120, "high")),  # "rape"
+        ("other", "Endangered species permit renewal", (0.35, 45, "medium"), (0.6, 45, "medium")),  # "danger"
+        ("civil", "Disagreed terms in a non-emergency lease", (0.8, 60, "medium"), (0.8, 45, "low")),  # "agreed"
+    ]
+
+    def _matchers(self):
+        self.addCleanup(case_analyzer.load_rules)
+        for automaton in [True, False] if case_analyzer.AHOCORASICK_AVAILABLE else [False]:
+            with mock.patch.object(case_analyzer, "AHOCORASICK_AVAILABLE", automaton):
+                case_analyzer.load_rules()
+            with self.subTest(automaton=automaton):
+                yield
+
+    def _analyze(self, case_type, description):
+        result = case_analyzer.analyze_case_rule_based(case_type, description)
+        return result["urgency"], result["estimated_duration"], result["complexity"]
+
+    def test_default_tables_keep_their_results(self):
+        for _ in self._matchers():
+            for case_type, description, expected in self.UNCHANGED:
+                self.assertEqual(self._analyze(case_type, description), expected, description)
+
+    def test_keywords_only_match_at_word_starts(self):
+        for _ in self._matchers():
+            for case_type, description, expected, _substring in self.CHANGED:
+                self.assertEqual(self._analyze(case_type, description), expected, description)
+
+    def test_rule_overrides_are_loaded_from_json(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as fh:
+            json.dump({"critical_keywords": {"Eviction": 0.4}}, fh)
+        self.addCleanup(os.unlink, fh.name)
+        self.addCleanup(case_analyzer.load_rules)
+
+        case_analyzer.load_rules(fh.name)
+
+        self.assertEqual(self._analyze("civil", "Eviction notice")[0], 0.85)
+        self.assertEqual(self._analyze("criminal", "Bail plea")[0], 0.75)
+        with open(fh.name, "w") as out:
+            json.dump({"critical_keyword": {}}, out)
+        with self.assertRaises(ValueError):
+            case_analyzer.load_rules(fh.name)
+
+
+class AnalysisCacheTests(TestCase):
+    def setUp(self):
+        analysis = {"urgency": 0.5, "estimated_duration": 60, "complexity": "low", "reasoning": "", "source": "ai"}
+        patcher = mock.patch.object(case_analyzer, "analyze_case_with_ai", return_value=analysis)
+        self.model = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _analyze(self, description):
+        return analysis_cache.analyze_case_cached("C-1", "civil", description, date(2026, 1, 1))
+
+    def test_repeated_description_is_a_hit(self):
+        self._analyze("Boundary  dispute")
+        self._analyze("boundary dispute")
+        self.assertEqual(self.model.call_count, 1)
+        self.assertEqual(AnalysisCache.objects.get().hits, 1)
+
+    @override_settings(ANALYSIS_CACHE_MAX_ENTRIES=3)
+    def test_eviction_follows_inserts_not_misses(self):
+        with mock.patch.object(analysis_cache, "EVICT_EVERY", 5), mock.patch.object(analysis_cache, "_inserts", 0):
+            for i in range(10):
+                self._analyze(f"Dispute {i}")
+                self._analyze(f"Dispute {i}")  # hits in between don't shift the schedule
+                if i % 3 == 0:
+                    self.model.return_value = dict(self.model.return_value, source="rules")
+                    self._analyze("Not cached")  # a miss that stores nothing
+                    self.model.return_value = dict(self.model.return_value, source="ai")
+                self.assertLessEqual(AnalysisCache.objects.count(), 3 + 4)
+        self.assertEqual(AnalysisCache.objects.count(), 3)
+
+
+class OllamaClientCacheTests(TestCase):
+    def setUp(self):
+        if not case_analyzer.OLLAMA_AVAILABLE:
+            self.skipTest("ollama is not installed")
+        case_analyzer._clients.clear()
+        self.addCleanup(case_analyzer._clients.clear)
+
+    def test_deadline_timeouts_share_clients(self):
+        first = case_analyzer._get_client(4.2)
+        self.assertIs(case_analyzer._get_client(4.9), first)
+        self.assertIs(case_analyzer._get_client(4), first)
+        self.assertEqual(case_analyzer._get_client(0.25)._client.timeout.read, 0.2)
+        for i in range(200):
+            case_analyzer._get_client(1 + i * 0.37)
+        self.assertLessEqual(len(case_analyzer._clients), case_analyzer.MAX_CLIENTS)
+
+
+class DurationFittingTests(TestCase):
+    def setUp(self):
+        self.case = Case.objects.create(case_number="D-1", case_type="civil", filed_in=date(2026, 1, 1),
+                                        ai_analysis={"complexity": "high"})
+        self.judge = Judge.objects.create(name="Judge D", court="District Court")
+        start = timezone.make_aware(datetime(2026, 10, 19, 10, 0))
+        self.schedule = Schedule.objects.create(case=self.case, judge=self.judge, start_time=start,
+                                                end_time=start + timedelta(minutes=60))
+
+    def test_recording_a_hearing_snapshots_the_case(self):
+        response = self.client.post(f"/api/schedules/{self.schedule.id}/record/", {"actual_minutes": 95},
+                                    content_type="application/json")
+
+        self.assertEqual(response.status_code, 201)
+        record = HearingRecord.objects.get()
+        self.assertEqual((record.case_type, record.complexity, record.heard_on, record.scheduled_minutes,
+                          record.actual_minutes), ("civil", "high", date(2026, 10, 19), 60, 95))
+        self.case.delete()
+        self.assertEqual(HearingRecord.objects.get().case_type, "civil")
+
+    def test_recording_rejects_bad_minutes(self):
+        for minutes in (None, 0, "long"):
+            response = self.client.post(f"/api/schedules/{self.schedule.id}/record/", {"actual_minutes": minutes},
+                                        content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(HearingRecord.objects.exists())
+
+    def test_fit_uses_actual_lengths_not_planned_schedules(self):
+        HearingRecord.objects.bulk_create(
+            [HearingRecord(case_type="civil", complexity="high", heard_on=date(2026, 10, 1), actual_minutes=m)
+             for m in (80, 90, 100, 110, 120)]
+            + [HearingRecord(case_type="civil", complexity="", heard_on=date(2026, 10, 1), actual_minutes=40)])
+
+        table = fit_duration_table(HearingRecord.objects.all(), min_samples=5)
+
+        self.assertEqual(table["samples"], 6)
+        self.assertEqual(table["by_type_complexity"], {"civil:high": 100})  # civil:medium has one sample
+        self.assertEqual(table["by_type"], {"civil": 95})
+
+
+class HorizonPlanningTests(TestCase):
+    SUNDAY = date(2026, 10, 18)
+
+    def setUp(self):
+        # Policy retrieval needs the embedding model and does not affect placement
+        patcher = mock.patch("scheduler.agent.planner_agent_v2.retrieve_policies", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.judges = [Judge.objects.create(name=f"Judge {i}", court="District Court", specialization="general",
+                                            max_daily_cases=4) for i in range(2)]
+        for i in range(4):
+            Lawyer.objects.create(name=f"Lawyer {i}", specialization="general", max_cases=10)
+        self.cases = [Case.objects.create(case_number=f"H-{i}", case_type=("civil", "criminal")[i % 2],
+                                          filed_in=date(2026, 1, 1) + timedelta(days=i), urgency=0.5,
+                                          estimated_duration=45)
+                      for i in range(12)]
+
+    def _hearings_per_case(self):
+        return dict(Schedule.objects.values_list("case_id").annotate(n=Count("id")))
+
+    def test_horizon_from_a_non_sitting_day_replaces_its_schedule(self):
+        # An earlier single-day plan for the Sunday
+        start = timezone.make_aware(datetime.combine(self.SUNDAY, datetime.min.time()) + timedelta(hours=10))
+        for i, case in enumerate(self.cases[:6]):
+            Schedule.objects.create(case=case, judge=self.judges[i % 2], start_time=start + timedelta(hours=i),
+                                    end_time=start + timedelta(hours=i, minutes=45))
+
+        HybridPlannerAgent(target_day=self.SUNDAY, horizon_days=3).run()
+
+        self.assertGreater(Schedule.objects.count(), 0)
+        self.assertEqual(max(self._hearings_per_case().values()), 1)
+        sunday_start, monday_start = (timezone.make_aware(datetime.combine(d, datetime.min.time()))
+                                      for d in (self.SUNDAY, self.SUNDAY + timedelta(days=1)))
+        self.assertFalse(Schedule.objects.filter(start_time__gte=sunday_start, start_time__lt=monday_start).exists())
+
+    def test_frozen_days_are_kept(self):
+        HybridPlannerAgent(target_day=self.SUNDAY, horizon_days=2).run()
+        monday = self.SUNDAY + timedelta(days=1)
+        monday_rows = set(Schedule.objects.filter(start_time__date=monday).values_list("id", flat=True))
+        self.assertTrue(monday_rows)
+
+        HybridPlannerAgent(target_day=self.SUNDAY, horizon_days=3, freeze_days=1).run()
+
+        self.assertTrue(monday_rows <= set(Schedule.objects.values_list("id", flat=True)))
+        self.assertEqual(max(self._hearings_per_case().values()), 1)
+
+    def test_single_day_run_only_replaces_its_day(self):
+        monday = date.today() + timedelta(days=7 - date.today().weekday())
+        with contextlib.redirect_stdout(io.StringIO()):
+            HybridPlannerAgent(target_day=monday, horizon_days=2).run()
+        tuesday_rows = set(Schedule.objects.filter(start_time__date=monday + timedelta(days=1))
+                           .values_list("id", flat=True))
+        self.assertTrue(tuesday_rows)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            HybridPlannerAgent(target_day=monday).run()
+
+        self.assertTrue(tuesday_rows <= set(Schedule.objects.values_list("id", flat=True)))
+        self.assertTrue(Schedule.objects.filter(start_time__date=monday).exists())
+        self.assertEqual(max(self._hearings_per_case().values()), 1)
+
+
+class TimelineTests(TestCase):
+    MONDAY = date(2026, 10, 19)
+
+    def setUp(self):
+        patcher = mock.patch("scheduler.agent.planner_agent_v2.retrieve_policies", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _cases(self, n):
+        # The planner re-estimates durations (civil: about 70 minutes)
+        return [Case.objects.create(case_number=f"T-{i}", case_type="civil",
+                                    filed_in=date(2026, 1, 1) + timedelta(days=i), urgency=0.5) for i in range(n)]
+
+    def _plan(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            HybridPlannerAgent(target_day=self.MONDAY, **kwargs).run()
+        lawyers = dict(Case.lawyers.through.objects.values_list("case_id", "lawyer_id"))
+        return [(row.judge_id, lawyers[row.case_id], timezone.localtime(row.start_time).replace(tzinfo=None),
+                 timezone.localtime(row.end_time).replace(tzinfo=None)) for row in Schedule.objects.all()]
+
+    def _at(self, hhmm):
+        return datetime.combine(self.MONDAY, datetime.strptime(hhmm, "%H:%M").time())
+
+    def assertNoOverlap(self, spans):
+        spans = sorted(spans)
+        for (_, end), (start, _) in zip(spans, spans[1:]):
+            self.assertLessEqual(end, start)
+
+    def test_one_lawyer_serves_two_courtrooms_at_different_times(self):
+        for i in range(2):
+            Judge.objects.create(name=f"Civil {i}", court="District Court", specialization="civil", max_daily_cases=1)
+        lawyer = Lawyer.objects.create(name="Only Lawyer", specialization="civil")
+        self._cases(2)
+
+        hearings = self._plan()
+
+        self.assertEqual(len(hearings), 2)
+        self.assertEqual({l for _, l, _, _ in hearings}, {lawyer.id})
+        self.assertNoOverlap([(s, e) for _, _, s, e in hearings])
+
+    def test_hearings_fit_windows_without_overlap(self):
+        judges = [Judge.objects.create(name="Morning", court="District Court", specialization="general",
+                                       availability=[{"day": "Monday", "start": "10:00", "end": "13:00"}]),
+                  Judge.objects.create(name="Afternoon", court="District Court", specialization="general",
+                                       availability=[{"day": "Monday", "start": "14:00", "end": "17:00"}])]
+        for i in range(2):
+            Lawyer.objects.create(name=f"Lawyer {i}", specialization="general")
+        self._cases(4)
+
+        hearings = self._plan()
+
+        self.assertEqual(len(hearings), 4)
+        windows = {judges[0].id: (self._at("10:00"), self._at("13:00")),
+                   judges[1].id: (self._at("14:00"), self._at("17:00"))}
+        for judge_id, _, start, end in hearings:
+            self.assertTrue(windows[judge_id][0] <= start and end <= windows[judge_id][1])
+        for key in (0, 1):
+            by_resource = defaultdict(list)
+            for hearing in hearings:
+                by_resource[hearing[key]].append(hearing[2:])
+            for spans in by_resource.values():
+                self.assertNoOverlap(spans)
+
+    def test_lawyer_busy_slots_are_honoured(self):
+        Judge.objects.create(name="Judge", court="District Court", specialization="general")
+        Lawyer.objects.create(name="Busy Morning", specialization="general",
+                              busy_slots=[{"day": "Monday", "start": "10:00", "end": "14:00"}])
+        self._cases(2)
+
+        hearings = self._plan()
+
+        self.assertEqual(len(hearings), 2)
+        for _, _, start, _ in hearings:
+            self.assertGreaterEqual(start, self._at("14:00"))
+
+    def test_max_daily_cases_caps_each_judge(self):
+        judge = Judge.objects.create(name="Judge", court="District Court", specialization="general",
+                                     max_daily_cases=2)
+        for i in range(3):
+            Lawyer.objects.create(name=f"Lawyer {i}", specialization="general")
+        self._cases(5)
+
+        hearings = self._plan()
+
+        self.assertEqual([j for j, _, _, _ in hearings], [judge.id, judge.id])
+
+
+class RepairLoopTests(TestCase):
+    MONDAY = date(2026, 10, 19)
+
+    def setUp(self):
+        patcher = mock.patch("scheduler.agent.planner_agent_v2.retrieve_policies", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _case(self, number, case_type="civil"):
+        return Case.objects.create(case_number=number, case_type=case_type, filed_in=date(2026, 1, 1), urgency=0.5)
+
+    def _run(self):
+        agent = HybridPlannerAgent(target_day=self.MONDAY)
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.run()
+        return agent, {c.case_number: reason for c, reason in agent.unscheduled}
+
+    def _busy_specialist_day(self):
+        self.judge = Judge.objects.create(name="Civil", court="District Court", specialization="civil",
+                                          max_daily_cases=1)
+        Lawyer.objects.create(name="Busy Specialist", specialization="civil",
+                              busy_slots=[{"day": "Monday", "start": "10:00", "end": "17:00"}])
+        self.free = Lawyer.objects.create(name="Free Generalist", specialization="general")
+        self.civil, self.other = self._case("R-A"), self._case("R-B", "other")
+
+    def test_busy_lawyer_is_ruled_out_not_the_judge(self):
+        self._busy_specialist_day()
+
+        _, reasons = self._run()
+
+        row = Schedule.objects.get()
+        self.assertEqual((row.case_id, row.judge_id), (self.civil.id, self.judge.id))
+        self.assertEqual(list(self.civil.lawyers.all()), [self.free])
+        self.assertEqual(reasons, {"R-B": "no judge capacity"})
+
+    def test_judge_without_room_is_ruled_out(self):
+        Judge.objects.create(name="Short Sitting", court="District Court", specialization="civil",
+                             availability=[{"day": "Monday", "start": "10:00", "end": "10:30"}])
+        general = Judge.objects.create(name="Full Day", court="District Court", specialization="general")
+        Lawyer.objects.create(name="Lawyer", specialization="civil")
+        case = self._case("R-C")
+
+        _, reasons = self._run()
+
+        self.assertEqual(reasons, {})
+        self.assertEqual(Schedule.objects.get(case=case).judge_id, general.id)
+
+    def test_lawyer_shortage_is_reported(self):
+        for i in range(2):
+            Judge.objects.create(name=f"Judge {i}", court="District Court", specialization="general")
+        Lawyer.objects.create(name="Only Lawyer", specialization="general")
+        for i in range(MAX_LAWYER_LOAD + 1):
+            self._case(f"R-{i}")
+
+        _, reasons = self._run()
+
+        self.assertEqual(Schedule.objects.count(), MAX_LAWYER_LOAD)
+        self.assertEqual(list(reasons.values()), ["no lawyer available"])
+
+    def test_spent_time_budget_stops_the_repair(self):
+        self._busy_specialist_day()
+
+        with mock.patch.object(HybridPlannerAgent, "_out_of_time", return_value=True):
+            agent, reasons = self._run()
+
+        self.assertFalse(Schedule.objects.exists())
+        self.assertEqual(reasons, {"R-A": "lawyer busy in sitting hours", "R-B": "no judge capacity"})
+        self.assertEqual(agent.lawyer_tabu, {(self.civil.id, Lawyer.objects.get(name="Busy Specialist").id)})
+
+
+class PruningGapTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("scheduler.agent.planner_agent_v2.retrieve_policies", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        Judge.objects.create(name="Civil Judge", court="District Court", specialization="civil", max_daily_cases=3)
+        Judge.objects.create(name="General Judge", court="District Court", specialization="general",
+                             max_daily_cases=6)
+        Lawyer.objects.create(name="Lawyer", specialization="civil", max_cases=10)
+        for i in range(8):
+            Case.objects.create(case_number=f"G-{i}", case_type="civil", filed_in=date(2026, 1, 1) + timedelta(days=i),
+                                urgency=0.5, estimated_duration=30)
+
+    def test_gap_compares_solver_objectives_and_reports_placed_counts(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            # Top-1 sends every case to the civil specialist, who only has three seats
+            HybridPlannerAgent(target_day=date(2026, 10, 19), top_k_judges=1).run()
+
+        report = re.search(r"Stage 1: pruned objective (-?\d+) vs full (-?\d+) \(gap (-?[\d.]+)%\), "
+                           r"placed (\d+) vs (\d+)\.", out.getvalue())
+        self.assertIsNotNone(report, out.getvalue())
+        pruned, full, gap, pruned_placed, full_placed = report.groups()
+        self.assertLess(int(pruned_placed), int(full_placed))
+        # The full model is a relaxation of the pruned one
+        self.assertGreaterEqual(int(full), int(pruned))
+        self.assertGreaterEqual(float(gap), 0)
+
+
+class ObserveQueryTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("scheduler.agent.planner_agent_v2.retrieve_policies", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        judges = [Judge.objects.create(name=f"Judge {i}", court="District Court", specialization=spec)
+                  for i, spec in enumerate(("civil", "criminal", "general"))]
+        for i in range(30):
+            Case.objects.create(case_number=f"Q-{i}", case_type=("civil", "criminal")[i % 2],
+                                filed_in=date(2026, 1, 1), urgency=0.5, assigned_judge=judges[i % 3],
+                                ai_analysis={"complexity": "low"})
+
+    def test_top_k_candidates_read_no_deferred_fields(self):
+        agent = HybridPlannerAgent(target_day=date(2026, 10, 19), top_k_judges=1)
+        agent.observe()
+        with CaptureQueriesContext(connection) as queries:
+            candidates = agent._judge_candidates(agent.cases, agent.judges)
+        self.assertEqual(len(candidates), 30)
+        self.assertEqual(len(queries), 0, [q["sql"] for q in queries])
+
+
+@override_settings(RESPONSE_CACHE="off")
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.judge = Judge.objects.create(name="Krishnamurthy Rao", court="High Court", specialization="civil")
+        self.lawyer = Lawyer.objects.create(name="José Iyer", specialization="civil")
+        self.bail = Case.objects.create(case_number="BAIL-7", case_type="criminal", filed_in=date(2026, 1, 1),
+                                        description="Second application after arrest")
+        self.fence = Case.objects.create(case_number="C-1", case_type="civil", filed_in=date(2026, 1, 2),
+                                         description="Fence dispute; bail not sought")
+
+    def _titles(self, q, kind=None):
+        rows, _ = search_index.search(q, kind)
+        return [row["title"] for row in rows]
+
+    def test_words_match_as_prefixes(self):
+        self.assertEqual(self._titles("krish ra"), ["Krishnamurthy Rao"])
+        self.assertEqual(self._titles("krishnamurt"), ["Krishnamurthy Rao"])
+        self.assertEqual(self._titles("krishnamx"), [])
+        self.assertEqual(self._titles("jose"), ["José Iyer"])
+        self.assertEqual(self._titles("rao arrest"), [])
+
+    def test_titles_rank_first_and_type_filters(self):
+        rows, ranked = search_index.search("bail")
+        self.assertTrue(ranked)
+        self.assertEqual([row["title"] for row in rows], ["BAIL-7", "C-1"])
+        self.assertIn("[bail]", rows[1]["snippet"])
+
+        self.assertEqual(self._titles("civil", "lawyer"), ["José Iyer"])
+        self.assertEqual(self._titles("civil", "judge"), ["Krishnamurthy Rao"])
+        self.assertEqual(self.client.get("/api/search/?q=civil&type=court").status_code, 400)
+        self.assertEqual({row["type"] for row in self.client.get("/api/search/?q=civil").json()["results"]},
+                         {"judge", "lawyer"})
+
+    def test_broad_queries_come_back_newest_first(self):
+        with mock.patch.object(search_index, "RANK_LIMIT", 1):
+            rows, ranked = search_index.search("bail")
+        self.assertFalse(ranked)
+        self.assertEqual([row["title"] for row in rows], ["C-1", "BAIL-7"])
+
+    def test_saves_and_deletes_keep_the_index_in_step(self):
+        self.judge.name = "Meena Pillai"
+        self.judge.save()
+        self.assertEqual(self._titles("krish"), [])
+        self.assertEqual(self._titles("meena"), ["Meena Pillai"])
+
+        self.fence.delete()
+        self.assertEqual(self._titles("fence"), [])
+
+    def test_case_list_q_filter(self):
+        response = self.client.get("/api/cases/?q=fence")
+        self.assertEqual([row["case_number"] for row in response.json()["results"]], ["C-1"])
+        response = self.client.get("/api/cases/?q=arrest&case_type=civil")
+        self.assertEqual(response.json()["results"], [])
+
+    def test_imported_cases_are_indexed(self):
+        import_cases([{"case_number": "IMP-1", "case_type": "family", "filed_in": "2026-02-01",
+                       "description": "Guardianship petition"}])
+        self.assertEqual(self._titles("guardian"), ["IMP-1"])
+
+        import_cases([{"case_number": "IMP-1", "case_type": "family", "filed_in": "2026-02-01",
+                       "description": "Maintenance claim"}])
+        self.assertEqual(self._titles("guardian"), [])
+        self.assertEqual(self._titles("mainten"), ["IMP-1"])
+
+
+@override_settings(RESPONSE_CACHE="off")
+class ListEndpointTests(TestCase):
+    def setUp(self):
+        self.judge = Judge.objects.create(name="Judge Rao", court="District Court", specialization="civil")
+        self.lawyer = Lawyer.objects.create(name="Lawyer Iyer", specialization="civil")
+
+    def _add_cases(self, n, start=0):
+        start_time = timezone.make_aware(datetime(2026, 10, 19, 10))
+        for i in range(start, start + n):
+            case = Case.objects.create(case_number=f"L-{i}", case_type="civil", filed_in=date(2026, 1, 1) + timedelta(days=i),
+                                       description="Long description " * 20, assigned_judge=self.judge)
+            case.lawyers.add(self.lawyer)
+            Schedule.objects.create(case=case, judge=self.judge, start_time=start_time + timedelta(hours=i),
+                                    end_time=start_time + timedelta(hours=i, minutes=45))
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), [q["sql"] for q in queries]
+
+    def test_cursor_pages_walk_the_whole_list(self):
+        self._add_cases(5)
+
+        seen, url = [], "/api/cases/?page_size=2"
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page["results"]), 2)
+            seen.extend(row["case_number"] for row in page["results"])
+            url = page["next"]
+
+        self.assertEqual(seen, [f"L-{i}" for i in range(4, -1, -1)])
+        ordered = self.client.get("/api/cases/?ordering=filed_in&page_size=2").json()
+        self.assertEqual([row["case_number"] for row in ordered["results"]], ["L-0", "L-1"])
+
+    def test_filters_narrow_the_list_and_bad_values_are_400(self):
+        self._add_cases(3)
+        Case.objects.filter(case_number="L-0").update(is_resolved=True)
+
+        open_cases = self.client.get("/api/cases/?is_resolved=false").json()["results"]
+        self.assertEqual({row["case_number"] for row in open_cases}, {"L-1", "L-2"})
+        filed = self.client.get("/api/cases/?filed_after=2026-01-02").json()["results"]
+        self.assertEqual({row["case_number"] for row in filed}, {"L-1", "L-2"})
+
+        for url, param in [("/api/cases/?filed_after=soon", "filed_after"), ("/api/cases/?judge=rao", "judge"),
+                           ("/api/schedules/?date=19-10-2026", "date")]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn(param, response.json())
+
+    def test_fields_trims_payload_and_columns(self):
+        self._add_cases(3)
+
+        page, sql = self._queries("/api/cases/?fields=id,case_number")
+
+        self.assertEqual({tuple(sorted(row)) for row in page["results"]}, {("case_number", "id")})
+        self.assertFalse([q for q in sql if "description" in q or "ai_analysis" in q], sql)
+        self.assertFalse([q for q in sql if "scheduler_case_lawyers" in q], sql)
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        for url in ("/api/cases/", "/api/schedules/", "/api/lawyers/"):
+            Schedule.objects.all().delete()
+            Case.objects.all().delete()
+            self._add_cases(2)
+            _, few = self._queries(url)
+            self._add_cases(6, start=2)
+            page, many = self._queries(url)
+            self.assertGreaterEqual(len(page["results"]), 1, url)
+            self.assertEqual(len(few), len(many), url)
+
+        schedules = self.client.get("/api/schedules/").json()["results"]
+        self.assertEqual((schedules[0]["case_number"], schedules[0]["judge_name"]), ("L-0", "Judge Rao"))
+        self.assertEqual(self.client.get("/api/lawyers/").json()["results"][0]["case_count"], 8)
+
+
+RESPONSE_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "response-cache-tests"},
+}
+
+
+@override_settings(RESPONSE_CACHE="locmem", CACHES=RESPONSE_CACHES)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        caches[response_cache.CACHE_ALIAS].clear()
+        Judge.objects.create(name="Judge Rao", court="District Court", specialization="civil")
+
+    def _stored(self):
+        # LocMemCache keys look like ":1:response:<digest>"
+        return sum(":response:" in key for key in caches[response_cache.CACHE_ALIAS]._cache)
+
+    def test_logged_in_pages_are_not_served_to_anonymous_clients(self):
+        User.objects.create_user("clerk-meena", password="pw-for-tests")
+        self.client.login(username="clerk-meena", password="pw-for-tests")
+        mine = self.client.get("/api/judges/", HTTP_ACCEPT="text/html")
+        self.assertContains(mine, "clerk-meena")
+        self.assertNotIn("ETag", mine)
+
+        self.client.logout()
+        self.client.cookies.clear()
+        theirs = self.client.get("/api/judges/", HTTP_ACCEPT="text/html")
+        self.assertNotContains(theirs, "clerk-meena", status_code=200)
+        self.assertEqual(self._stored(), 0)
+
+    def test_anonymous_json_is_cached_and_varies_on_cookie(self):
+        first = self.client.get("/api/judges/", HTTP_ACCEPT="application/json")
+        self.assertEqual(self._stored(), 1)
+        self.assertIn("Cookie", first["Vary"])
+        again = self.client.get("/api/judges/", HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_logged_in_json_is_cached(self):
+        User.objects.create_user("clerk-meena", password="pw-for-tests")
+        self.client.login(username="clerk-meena", password="pw-for-tests")
+
+        first = self.client.get("/api/judges/", HTTP_ACCEPT="application/json")
+        self.assertEqual(self._stored(), 1)
+        again = self.client.get("/api/judges/", HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        with self.assertNumQueries(0):
+            hit = self.client.get("/api/judges/", HTTP_ACCEPT="application/json")
+        self.assertEqual(hit.content, first.content)
+
+    def test_finished_planner_job_invalidates_in_the_web_process(self):
+        before = response_cache.versions(["schedules"])
+        executor = ThreadPoolExecutor(max_workers=1)
+        # Stands in for the worker process, whose own bump this process never sees
+        # A job that is already done runs the callback in this thread, where
+        # the bump waits for the test transaction's commit
+        with mock.patch.object(jobs, "_get_executor", return_value=executor), \
+             mock.patch.object(jobs, "run_planner_job"), self.captureOnCommitCallbacks(execute=True):
+            job, created = jobs.submit_planner_job()
+            executor.shutdown(wait=True)
+        self.assertTrue(created)
+        self.assertNotEqual(response_cache.versions(["schedules"]), before)
+
+
+class DecomposedJudgeTests(TestCase):
+    MONDAY = date(2026, 10, 19)
+
+    def setUp(self):
+        patcher = mock.patch("scheduler.agent.planner_agent_v2.retrieve_policies", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.civil = Judge.objects.create(name="Civil Judge", court="District Court", specialization="civil",
+                                          max_daily_cases=1)
+        self.general = Judge.objects.create(name="General Judge", court="District Court", specialization="general",
+                                            max_daily_cases=1)
+        self.criminal = Judge.objects.create(name="Criminal Judge", court="District Court",
+                                             specialization="criminal", max_daily_cases=3)
+        for i in range(4):
+            Case.objects.create(case_number=f"D-{i}", case_type="civil", filed_in=date(2026, 1, 1) + timedelta(days=i),
+                                urgency=0.5, estimated_duration=30)
+
+    def _stage_one(self):
+        agent = HybridPlannerAgent(target_day=self.MONDAY, decompose=True, workers=2)
+        agent.observe()
+        agent.compute_case_scores()
+        agent.optimize_judges()
+        return agent
+
+    def test_cases_pruned_to_full_judges_are_seated_elsewhere(self):
+        agent = self._stage_one()
+
+        self.assertEqual(agent.unassigned, [])
+        loads = Counter(item["judge"].id for item in agent.full_plan)
+        self.assertEqual(loads, {self.civil.id: 1, self.general.id: 1, self.criminal.id: 2})
+
+    def test_tabu_pairs_are_not_used_for_leftovers(self):
+        agent = HybridPlannerAgent(target_day=self.MONDAY, decompose=True, workers=2)
+        agent.observe()
+        agent.compute_case_scores()
+        agent.tabu = {(c.id, self.criminal.id) for c in agent.cases}
+        agent.optimize_judges()
+
+        self.assertEqual(len(agent.unassigned), 2)
+        self.assertNotIn(self.criminal.id, {item["judge"].id for item in agent.full_plan})
+
+
+class CandidatePruningTests(TestCase):
+    def test_specialists_then_general_then_mismatch(self):
+        scores = candidate_scores(["civil", "criminal"], ["criminal", "general", "civil"], [1, 1], JUDGE_MISMATCH)
+        self.assertEqual([row.tolist() for row in top_k_candidates(scores, 1)], [[2], [0]])
+        self.assertEqual([row.tolist() for row in top_k_candidates(scores, 2)], [[1, 2], [0, 1]])
+
+    def test_ties_are_spread_across_resources(self):
+        scores = candidate_scores(["civil"] * 4, ["civil"] * 4, [1] * 4, JUDGE_MISMATCH)
+        picks = [row.tolist() for row in top_k_candidates(scores, 1)]
+        self.assertEqual(sorted(p for row in picks for p in row), [0, 1, 2, 3])
+
+    def test_load_pushes_busy_resources_down(self):
+        scores = candidate_scores(["civil"], ["civil", "civil"], [1], JUDGE_MISMATCH, loads=[5, 0])
+        self.assertEqual(top_k_candidates(scores, 1)[0].tolist(), [1])
+
+    def test_k_at_least_the_resource_count_keeps_everything(self):
+        scores = candidate_scores(["civil"], ["civil", "general"], [1], JUDGE_MISMATCH)
+        self.assertEqual(top_k_candidates(scores, 5)[0].tolist(), [0, 1])
+        self.assertEqual(top_k_candidates(scores, None)[0].tolist(), [0, 1])
+
+    def test_k_below_one_is_rejected(self):
+        scores = candidate_scores(["civil"], ["civil", "general"], [1], JUDGE_MISMATCH)
+        for k in (0, -1):
+            with self.assertRaises(ValueError):
+                top_k_candidates(scores, k)
+
+    def test_command_rejects_k_below_one(self):
+        for flag in ("--top-k-judges", "--top-k-lawyers"):
+            with self.assertRaisesMessage(CommandError, f"{flag} must be between 1 and 1000"):
+                call_command("run_hybrid_planner", flag, "0")
+            with self.assertRaisesMessage(CommandError, flag):
+                call_command("run_hybrid_planner", flag, "-2")
+
+
+class IncrementalPlanningTests(TestCase):
+    MONDAY = date(2026, 10, 19)
+
+    def setUp(self):
+        patcher = mock.patch("scheduler.agent.planner_agent_v2.retrieve_policies", return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for i in range(2):
+            Judge.objects.create(name=f"Judge {i}", court="District Court", specialization="general",
+                                 max_daily_cases=4)
+        for i in range(3):
+            Lawyer.objects.create(name=f"Lawyer {i}", specialization="general", max_cases=10)
+        self.cases = [Case.objects.create(case_number=f"I-{i}", case_type="civil", description=f"Dispute {i}",
+                                          filed_in=date(2026, 1, 1) + timedelta(days=i), urgency=0.5)
+                      for i in range(5)]
+        HybridPlannerAgent(target_day=self.MONDAY).run()
+        self.rows = {row.case_id: row for row in Schedule.objects.all()}
+        self.assertEqual(len(self.rows), 5)
+
+    def _rerun(self):
+        agent = HybridPlannerAgent(target_day=self.MONDAY, incremental=True)
+        agent.run()
+        return agent, {row.case_id: row for row in Schedule.objects.all()}
+
+    def test_unchanged_cases_keep_their_rows(self):
+        agent, rows = self._rerun()
+        self.assertEqual({c: r.id for c, r in rows.items()}, {c: r.id for c, r in self.rows.items()})
+        self.assertEqual(len(agent.kept_plan), 5)
+        self.assertEqual(agent.stale_schedule_ids, [])
+
+    def test_changed_case_is_replanned_with_its_old_judge_as_hint(self):
+        changed = self.cases[0]
+        Case.objects.filter(id=changed.id).update(description="Dispute 0, amended plaint")
+
+        agent, rows = self._rerun()
+
+        self.assertEqual(agent.stale_schedule_ids, [self.rows[changed.id].id])
+        self.assertEqual(agent.hints[changed.id][0], self.rows[changed.id].judge_id)
+        self.assertNotEqual(rows[changed.id].id, self.rows[changed.id].id)
+        for c in self.cases[1:]:
+            self.assertEqual(rows[c.id].id, self.rows[c.id].id)
+
+    def test_duration_change_replaces_the_row(self):
+        changed = self.cases[1]
+        Case.objects.filter(id=changed.id).update(estimated_duration=F("estimated_duration") + 30)
+
+        agent, rows = self._rerun()
+
+        self.assertEqual(agent.stale_schedule_ids, [self.rows[changed.id].id])
+        self.assertNotEqual(rows[changed.id].id, self.rows[changed.id].id)
+
+    def test_resolved_case_loses_its_row(self):
+        resolved = self.cases[2]
+        Case.objects.filter(id=resolved.id).update(is_resolved=True)
+
+        agent, rows = self._rerun()
+
+        self.assertNotIn(resolved.id, rows)
+        self.assertEqual(len(agent.kept_plan), 4)
+        self.assertEqual(len(rows), 4)
+
+
+class PolicyIndexTests(TestCase):
+    def _policy(self, title, vector):
+        policy = Policy(title=title, content=title)
+        policy.set_embedding(vector, "float32", settings.POLICY_EMBEDDING_MODEL)
+        policy.save()
+        return policy
+
+    def setUp(self):
+        self.first = self._policy("Adjournments", [1.0, 0.0, 0.0])
+        self.second = self._policy("Bail hearings", [0.0, 1.0, 0.0])
+
+    def test_rows_written_elsewhere_are_seen_on_the_next_check(self):
+        index = PolicyIndex(ttl=0)
+        self.assertEqual(len(index.search([0.0, 0.0, 1.0], 3)), 2)
+
+        # As if load_policies ran in another process
+        third = self._policy("Witness summons", [0.0, 0.0, 1.0])
+        self.assertEqual(index.search([0.0, 0.0, 1.0], 1)[0][0], third.id)
+
+        Policy.objects.filter(id=third.id).delete()
+        self.assertNotIn(third.id, [pid for pid, _ in index.search([0.0, 0.0, 1.0], 3)])
+
+    def test_re_embedded_rows_are_seen(self):
+        index = PolicyIndex(ttl=0)
+        self.assertEqual(index.search([1.0, 0.0, 0.0], 1)[0][0], self.first.id)
+
+        self.second.set_embedding([1.0, 0.1, 0.0], "float32", settings.POLICY_EMBEDDING_MODEL)
+        self.second.save()
+        self.first.set_embedding([0.0, 1.0, 0.0], "float32", settings.POLICY_EMBEDDING_MODEL)
+        self.first.save()
+        self.assertEqual(index.search([1.0, 0.0, 0.0], 1)[0][0], self.second.id)
+
+    def test_version_is_checked_at_most_once_per_ttl(self):
+        index = PolicyIndex(ttl=3600)
+        index.search([1.0, 0.0, 0.0], 1)
+        with self.assertNumQueries(0):
+            index.search([1.0, 0.0, 0.0], 1)
+        index._checked_at -= 3600
+        with self.assertNumQueries(1):
+            index.search([1.0, 0.0, 0.0], 1)
+
+    def test_memory_mapped_copy_is_not_used_once_stale(self):
+        with tempfile.TemporaryDirectory() as path:
+            PolicyIndex(path=path).load()
+            self.first.set_embedding([0.0, 0.0, 1.0], "float32", settings.POLICY_EMBEDDING_MODEL)
+            self.first.save()
+
+            index = PolicyIndex(path=path)
+            self.assertEqual(index.search([0.0, 0.0, 1.0], 1)[0][0], self.first.id)
+
+
+class FakeEncoder:
+    """Stands in for the sentence-transformer: a fixed-size vector per text."""
+    def encode(self, texts, batch_size=None):
+        return np.array([[len(t), t.count(" ") + 1, 1.0] for t in texts], dtype=np.float32)
+
+
+class PolicyLoadingTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("scheduler.tools.policy_retriever.get_model", return_value=FakeEncoder())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def _jsonl(self, lines):
+        path = os.path.join(self.dir.name, "policies.jsonl")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+        return path
+
+    def test_long_paragraphs_are_cut_at_whitespace(self):
+        text = "word " * 700 + "\n\n" + "x" * 3100 + "\n\nshort"
+        chunks = list(split_paragraphs(text, max_chars=1500))
+        self.assertTrue(all(len(c) <= 1500 for c in chunks))
+        self.assertEqual(chunks[0], ("word " * 300).strip())
+        self.assertEqual("".join(chunks[3:6]).replace("\n\nshort", ""), "x" * 3100)
+        self.assertTrue(chunks[-1].endswith("short"))
+
+    def test_short_paragraphs_are_still_packed(self):
+        self.assertEqual(list(split_paragraphs("one\n\ntwo\n\n\n\nthree", max_chars=9)), ["one\n\ntwo", "three"])
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        path = self._jsonl([
+            json.dumps({"title": "Adjournments", "content": "Adjournments need written reasons."}),
+            json.dumps({"title": "No content"}),
+            "{not json",
+            json.dumps(["a", "list"]),
+            json.dumps({"title": "Blank", "content": "   "}),
+            json.dumps({"content": "Bail hearings are listed first."}),
+        ])
+        out, err = io.StringIO(), io.StringIO()
+        call_command("load_policies", path, stdout=out, stderr=err)
+
+        self.assertEqual(sorted(Policy.objects.values_list("title", flat=True)), ["Adjournments", "policies #6"])
+        self.assertEqual(err.getvalue().count("skipped"), 4)
+        self.assertIn(f"{path}:2: skipped, no \"content\" text", err.getvalue())
+        self.assertIn("Skipped 4 invalid rows", out.getvalue())
+
+    def test_long_policy_is_stored_in_parts(self):
+        text = " ".join(f"rule{i:04d}" for i in range(200))  # 1999 characters
+        path = self._jsonl([json.dumps({"title": "Listing", "content": text})])
+        call_command("load_policies", path, "--max-chars", "500", stdout=io.StringIO())
+        self.assertEqual(Policy.objects.count(), 4)
+        self.assertTrue(all(len(p.content) <= 500 for p in Policy.objects.all()))
+        self.assertTrue(Policy.objects.filter(title="Listing (part 4)").exists())
+
+
+class EmbeddingCodecTests(TestCase):
+    VECTOR = [0.5, -1.25, 0.0, 3.0, -0.001]
+
+    def test_float32_round_trip_is_exact_and_little_endian(self):
+        blob, scale = encode_embedding(self.VECTOR, "float32")
+        self.assertEqual((len(blob), scale), (20, 1.0))
+        self.assertEqual(blob[:4], struct.pack("<f", 0.5))
+        decoded = decode_embedding(blob, "float32", scale)
+        self.assertEqual(decoded.dtype, np.float32)
+        np.testing.assert_array_equal(decoded, np.asarray(self.VECTOR, dtype=np.float32))
+        self.assertFalse(decoded.flags.writeable)
+
+    def test_int8_round_trip_is_within_half_a_step(self):
+        blob, scale = encode_embedding(self.VECTOR, "int8")
+        self.assertEqual(len(blob), 5)
+        self.assertAlmostEqual(scale, 3.0 / 127)
+        decoded = decode_embedding(blob, "int8", scale)
+        self.assertEqual(decoded.dtype, np.float32)
+        self.assertLessEqual(np.abs(decoded - np.asarray(self.VECTOR)).max(), scale / 2 + 1e-7)
+        self.assertAlmostEqual(float(decoded[3]), 3.0, places=5)
+
+    def test_zero_and_empty_vectors(self):
+        blob, scale = encode_embedding([0.0, 0.0], "int8")
+        self.assertEqual(scale, 1.0)
+        np.testing.assert_array_equal(decode_embedding(blob, "int8", scale), [0.0, 0.0])
+        blob, scale = encode_embedding([], "int8")
+        self.assertEqual(decode_embedding(blob, "int8", scale).size, 0)
+
+    def test_policy_property_decodes_what_set_embedding_stored(self):
+        policy = Policy(title="Adjournments", content="...")
+        policy.set_embedding(self.VECTOR, "int8", "test-model")
+        self.assertEqual((policy.embedding_dim, policy.embedding_model), (5, "test-model"))
+        np.testing.assert_allclose(policy.embedding, self.VECTOR, atol=policy.embedding_scale / 2 + 1e-7)
+
+
+class EmbeddingMigrationTests(TransactionTestCase):
+    """Data migrations 0013 (content_hash backfill) and 0014 (JSON to binary embeddings)."""
+
+    def _migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([("scheduler", target)])
+        return executor.loader.project_state([("scheduler", target)]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_json_embeddings_become_blobs_and_back(self):
+        apps = self._migrate("0012_plannerjob")
+        OldPolicy = apps.get_model("scheduler", "Policy")
+        embedded = OldPolicy.objects.create(title="Bail", content="Bail  hearings\nfirst.", embedding=[0.25, -0.5, 1.0])
+        empty = OldPolicy.objects.create(title="Draft", content="No vector yet.", embedding=[])
+
+        apps = self._migrate("0014_policy_binary_embedding")
+        Migrated = apps.get_model("scheduler", "Policy")
+        row = Migrated.objects.get(id=embedded.id)
+        self.assertEqual(row.content_hash, content_hash("Bail hearings first."))
+        self.assertEqual((row.embedding_dtype, row.embedding_dim, row.embedding_model),
+                         ("float32", 3, "all-MiniLM-L6-v2"))
+        np.testing.assert_array_equal(decode_embedding(bytes(row.embedding_blob)), [0.25, -0.5, 1.0])
+        row = Migrated.objects.get(id=empty.id)
+        self.assertEqual((bytes(row.embedding_blob), row.embedding_dim, row.embedding_model), (b"", 0, ""))
+
+        apps = self._migrate("0013_policy_content_hash")
+        Reverted = apps.get_model("scheduler", "Policy")
+        self.assertEqual(Reverted.objects.get(id=embedded.id).embedding, [0.25, -0.5, 1.0])
+        self.assertEqual(Reverted.objects.get(id=empty.id).embedding, [])
+
+
+class SearchIndexMigrationTests(TransactionTestCase):
+    """Migration 0020 creates the FTS5 index and backfills existing rows."""
+
+    def _migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([("scheduler", target)])
+        return executor.loader.project_state([("scheduler", target)]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_existing_rows_are_backfilled(self):
+        apps = self._migrate("0019_schedule_day_indexes")
+        apps.get_model("scheduler", "Judge").objects.create(name="Judge Rao", court="District Court",
+                                                            specialization="family")
+        apps.get_model("scheduler", "Case").objects.create(case_number="OLD-1", case_type="civil",
+                                                           filed_in=date(2026, 1, 1), description="")
+
+        self._migrate("0020_search_index")
+
+        self.assertEqual([row["title"] for row in search_index.search("rao family")[0]], ["Judge Rao"])
+        self.assertEqual([row["type"] for row in search_index.search("old")[0]], ["case"])
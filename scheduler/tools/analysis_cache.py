@@ -0,0 +1,97 @@
+import hashlib
+import threading
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from scheduler.models import AnalysisCache
+import case_analyzer
+
+# Eviction runs after every EVICT_EVERY entries this process stores
+EVICT_EVERY = 100
+
+_stats = {"hits": 0, "misses": 0}
+_inserts = 0
+_stats_lock = threading.Lock()
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+def _count_insert():
+    """Counts a stored entry; True when it is time to evict."""
+    global _inserts
+    with _stats_lock:
+        _inserts += 1
+        return _inserts % EVICT_EVERY == 0
+
+def cache_key(case_type, description):
+    """Content address of an analysis: model, prompt version, type and normalized text."""
+    normalized = " ".join((description or "").lower().split())
+    raw = f"{case_analyzer.OLLAMA_MODEL}\x1f{case_analyzer.PROMPT_VERSION}\x1f{case_type}\x1f{normalized}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def evict(max_entries=None):
+    """Drops least recently used entries beyond max_entries. Returns the number deleted."""
+    max_entries = settings.ANALYSIS_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    cutoff = (AnalysisCache.objects.order_by("-last_used_at", "-id")
+              .values_list("last_used_at", flat=True)[max_entries:max_entries + 1].first())
+    if cutoff is None:
+        return 0
+    deleted, _ = AnalysisCache.objects.filter(last_used_at__lte=cutoff).delete()
+    return deleted
+
+def invalidate(stale_only=False):
+    """
+    Removes cached analyses. With stale_only, only entries from another
+    model or prompt version (which can no longer be hit) are removed.
+    """
+    qs = AnalysisCache.objects.all()
+    if stale_only:
+        qs = qs.exclude(model_name=case_analyzer.OLLAMA_MODEL, prompt_version=case_analyzer.PROMPT_VERSION)
+    deleted, _ = qs.delete()
+    return deleted
+
+def stats():
+    with _stats_lock:
+        counters = dict(_stats)
+    lookups = counters["hits"] + counters["misses"]
+    counters["hit_rate"] = round(counters["hits"] / lookups, 3) if lookups else 0.0
+    counters["entries"] = AnalysisCache.objects.count()
+    return counters
+
+def analyze_case_cached(case_number, case_type, description, filed_date, timeout=30, deadline=None):
+    """
+    analyze_case_with_ai() behind the persistent cache. Only real model
+    answers are cached, never rule-based fallbacks.
+    """
+    key = cache_key(case_type, description)
+    entry = AnalysisCache.objects.filter(key=key).only("result").first()
+    if entry is not None:
+        _count("hits")
+        AnalysisCache.objects.filter(pk=entry.pk).update(hits=F("hits") + 1, last_used_at=timezone.now())
+        return dict(entry.result)
+
+    _count("misses")
+    result = case_analyzer.analyze_case_with_ai(
+        case_number=case_number,
+        case_type=case_type,
+        description=description,
+        filed_date=filed_date,
+        timeout=timeout,
+        deadline=deadline,
+    )
+    if result.get("source") == "ai":
+        try:
+            with transaction.atomic():
+                AnalysisCache.objects.create(
+                    key=key,
+                    model_name=case_analyzer.OLLAMA_MODEL,
+                    prompt_version=case_analyzer.PROMPT_VERSION,
+                    result=result,
+                )
+        except IntegrityError:
+            return result  # another worker stored the same analysis first
+        if _count_insert():
+            evict()
+    return result
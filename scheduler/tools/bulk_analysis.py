@@ -0,0 +1,127 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.db import close_old_connections, transaction
+from scheduler.models import Case
+from scheduler.serializers import CaseImportSerializer
+from scheduler.tools.query_counter import chunked
+from scheduler.tools.analysis_cache import analyze_case_cached
+from scheduler.tools import response_cache, search_index
+from case_analyzer import analyze_cases_bulk, calculate_ai_priority
+
+ANALYSIS_FIELDS = ["urgency", "estimated_duration", "priority", "ai_analysis", "analysis_status"]
+# Upper bound on concurrent Ollama requests for runs requested over the API
+MAX_API_WORKERS = 16
+
+def _clean_rows(rows):
+    """
+    Validates each row with CaseImportSerializer. Raises ValueError naming
+    the row for a bad field or a case_number already seen in `rows`.
+    """
+    seen = set()
+    for n, row in enumerate(rows, 1):
+        serializer = CaseImportSerializer(data=row)
+        if not serializer.is_valid():
+            field, errors = next(iter(serializer.errors.items()))
+            raise ValueError(f"row {n}: {field}: {errors[0]}")
+        data = serializer.validated_data
+        if data["case_number"] in seen:
+            raise ValueError(f"row {n}: case_number {data['case_number']} appears more than once")
+        seen.add(data["case_number"])
+        yield data
+
+def import_cases(rows, batch_size=500):
+    """
+    Upserts case dicts (case_number, case_type, filed_in and optional
+    description), matched on case_number. Returns the case numbers. All or
+    nothing: a bad row (see _clean_rows) raises ValueError and rolls back
+    the batches before it.
+    """
+    numbers = []
+    with transaction.atomic():
+        for batch in chunked(_clean_rows(rows), batch_size):
+            existing = Case.objects.in_bulk([r["case_number"] for r in batch], field_name="case_number")
+            new, changed = [], []
+            for r in batch:
+                case = existing.get(r["case_number"])
+                if case is None:
+                    new.append(Case(case_number=r["case_number"], case_type=r["case_type"],
+                                    filed_in=r["filed_in"], description=r.get("description", "")))
+                else:
+                    case.case_type = r["case_type"]
+                    case.description = r.get("description", case.description)
+                    changed.append(case)
+                numbers.append(r["case_number"])
+            Case.objects.bulk_create(new)
+            Case.objects.bulk_update(changed, ["case_type", "description"])
+            # Bulk writes skip the post_save signals that maintain the index and
+            # invalidate cached responses
+            search_index.index_objects("case", new + changed)
+            response_cache.bump("cases")
+    return numbers
+
+def import_cases_jsonl(path, batch_size=500):
+    """import_cases() over a JSONL file, one case per line."""
+    with open(path, encoding="utf-8") as fh:
+        return import_cases((json.loads(line) for line in fh if line.strip()), batch_size)
+
+def analyze_queryset(cases, workers=4, batch_size=100, max_pending=None, timeout=30, budget=None, log=print):
+    """
+    Runs AI analysis for every case in `cases` over a bounded thread pool and
+    writes results back with bulk_update every `batch_size` cases. Once the
+    optional `budget` (seconds) is spent, the rest get rule-based analyses.
+    Returns {"analyzed", "elapsed", "per_second"}.
+    """
+    fields = ["id", "case_number", "case_type", "description", "filed_in"] + ANALYSIS_FIELDS
+    ids = list(cases.order_by("id").values_list("id", flat=True))
+
+    def stream():
+        # Fetch by id chunks so results can be written while reading
+        for chunk in chunked(ids, batch_size):
+            for c in Case.objects.filter(id__in=chunk).only(*fields):
+                yield {"case": c, "case_number": c.case_number, "case_type": c.case_type,
+                       "description": c.description, "filed_date": c.filed_in}
+    items = stream()
+
+    start = time.monotonic()
+    analyzed, batch = 0, []
+
+    def flush():
+        nonlocal analyzed
+        Case.objects.bulk_update(batch, ANALYSIS_FIELDS)
+        response_cache.bump("cases")
+        analyzed += len(batch)
+        batch.clear()
+        elapsed = time.monotonic() - start
+        log(f"Analyzed {analyzed} cases ({analyzed / elapsed:.1f} cases/s)")
+
+    for item, analysis in analyze_cases_bulk(items, workers=workers, max_pending=max_pending, timeout=timeout,
+                                             budget=budget, analyze=analyze_case_cached):
+        case = item["case"]
+        case.urgency = analysis['urgency']
+        case.estimated_duration = analysis['estimated_duration']
+        case.priority = calculate_ai_priority(case, analysis)
+        case.ai_analysis = analysis
+        case.analysis_status = "done"
+        batch.append(case)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    elapsed = time.monotonic() - start
+    return {"analyzed": analyzed, "elapsed": round(elapsed, 2),
+            "per_second": round(analyzed / elapsed, 2) if elapsed else 0.0}
+
+# Bulk runs requested over the API execute one at a time in the background
+_background = ThreadPoolExecutor(max_workers=1)
+
+def submit_bulk_analysis(case_ids, **options):
+    """Queues analyze_queryset() for `case_ids` on a background thread."""
+    def run():
+        try:
+            stats = analyze_queryset(Case.objects.filter(id__in=case_ids), **options)
+            print(f"Bulk analysis finished: {stats}")
+        finally:
+            close_old_connections()
+    return _background.submit(run)
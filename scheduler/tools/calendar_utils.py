@@ -1,4 +1,5 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
+from django.utils import timezone
 
 def get_available_slots(entity, day):
     """
@@ -15,4 +16,39 @@ def get_available_slots(entity, day):
         end = datetime.combine(day, datetime.strptime(s['end'], "%H:%M").time())
         formatted.append((start, end))
 
-    return formatted
\ No newline at end of file
+    return formatted
+
+def day_range(day):
+    """
+    (start, end) aware datetimes bounding `day` in the current time zone.
+    Filter with start_time__gte/__lt instead of start_time__date so the
+    database can use the start_time indexes.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+# Sitting hours assumed for judges without working_hours
+DEFAULT_WORKING_HOURS = {"start": "10:00", "end": "17:00"}
+
+def _at(day, hhmm):
+    return datetime.combine(day, datetime.strptime(hhmm, "%H:%M").time())
+
+def get_working_windows(judge, day):
+    """
+    Windows a judge can sit on `day`, as sorted (start, end) datetimes:
+    their availability entries for that weekday clipped to working_hours.
+    Judges with no availability recorded sit their working hours every day.
+    """
+    hours = judge.working_hours or DEFAULT_WORKING_HOURS
+    day_start = _at(day, hours.get("start", DEFAULT_WORKING_HOURS["start"]))
+    day_end = _at(day, hours.get("end", DEFAULT_WORKING_HOURS["end"]))
+    if not judge.availability:
+        return [(day_start, day_end)] if day_end > day_start else []
+    windows = [(max(start, day_start), min(end, day_end)) for start, end in get_available_slots(judge, day)]
+    return sorted((start, end) for start, end in windows if end > start)
+
+def get_busy_slots(lawyer, day):
+    """A lawyer's busy_slots entries for `day`'s weekday as (start, end) datetimes."""
+    weekday = day.strftime("%A")
+    return [(_at(day, s["start"]), _at(day, s["end"]))
+            for s in getattr(lawyer, "busy_slots", None) or [] if s.get("day") == weekday]
@@ -0,0 +1,42 @@
+import numpy as np
+
+# Specialization scores used by the planner objective
+SPEC_MATCH = 50
+SPEC_GENERAL = 10
+JUDGE_MISMATCH = -30
+LAWYER_MISMATCH = -20
+
+def spec_score_matrix(case_types, specializations, mismatch):
+    """
+    (cases x resources) matrix of raw specialization scores:
+    match -> SPEC_MATCH, general practice -> SPEC_GENERAL, else `mismatch`.
+    """
+    ct = np.asarray(case_types, dtype=object)[:, None]
+    sp = np.asarray(specializations, dtype=object)[None, :]
+    return np.where(ct == sp, SPEC_MATCH, np.where(sp == "general", SPEC_GENERAL, mismatch))
+
+def candidate_scores(case_types, specializations, urgency_mults, mismatch, base=None, loads=None, load_weight=10):
+    """
+    Cheap estimate of how attractive each (case, resource) pair is:
+        base + spec_score * urgency_mult - load_weight * current_load
+    plus a sub-unit tie-breaker that rotates equally-scored resources
+    across cases, so identical cases don't all shortlist the same K.
+    """
+    n_cases, n_res = len(case_types), len(specializations)
+    scores = spec_score_matrix(case_types, specializations, mismatch) * np.asarray(urgency_mults, dtype=float)[:, None]
+    if base is not None:
+        scores = scores + np.asarray(base, dtype=float)[:, None]
+    if loads is not None:
+        scores = scores - load_weight * np.asarray(loads, dtype=float)[None, :]
+    rotation = (np.arange(n_cases)[:, None] + np.arange(n_res)[None, :]) % max(n_res, 1)
+    return scores - rotation / max(n_res, 1)
+
+def top_k_candidates(scores, k):
+    """Column indices of the k best resources for every row of `scores`."""
+    if k is not None and k < 1:
+        raise ValueError(f"k must be at least 1, got {k}")
+    n_res = scores.shape[1]
+    if k is None or k >= n_res:
+        return [np.arange(n_res) for _ in range(scores.shape[0])]
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [np.sort(row) for row in top]
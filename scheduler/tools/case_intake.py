@@ -0,0 +1,95 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from scheduler.models import Case
+from scheduler.tools.analysis_cache import analyze_case_cached
+from scheduler.tools import response_cache
+from case_analyzer import analyze_case_rule_based, calculate_ai_priority
+
+LOG_PATH = '/tmp/case_ai_analysis.log'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=settings.INTAKE_WORKERS, thread_name_prefix="case-intake")
+        return _pool
+
+def analysis_values(case, analysis):
+    """Case field values derived from an analysis dict."""
+    return {
+        "urgency": analysis['urgency'],
+        "estimated_duration": analysis['estimated_duration'],
+        "priority": calculate_ai_priority(case, analysis),
+        "ai_analysis": analysis,
+    }
+
+def rule_based_values(case_type, description, filed_in):
+    """Immediate values for a new or edited case, before any AI analysis."""
+    analysis = analyze_case_rule_based(case_type, description)
+    return analysis_values(SimpleNamespace(case_type=case_type, filed_in=filed_in), analysis)
+
+def queue_analysis(case_id, timeout=30):
+    """Schedules the AI upgrade of a pending case once the current transaction commits."""
+    transaction.on_commit(lambda: _get_pool().submit(upgrade_case, case_id, timeout))
+
+def upgrade_case(case_id, timeout=30):
+    """
+    Replaces a pending case's rule-based values with the AI analysis and
+    recomputes its priority. The result is discarded if the case type or
+    description was edited meanwhile (the edit queues a fresh analysis).
+    """
+    try:
+        if not Case.objects.filter(pk=case_id, analysis_status="pending").update(analysis_status="running"):
+            return  # already picked up, or no longer pending
+        response_cache.bump("cases")  # queryset updates send no signals
+        case = Case.objects.only("case_number", "case_type", "description", "filed_in").get(pk=case_id)
+        try:
+            analysis = analyze_case_cached(
+                case_number=case.case_number,
+                case_type=case.case_type,
+                description=case.description,
+                filed_date=case.filed_in,
+                timeout=timeout,
+            )
+        except Exception as e:
+            print(f"Background analysis failed for {case.case_number}: {e}")
+            Case.objects.filter(pk=case_id, analysis_status="running").update(analysis_status="failed")
+            response_cache.bump("cases")
+            return
+
+        values = analysis_values(case, analysis)
+        updated = Case.objects.filter(
+            pk=case_id, analysis_status="running", case_type=case.case_type, description=case.description,
+        ).update(analysis_status="done", **values)
+        if not updated:
+            return
+        response_cache.bump("cases")
+
+        # Log to file for debugging
+        log_entry = {
+            'timestamp': datetime.now().isoformat(),
+            'operation': 'background',
+            'case_number': case.case_number,
+            'case_type': case.case_type,
+            'description': case.description,
+            'ai_analysis': analysis,
+            'final_values': {
+                'urgency': values['urgency'],
+                'duration': values['estimated_duration'],
+                'priority': values['priority'],
+            }
+        }
+        with open(LOG_PATH, 'a') as f:
+            f.write(json.dumps(log_entry, indent=2) + '\n---\n')
+        print(f"  {analysis.get('source', 'ai')} analysis ready for {case.case_number}: "
+              f"urgency {values['urgency']}, {values['estimated_duration']} min, priority {values['priority']}")
+    finally:
+        close_old_connections()
@@ -0,0 +1,30 @@
+import numpy as np
+
+# Stored byte layouts, always little-endian
+DTYPES = {
+    "float32": np.dtype("<f4"),
+    "int8": np.dtype("i1"),
+}
+
+def encode_embedding(vector, dtype="float32"):
+    """
+    Packs an embedding into bytes. Returns (blob, scale).
+    int8 uses symmetric per-vector quantization: value ~= q * scale.
+    """
+    vec = np.asarray(vector, dtype=np.float32)
+    if dtype == "int8":
+        peak = float(np.abs(vec).max()) if vec.size else 0.0
+        scale = peak / 127 if peak else 1.0
+        q = np.clip(np.rint(vec / scale), -127, 127).astype(DTYPES["int8"])
+        return q.tobytes(), scale
+    return vec.astype(DTYPES["float32"]).tobytes(), 1.0
+
+def decode_embedding(blob, dtype="float32", scale=1.0):
+    """
+    Zero-copy view of a stored embedding. float32 blobs are returned as-is
+    (read-only); int8 blobs are dequantized to float32.
+    """
+    raw = np.frombuffer(blob, dtype=DTYPES[dtype])
+    if dtype == "int8":
+        return raw.astype(np.float32) * np.float32(scale)
+    return raw
@@ -0,0 +1,164 @@
+"""
+Notification outbox.
+
+The planner only enqueues Notification rows. The send_notifications worker
+claims pending rows, groups them per recipient into one digest SMS and
+delivers them over a thread pool through a shared transport with rate
+limiting. Claiming lets several workers share the outbox; a row is sent
+at least once, and twice only if its worker dies between sending and
+recording it.
+"""
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from scheduler.models import Notification
+from scheduler.tools.query_counter import chunked
+from scheduler.tools.sms_utils import get_client
+
+MAX_ATTEMPTS = 3
+
+class TwilioTransport:
+    """Sends through one reused Twilio client."""
+    def __init__(self, client=None):
+        self.client = client or get_client()
+
+    def send(self, phone_number, body):
+        message = self.client.messages.create(
+            from_=settings.TWILIO_PHONE_NUMBER,
+            body=body,
+            to=phone_number
+        )
+        return message.sid
+
+class ConsoleTransport:
+    """Prints instead of sending (Twilio missing or not configured)."""
+    def send(self, phone_number, body):
+        print(f"Mock Send -> To: {phone_number}, Msg: {body}")
+        return "console"
+
+class LocalTransport:
+    """Keeps messages in memory. Used by tests and dry runs."""
+    def __init__(self):
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, phone_number, body):
+        with self._lock:
+            self.sent.append((phone_number, body))
+            return f"local-{len(self.sent)}"
+
+def default_transport():
+    client = get_client()
+    return TwilioTransport(client) if client else ConsoleTransport()
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads."""
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def enqueue(messages):
+    """
+    Adds (phone_number, recipient, body) line items to the outbox.
+    Items without a phone number are dropped. Returns the number queued.
+    """
+    rows = [
+        Notification(phone_number=phone, recipient=recipient, body=body)
+        for phone, recipient, body in messages if phone
+    ]
+    Notification.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+def build_digest(recipient, bodies):
+    """One SMS for all of a recipient's pending line items."""
+    prefix = f"{recipient}: " if recipient else ""
+    if len(bodies) == 1:
+        return f"{prefix}New Schedule: {bodies[0]}"
+    lines = "\n".join(f"- {b}" for b in bodies)
+    return f"{prefix}{len(bodies)} new hearings scheduled:\n{lines}"
+
+def _deliver(transport, limiter, phone_number, body):
+    limiter.wait()
+    try:
+        transport.send(phone_number, body)
+        return None
+    except Exception as e:
+        return str(e)
+
+def _claim(limit=None):
+    """
+    Marks pending rows, and rows left in "sending" by a worker that stopped
+    over SMS_CLAIM_TIMEOUT ago, as sending under a new token, and returns
+    the ones this call got. The UPDATE re-checks that each row is still
+    claimable, so two workers never both get a row.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.SMS_CLAIM_TIMEOUT)
+    claimable = Q(status="pending") | Q(status="sending", claimed_at__lt=stale)
+    ids = Notification.objects.filter(claimable).order_by("id").values_list("id", flat=True)
+    if limit:
+        ids = ids[:limit]
+
+    token, claimed = uuid.uuid4().hex, []
+    for batch in chunked(list(ids), 500):
+        Notification.objects.filter(claimable, id__in=batch).update(status="sending", claim=token, claimed_at=now)
+        claimed.extend(Notification.objects.filter(id__in=batch, claim=token).order_by("id")
+                       .only("id", "phone_number", "recipient", "body"))
+    return token, claimed
+
+def dispatch_pending(transport=None, workers=None, rate=None, limit=None):
+    """
+    Sends every pending notification, one digest per recipient.
+    Returns counts of recipients, line items, sent and failed digests.
+    """
+    transport = transport or default_transport()
+    workers = workers or settings.SMS_WORKERS
+    limiter = RateLimiter(settings.SMS_RATE_PER_SECOND if rate is None else rate)
+
+    token, claimed = _claim(limit)
+    groups = defaultdict(list)
+    for n in claimed:
+        groups[(n.phone_number, n.recipient)].append(n)
+
+    stats = {"recipients": len(groups), "messages": 0, "sent": 0, "failed": 0}
+    if not groups:
+        return stats
+
+    # DB writes stay on this thread; workers only talk to the transport
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            key: pool.submit(_deliver, transport, limiter, key[0], build_digest(key[1], [n.body for n in rows]))
+            for key, rows in groups.items()
+        }
+        for key, future in futures.items():
+            error = future.result()
+            ids = [n.id for n in groups[key]]
+            stats["messages"] += len(ids)
+            for batch in chunked(ids, 500):
+                qs = Notification.objects.filter(id__in=batch, claim=token)
+                if error is None:
+                    qs.update(status="sent", sent_at=timezone.now(), attempts=F("attempts") + 1, error="", claim="")
+                else:
+                    qs.filter(attempts__gte=MAX_ATTEMPTS - 1).update(
+                        status="failed", attempts=F("attempts") + 1, error=error, claim="")
+                    qs.update(status="pending", attempts=F("attempts") + 1, error=error, claim="")
+            stats["sent" if error is None else "failed"] += 1
+
+    return stats
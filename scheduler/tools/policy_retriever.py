@@ -1,33 +1,120 @@
+import hashlib
+import threading
+from functools import lru_cache
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from django.conf import settings
 from scheduler.models import Policy
+from scheduler.tools.vector_index import get_index
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
+_model = None
+_model_lock = threading.Lock()
+_query_cache = None
+
+def get_model():
+    """
+    Loads the sentence-transformer on first use and shares it across
+    threads, so importing this module (and the planner) stays cheap.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(settings.POLICY_EMBEDDING_MODEL)
+    return _model
 
 def embed_text(text: str):
-    return model.encode([text])[0].tolist()
+    return get_model().encode([text])[0].tolist()
+
+def embed_query(query: str):
+    """
+    Embedding for a retrieval query, memoized in an LRU cache of
+    settings.POLICY_QUERY_CACHE_SIZE entries. Returns a tuple so cached
+    values can't be mutated by callers.
+    """
+    global _query_cache
+    if _query_cache is None:
+        with _model_lock:
+            if _query_cache is None:
+                _query_cache = lru_cache(maxsize=settings.POLICY_QUERY_CACHE_SIZE)(
+                    lambda q: tuple(embed_text(q))
+                )
+    return _query_cache(query)
+
+def content_hash(text: str):
+    """sha256 of the whitespace-normalized text; identifies already-embedded content."""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def _split_long(para: str, max_chars: int):
+    """Cuts a paragraph into pieces of at most `max_chars`, at whitespace where possible."""
+    while len(para) > max_chars:
+        cut = para.rfind(" ", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        yield para[:cut].rstrip()
+        para = para[cut:].lstrip()
+    if para:
+        yield para
+
+def split_paragraphs(text: str, max_chars: int = 1500):
+    """
+    Splits a document on blank lines and packs consecutive paragraphs into
+    chunks of at most `max_chars`; a longer paragraph is cut at whitespace.
+    """
+    chunk, size = [], 0
+    paragraphs = (p.strip() for p in text.split("\n\n"))
+    for para in (piece for p in paragraphs for piece in _split_long(p, max_chars)):
+        if chunk and size + len(para) > max_chars:
+            yield "\n\n".join(chunk)
+            chunk, size = [], 0
+        chunk.append(para)
+        size += len(para)
+    if chunk:
+        yield "\n\n".join(chunk)
+
+def _new_policy(title, content, source, emb):
+    policy = Policy(title=title, content=content, source=source, content_hash=content_hash(content))
+    policy.set_embedding(emb, settings.POLICY_EMBEDDING_DTYPE, settings.POLICY_EMBEDDING_MODEL)
+    return policy
 
 def add_policy(title: str, content: str, source: str = "internal"):
     emb = embed_text(content)
-    policy = Policy.objects.create(title=title, content=content, embedding=emb, source=source)
+    policy = _new_policy(title, content, source, emb)
+    policy.save()
+    get_index().add(policy.id, emb)
     return policy
 
+def add_policies(items, batch_size: int = 64):
+    """
+    Embeds and inserts (title, content, source) items in one batched encoder
+    call and one bulk insert. Returns the created policies.
+    """
+    items = list(items)
+    if not items:
+        return []
+    embeddings = get_model().encode([content for _, content, _ in items], batch_size=batch_size)
+    policies = [
+        _new_policy(title, content, source, emb)
+        for (title, content, source), emb in zip(items, embeddings)
+    ]
+    policies = Policy.objects.bulk_create(policies)
+    index = get_index()
+    if any(p.id is None for p in policies):
+        # Backend can't return ids from bulk inserts; rebuild instead
+        index.load()
+    else:
+        for policy, emb in zip(policies, embeddings):
+            index.add(policy.id, emb)
+    return policies
+
 def cosine_similarity(a, b):
     a, b = np.array(a), np.array(b)
     return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
 
 def retrieve_policies(query: str, top_k: int = 3):
-    q_emb = embed_text(query)
-    results = []
-    for p in Policy.objects.all():
-        # Skip policies with empty embeddings
-        if not p.embedding or len(p.embedding) == 0:
-            continue
-        try:
-            sim = cosine_similarity(p.embedding, q_emb)
-            results.append((p, sim))
-        except (ValueError, ZeroDivisionError):
-            # Skip invalid embeddings
-            continue
-    results.sort(key=lambda x: x[1], reverse=True)
-    return results[:top_k]
\ No newline at end of file
+    q_emb = embed_query(query)
+    hits = get_index().search(q_emb, top_k)
+    # Policies deleted since the index was built are skipped
+    policies = Policy.objects.in_bulk([pid for pid, _ in hits])
+    return [(policies[pid], sim) for pid, sim in hits if pid in policies]
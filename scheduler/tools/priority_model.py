@@ -1,15 +1,38 @@
 from datetime import date
+import numpy as np
+
+TYPE_WEIGHTS = {
+    "criminal": 0.9,
+    "civil": 0.7,
+    "family": 0.8,
+    "other": 0.6
+}
 
 def compute_priority(case):
     age_days = (date.today() - case.filed_in).days
     age_score = min(age_days/365, 1)
 
-    type_weight = {
-        "criminal": 0.9,
-        "civil": 0.7,
-        "family": 0.8,
-        "other": 0.6
-    }.get(case.case_type, 0.7)
+    type_weight = TYPE_WEIGHTS.get(case.case_type, 0.7)
 
     priority = 0.5 * case.urgency + 0.3 * age_score + 0.2 * type_weight
     return round(min(priority, 1.0), 3)
+
+def lookup_array(table, keys, default):
+    """table.get(key, default) for every key, as a float array (one lookup per distinct key)."""
+    uniq, inverse = np.unique(np.asarray(keys, dtype=object), return_inverse=True)
+    return np.array([table.get(k, default) for k in uniq], dtype=np.float64)[inverse.ravel()]
+
+def compute_priorities(case_types, urgency, filed_in, weights=(0.5, 0.3, 0.2), today=None):
+    """
+    compute_priority() over whole columns. `weights` are the urgency, age
+    and case-type weights; (0.7, 0.15, 0.15) gives calculate_ai_priority().
+    """
+    if len(case_types) == 0:
+        return np.empty(0)
+    today = np.datetime64(today or date.today(), "D")
+    age_days = (today - np.asarray(filed_in, dtype="datetime64[D]")).astype(np.int64)
+    age_score = np.minimum(age_days / 365, 1)
+    type_weight = lookup_array(TYPE_WEIGHTS, case_types, 0.7)
+    w_urgency, w_age, w_type = weights
+    priority = w_urgency * np.asarray(urgency, dtype=np.float64) + w_age * age_score + w_type * type_weight
+    return np.round(np.minimum(priority, 1.0), 3)
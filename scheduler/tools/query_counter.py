@@ -0,0 +1,31 @@
+from itertools import islice
+from django.db import connection
+
+class QueryCounter:
+    """
+    Counts SQL statements issued on the default connection inside a `with`
+    block. Works with DEBUG off, unlike connection.queries.
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._wrapper.__exit__(*exc)
+
+def chunked(items, size):
+    """Yields successive lists of at most `size` items; consumes lazily."""
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
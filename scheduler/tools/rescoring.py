@@ -0,0 +1,70 @@
+import time
+import numpy as np
+from django.db import transaction
+from scheduler.models import Case
+from scheduler.tools.duration_model import get_durations
+from scheduler.tools.priority_model import compute_priorities
+from scheduler.tools import response_cache
+
+# Priority weights (urgency, age, case type)
+FORMULAS = {
+    "ai": (0.7, 0.15, 0.15),       # case_analyzer.calculate_ai_priority, used at intake
+    "planner": (0.5, 0.3, 0.2),    # priority_model.compute_priority
+}
+
+def _write_grouped(ids, field, column, batch_size):
+    """
+    Priorities have 3 decimals and durations are whole minutes, so a chunk
+    holds few distinct values per field. One UPDATE ... WHERE id IN (...)
+    per value is much cheaper than bulk_update's per-row CASE WHEN.
+    """
+    values, inverse = np.unique(column, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.flatnonzero(np.diff(inverse[order])) + 1
+    for value, group in zip(values.tolist(), np.split(order, bounds)):
+        group_ids = ids[group].tolist()
+        for i in range(0, len(group_ids), batch_size):
+            Case.objects.filter(id__in=group_ids[i:i + batch_size]).update(**{field: value})
+
+def rescore_cases(cases=None, formula="ai", durations=False, chunk_size=20000, batch_size=5000,
+                  dry_run=False, log=print):
+    """
+    Recomputes priority (and optionally estimated_duration) for every case
+    in `cases` with array operations. Columns are read with values_list in
+    id-ordered chunks and only rows whose values changed are written back,
+    grouped by value. Returns {"scanned", "changed", "elapsed"}.
+    """
+    cases = Case.objects.all() if cases is None else cases
+    weights = FORMULAS[formula]
+    columns = ["id", "case_type", "urgency", "filed_in", "priority", "estimated_duration"]
+    if durations:
+        columns += ["case_number", "ai_analysis__complexity"]
+    start = time.monotonic()
+    scanned = changed = 0
+    last_id = 0
+    while True:
+        rows = list(cases.filter(id__gt=last_id).order_by("id").values_list(*columns)[:chunk_size])
+        if not rows:
+            break
+        ids, case_types, urgency, filed_in, old_priority, old_duration = list(zip(*rows))[:6]
+        last_id = ids[-1]
+        scanned += len(rows)
+
+        priority = compute_priorities(case_types, urgency, filed_in, weights=weights)
+        dirty = np.abs(priority - np.asarray(old_priority, dtype=np.float64)) > 1e-9
+        if durations:
+            case_numbers, complexities = list(zip(*rows))[6:]
+            duration = get_durations(case_types, urgency, case_numbers, complexities)
+            dirty |= duration != np.asarray(old_duration)
+
+        dirty_ids = np.asarray(ids, dtype=np.int64)[dirty]
+        changed += len(dirty_ids)
+        if len(dirty_ids) and not dry_run:
+            with transaction.atomic():
+                _write_grouped(dirty_ids, "priority", priority[dirty], batch_size)
+                if durations:
+                    _write_grouped(dirty_ids, "estimated_duration", duration[dirty], batch_size)
+                response_cache.bump("cases")
+        log(f"Rescored {scanned} cases, {changed} changed ({scanned / (time.monotonic() - start):.0f} cases/s)")
+
+    return {"scanned": scanned, "changed": changed, "elapsed": round(time.monotonic() - start, 2)}
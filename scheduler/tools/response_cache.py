@@ -0,0 +1,113 @@
+import hashlib
+import time
+from datetime import date
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from scheduler.models import Case, Judge, Lawyer, Schedule
+
+# Responses are cached per URL under the versions of the tables they are
+# built from. A version is the time.time_ns() of the last write to its
+# group, so bumping one makes every dependent key, ETag and Last-Modified
+# new at once; stale entries are never looked up again and age out.
+CACHE_ALIAS = "responses"
+MODEL_GROUPS = {Case: "cases", Judge: "judges", Lawyer: "lawyers", Schedule: "schedules"}
+
+def enabled():
+    return settings.RESPONSE_CACHE != "off"
+
+def _version_keys(groups):
+    return {group: f"version:{group}" for group in groups}
+
+def versions(groups):
+    """Current version of each group, starting one for groups never written to."""
+    cache, keys = caches[CACHE_ALIAS], _version_keys(groups)
+    found = cache.get_many(keys.values())
+    for group, key in keys.items():
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys.values()]
+
+def bump(*groups):
+    """
+    New versions for `groups` once the current transaction commits (at once
+    outside one), so readers can't cache rows from before the write under
+    the new version.
+    """
+    def run():
+        cache = caches[CACHE_ALIAS]
+        for key in _version_keys(groups).values():
+            cache.set(key, max(time.time_ns(), (cache.get(key) or 0) + 1), timeout=None)
+    if enabled():
+        transaction.on_commit(run)
+
+def cached_response(request, groups, render):
+    """
+    `render()`'s response, served from the cache while none of `groups`
+    changed, or a 304 when the client's ETag (or If-Modified-Since) is
+    still current. Only 200 responses to GET and HEAD are stored, and only
+    ones that are the same for every client (see _shared), so logged-in
+    clients share the cached JSON but get their own browsable API pages.
+    """
+    if not enabled() or request.method not in ("GET", "HEAD"):
+        return render()
+    stamps = versions(groups)
+    # The absolute URL because page links are absolute; the date because
+    # the dashboard and stats are built around today
+    parts = [request.build_absolute_uri(), request.META.get("HTTP_ACCEPT", ""), date.today().isoformat(), *stamps]
+    digest = hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()[:32]
+    etag, last_modified = f'"{digest}"', max(stamps) // 10**9
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        cache, key = caches[CACHE_ALIAS], f"response:{digest}"
+        entry = cache.get(key)
+        if entry is not None:
+            content, content_type = entry
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = render()
+            if hasattr(response, "render"):
+                response.render()  # TemplateResponse and DRF Response render lazily
+            if response.status_code != 200 or not _shared(request, response):
+                return response
+            cache.set(key, (response.content, response["Content-Type"]))
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    # Revalidate on every use; the ETag makes that a 304 while nothing changed
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ["Accept", "Cookie"])
+    return response
+
+def _shared(request, response):
+    """
+    Whether `response` may be served to other clients: not one that handed
+    out a CSRF token, and from DRF only the JSON renderer, since the
+    browsable API embeds the username and per-client forms.
+    """
+    if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        return False
+    renderer = getattr(response, "accepted_renderer", None)
+    return renderer is None or renderer.media_type == "application/json"
+
+def cached_view(*groups):
+    """Decorator for function views built from `groups`."""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            return cached_response(request, groups, lambda: view(request, *args, **kwargs))
+        return wrapped
+    return decorator
+
+class CachedResponseMixin:
+    """For DRF views: GET responses are cached while their `cache_groups` are unchanged."""
+    cache_groups = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        parent = super().dispatch
+        return cached_response(request, self.cache_groups, lambda: parent(request, *args, **kwargs))
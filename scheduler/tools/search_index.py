@@ -0,0 +1,206 @@
+import re
+import unicodedata
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from scheduler.models import Case, Judge, Lawyer
+
+# One SQLite FTS5 table holds every searchable row. Each kind owns a rowid
+# range (kind code << KIND_SHIFT, plus the primary key), so saves and deletes
+# touch a single row and a ?type= filter is a rowid range FTS5 seeks into
+# rather than a scan of the matches.
+TABLE = "scheduler_search_index"
+KINDS = {"case": 0, "judge": 1, "lawyer": 2}
+KIND_SHIFT = 40
+MODELS = {"case": Case, "judge": Judge, "lawyer": Lawyer}
+# bm25 has to score every match, so only result sets up to this size are
+# ranked; broader queries come back newest first (see search)
+RANK_LIMIT = 5000
+# Model fields each kind's document is built from
+FIELDS = {
+    "case": {"case_number", "description"},
+    "judge": {"name", "court", "specialization"},
+    "lawyer": {"name", "specialization"},
+}
+
+# Prefixes of up to PREFIX_INDEX characters are read from prefix indexes;
+# longer ones make FTS5 merge every term they cover, ~45ms for a word in
+# half of a million cases (see match_expression)
+PREFIX_INDEX = 6
+CREATE_SQL = (f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(title, body, "
+              "tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3 4 5 6')")
+# Title and body per kind as SQL over the model table, for rebuild();
+# _document() is the same mapping over an instance, for saves
+SOURCES = {
+    "case": ("case_number", "description"),
+    "judge": ("name", "court || ' ' || specialization"),
+    "lawyer": ("name", "specialization"),
+}
+
+def enabled():
+    return connection.vendor == "sqlite"
+
+def _rowid(kind, pk):
+    return (KINDS[kind] << KIND_SHIFT) + pk
+
+def _rowids(kind):
+    """First and last rowid of a kind's range."""
+    first = KINDS[kind] << KIND_SHIFT
+    return first, first + (1 << KIND_SHIFT) - 1
+
+def _document(kind, obj):
+    if kind == "case":
+        return obj.case_number, obj.description or ""
+    if kind == "judge":
+        return obj.name, f"{obj.court} {obj.specialization}"
+    return obj.name, obj.specialization
+
+def kind_of(model):
+    return next((kind for kind, m in MODELS.items() if m is model), None)
+
+def index_objects(kind, objects):
+    """Adds or replaces the index rows of saved model instances."""
+    if not enabled():
+        return
+    rows = [(_rowid(kind, obj.pk), *_document(kind, obj)) for obj in objects]
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(r[0],) for r in rows])
+        cursor.executemany(f"INSERT INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)", rows)
+
+def remove(kind, pks):
+    if not enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(_rowid(kind, pk),) for pk in pks])
+
+def rebuild(kinds=None):
+    """Re-creates the index rows of `kinds` (default all) in SQL. Returns rows indexed."""
+    if not enabled():
+        return 0
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_SQL)
+        for kind in kinds or KINDS:
+            title, body = SOURCES[kind]
+            first, last = _rowids(kind)
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid BETWEEN {first} AND {last}")
+            cursor.execute(f"INSERT INTO {TABLE} (rowid, title, body) "
+                           f"SELECT {first} + id, {title}, COALESCE({body}, '') "
+                           f"FROM {MODELS[kind]._meta.db_table}")
+            total += cursor.rowcount
+    return total
+
+def _fold(text):
+    """Lower case without diacritics, as the unicode61 tokenizer folds words."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+
+def _words(text):
+    return re.findall(r"[^\W_]+", _fold(text))
+
+def _expression(words):
+    return " ".join(f'"{w}"*' for w in words)
+
+def match_expression(q):
+    """
+    User text to an FTS5 query in which every word must match the title or
+    body as a prefix, as (expression, long words). Words longer than
+    PREFIX_INDEX are cut to it to stay on the prefix indexes, so matches
+    still have to be checked against the long words. "" when q has no words.
+    """
+    words = _words(q)
+    return _expression(w[:PREFIX_INDEX] for w in words), [w for w in words if len(w) > PREFIX_INDEX]
+
+def _has_prefixes(text, words):
+    text = _fold(text)
+    if not all(w in text for w in words):
+        return False
+    tokens = re.findall(r"[^\W_]+", text)
+    return all(any(t.startswith(w) for t in tokens) for w in words)
+
+def _where(kind):
+    """MATCH plus, for one kind, its rowid range."""
+    if kind is None:
+        return f"{TABLE} MATCH %s"
+    first, last = _rowids(kind)
+    return f"{TABLE} MATCH %s AND rowid BETWEEN {first} AND {last}"
+
+def filter_queryset(queryset, kind, q):
+    """Narrows a queryset of `kind` rows to those matching `q` (unranked)."""
+    words = _words(q)
+    if not words:
+        return queryset
+    if not enabled():
+        return _icontains(queryset, kind, q)
+    sql = f"SELECT rowid - {_rowids(kind)[0]} FROM {TABLE} WHERE {_where(kind)}"
+    return queryset.filter(id__in=RawSQL(sql, [_expression(words)]))
+
+def search(q, kind=None, limit=20, offset=0):
+    """
+    Matches for `q` as ([{"type", "id", "title", "snippet"}], ranked), with
+    at most `limit` + 1 rows so callers can tell whether there is another
+    page. Up to RANK_LIMIT matches are ordered by bm25 (titles weighted over
+    bodies); beyond that by descending rowid (lawyers, judges, then cases,
+    each newest first) with ranked False, which keeps the cost bounded by
+    the page rather than the table.
+    """
+    expression, long_words = match_expression(q)
+    if not expression:
+        return [], True
+    if not enabled():
+        return _search_fallback(q, kind, limit, offset), False
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM (SELECT rowid FROM {TABLE} WHERE {_where(kind)} LIMIT %s)",
+                       [expression, RANK_LIMIT + 1])
+        ranked = cursor.fetchone()[0] <= RANK_LIMIT
+        order = f"bm25({TABLE}, 10.0, 1.0)" if ranked else "rowid DESC"
+        select = (f"SELECT rowid, title, snippet({TABLE}, 1, '[', ']', '...', 12), body FROM {TABLE} "
+                  f"WHERE {_where(kind)} ORDER BY {order}")
+        params, rows = [expression], None
+        if long_words:
+            # Check the cut-down matches as they stream in. When RANK_LIMIT of
+            # them fail to fill the page the long words are rare, and then
+            # their own prefix query is cheap.
+            cursor.execute(select, [expression])
+            rows, scanned = [], 0
+            for row in cursor:
+                scanned += 1
+                if _has_prefixes(f"{row[1]} {row[3]}", long_words):
+                    rows.append(row)
+                    if len(rows) > offset + limit:
+                        break
+                elif scanned >= RANK_LIMIT:
+                    rows = None
+                    break
+            rows = rows and rows[offset:]
+            params = [_expression(_words(q))]
+        if rows is None:
+            cursor.execute(f"{select} LIMIT %s OFFSET %s", params + [limit + 1, offset])
+            rows = cursor.fetchall()
+    names = {code: name for name, code in KINDS.items()}
+    mask = (1 << KIND_SHIFT) - 1
+    return [{"type": names[rowid >> KIND_SHIFT], "id": rowid & mask, "title": title, "snippet": snippet}
+            for rowid, title, snippet, _ in rows], ranked
+
+# Databases without FTS5 get unranked icontains matching over the same fields
+
+def _icontains(queryset, kind, q):
+    for word in re.findall(r"\w+", q):
+        match = Q()
+        for field in FIELDS[kind]:
+            match |= Q(**{f"{field}__icontains": word})
+        queryset = queryset.filter(match)
+    return queryset
+
+def _search_fallback(q, kind, limit, offset):
+    results = []
+    for name, model in MODELS.items():
+        if kind and name != kind:
+            continue
+        title = SOURCES[name][0]
+        for obj in _icontains(model.objects.all(), name, q).order_by("id")[:offset + limit + 1]:
+            results.append({"type": name, "id": obj.pk, "title": getattr(obj, title), "snippet": ""})
+    return results[offset:offset + limit + 1]
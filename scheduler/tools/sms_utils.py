@@ -1,9 +1,28 @@
+import threading
 from django.conf import settings
 try:
     from twilio.rest import Client
 except ImportError:
     Client = None
 
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    Returns a shared Twilio client, built on first use. The client keeps its
+    HTTP session, so reusing it avoids a new connection per message.
+    Returns None if Twilio is not installed or not configured.
+    """
+    global _client
+    if not Client or not settings.TWILIO_AUTH_TOKEN:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+    return _client
+
 def send_sms(phone_number, message):
     """
     Sends an SMS to the given phone number using Twilio.
@@ -23,7 +42,7 @@ def send_sms(phone_number, message):
         return
 
     try:
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        client = get_client()
         sent_message = client.messages.create(
             from_=settings.TWILIO_PHONE_NUMBER,
             body=message,
@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+from scheduler.models import Policy
+from scheduler.tools.embedding_codec import decode_embedding
+
+class PolicyIndex:
+    """
+    In-process cosine-similarity index over Policy embeddings.
+
+    Embeddings are L2-normalized once and kept in one contiguous float32
+    matrix, so a query is a single matrix-vector product followed by
+    argpartition. With a `path`, the matrix is saved as .npy files and
+    memory-mapped on the next start instead of being rebuilt from the DB.
+
+    Other processes write policies too, so at most every `ttl` seconds a
+    query compares the table's version (see _db_state) with the one the
+    index was built from, and rebuilds when it moved.
+    """
+    def __init__(self, path=None, ttl=None):
+        self.path = path
+        self.ttl = settings.POLICY_INDEX_TTL if ttl is None else ttl
+        self._lock = threading.RLock()
+        self._matrix = None   # (capacity, dim) float32, rows [:_n] are live
+        self._ids = None      # (capacity,) int64 policy ids
+        self._n = 0
+        self._loaded = False
+        self._state = None    # _db_state() the index was built from
+        self._checked_at = 0.0
+
+    def __len__(self):
+        return self._n
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _db_state(self):
+        """(row count, max id, latest updated_at in µs): moves on insert, delete and re-embed."""
+        state = Policy.objects.aggregate(n=Count("id"), last=Max("id"), changed=Max("updated_at"))
+        changed = int(state["changed"].timestamp() * 1_000_000) if state["changed"] else 0
+        return np.array([state["n"], state["last"] or 0, changed], dtype=np.int64)
+
+    def _files(self):
+        return (os.path.join(self.path, "policy_embeddings.npy"),
+                os.path.join(self.path, "policy_ids.npy"),
+                os.path.join(self.path, "policy_state.npy"))
+
+    def _load_from_disk(self, state):
+        matrix_file, ids_file, state_file = self._files()
+        if not all(os.path.exists(f) for f in self._files()):
+            return False
+        if not np.array_equal(np.load(state_file), state):
+            return False
+        self._matrix = np.load(matrix_file, mmap_mode="r")
+        self._ids = np.load(ids_file)
+        self._n = len(self._ids)
+        return True
+
+    def _load_from_db(self):
+        """
+        Decodes the binary embedding column straight into the preallocated
+        matrix; only rows from the configured model and dimension are used.
+        """
+        rows = Policy.objects.filter(
+            embedding_model=settings.POLICY_EMBEDDING_MODEL, embedding_dim__gt=0
+        ).order_by("id")
+        dim = rows.values_list("embedding_dim", flat=True).first()
+        rows = rows.filter(embedding_dim=dim)
+        n = rows.count() if dim else 0
+        self._ids = np.empty(n, dtype=np.int64)
+        self._matrix = np.empty((n, dim), dtype=np.float32) if n else None
+        self._n = 0
+        fields = ("id", "embedding_blob", "embedding_dtype", "embedding_scale")
+        for pid, blob, dtype, scale in rows.values_list(*fields).iterator(chunk_size=2000):
+            if self._n == n:
+                break
+            self._matrix[self._n] = decode_embedding(blob, dtype, scale)
+            self._ids[self._n] = pid
+            self._n += 1
+        if self._n:
+            self._matrix[:self._n] = self._normalize(self._matrix[:self._n])
+
+    def save(self):
+        if not self.path or self._matrix is None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        matrix_file, ids_file, state_file = self._files()
+        with self._lock:
+            np.save(matrix_file, np.ascontiguousarray(self._matrix[:self._n]))
+            np.save(ids_file, self._ids[:self._n])
+            np.save(state_file, self._state)
+
+    def load(self, state=None):
+        """(Re)builds the index, preferring an up-to-date memory-mapped copy."""
+        with self._lock:
+            # Read before the rows: a write in between only causes one more rebuild
+            self._state = self._db_state() if state is None else state
+            self._checked_at = time.monotonic()
+            if not (self.path and self._load_from_disk(self._state)):
+                self._load_from_db()
+                self.save()
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        """Builds the index on first use and rebuilds it when the table changed."""
+        if self._loaded and time.monotonic() - self._checked_at < self.ttl:
+            return
+        state = self._db_state()
+        self._checked_at = time.monotonic()
+        if not self._loaded or not np.array_equal(state, self._state):
+            self.load(state)
+
+    def add(self, policy_id, embedding):
+        """Appends one policy; grows the buffer geometrically."""
+        vec = self._normalize([embedding])
+        with self._lock:
+            self._ensure_loaded()
+            if self._matrix is None:
+                self._matrix = np.empty((16, vec.shape[1]), dtype=np.float32)
+                self._ids = np.empty(16, dtype=np.int64)
+            elif vec.shape[1] != self._matrix.shape[1]:
+                return
+            if self._n == len(self._matrix) or not self._matrix.flags.writeable:
+                capacity = max(16, 2 * self._n)
+                matrix = np.empty((capacity, self._matrix.shape[1]), dtype=np.float32)
+                ids = np.empty(capacity, dtype=np.int64)
+                matrix[:self._n] = self._matrix[:self._n]
+                ids[:self._n] = self._ids[:self._n]
+                self._matrix, self._ids = matrix, ids
+            self._matrix[self._n] = vec[0]
+            self._ids[self._n] = policy_id
+            self._n += 1
+
+    def search(self, query_embedding, top_k=3):
+        """Returns [(policy_id, cosine_similarity)] best first."""
+        with self._lock:
+            self._ensure_loaded()
+            n, matrix, ids = self._n, self._matrix, self._ids
+        if not n:
+            return []
+        q = self._normalize(query_embedding)
+        if q.shape[0] != matrix.shape[1]:
+            return []
+        scores = matrix[:n] @ q
+        k = min(top_k, n)
+        top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    """Process-wide PolicyIndex, memory-mapped from settings.POLICY_INDEX_PATH if set."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = PolicyIndex(getattr(settings, "POLICY_INDEX_PATH", None))
+    return _index
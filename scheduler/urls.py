@@ -12,7 +12,9 @@ urlpatterns = [
     path("health/", health_check),
     path('', include(router.urls)),
     path("dashboard/", dashboard, name="dashboard"),
+    path("search/", search, name="search"),
     path("regenerate/", regenerate, name="regenerate"),
+    path("regenerate/<int:job_id>/", planner_job_status, name="planner_job_status"),
     path("auth/register/", register_view, name="register"),
     path("auth/login/", login_view, name="login"),
     path("auth/logout/", logout_view, name="logout"),
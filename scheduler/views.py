@@ -1,150 +1,276 @@
 from django.shortcuts import render, redirect
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, action
 from rest_framework import viewsets
-from scheduler.agent.planner_agent_v2 import HybridPlannerAgent
-from datetime import date
-from .models import Judge, Lawyer, Case, Schedule
-from .serializers import JudgeSerializer, LawyerSerializer, CaseSerializer, ScheduleSerializer
-from case_analyzer import analyze_case_with_ai, calculate_ai_priority 
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField
+from scheduler.agent.jobs import submit_planner_job, clean_job_options
+from datetime import date, timedelta
+from types import SimpleNamespace
+from django.utils import timezone
+from django.db.models import Count, Prefetch
+from .models import Judge, Lawyer, Case, Schedule, PlannerJob
+from .serializers import (JudgeSerializer, LawyerSerializer, CaseSerializer, ScheduleSerializer, PlannerJobSerializer,
+                          HearingRecordSerializer, requested_fields)
+from scheduler.tools.case_intake import rule_based_values, queue_analysis
+from case_analyzer import calculate_ai_priority
+from scheduler.tools.calendar_utils import day_range
+from scheduler.tools import search_index, response_cache
+from scheduler.tools.response_cache import CachedResponseMixin, cached_view
 
 @api_view(['GET'])
 def health_check(request):
     return Response({"status":"ok", "message":"Backend is running"})
 
+@cached_view("schedules", "cases", "judges")
 def dashboard(request):
     today = date.today()
-    schedules = Schedule.objects.filter(start_time__date=today).order_by("judge__name", "start_time")
+    start, end = day_range(today)
+    schedules = (Schedule.objects.filter(start_time__gte=start, start_time__lt=end)
+                 .select_related("judge", "case").order_by("judge__name", "start_time"))
     return render(request, "scheduler/dashboard.html", {"schedules": schedules, "today": today})
 
 @api_view(['GET', 'POST'])
 def regenerate(request):
+    """Queues a background planner run and returns its job id immediately."""
     try:
-        agent = HybridPlannerAgent()
-        agent.run()
+        options = clean_job_options(request.data)
+    except ValueError as e:
+        return Response({"status": "error", "message": str(e)}, status=400)
+    try:
+        job, created = submit_planner_job(**options)
         return Response({
-            "status": "success",
-            "message": "Schedule regenerated successfully"
-        })
+            "status": "queued" if created else "running",
+            "message": "Schedule regeneration started" if created else "A schedule regeneration is already in progress",
+            "job": PlannerJobSerializer(job).data,
+        }, status=202 if created else 200)
     except Exception as e:
         return Response({
             "status": "error",
             "message": str(e)
         }, status=500)
 
-class JudgeViewSet(viewsets.ModelViewSet):
+@api_view(['GET'])
+def search(request):
+    """
+    Search over case numbers and descriptions and judge and lawyer names.
+    ?q= (each word matches as a prefix), optional ?type=case|judge|lawyer,
+    ?page= and ?page_size= (max 100). Results are ranked unless the query
+    matches too many rows to rank ("ranked": false, newest first).
+    """
+    q = request.query_params.get('q', '').strip()
+    kind = request.query_params.get('type') or None
+    if kind is not None and kind not in search_index.KINDS:
+        return Response({"error": f"type must be one of {', '.join(search_index.KINDS)}"}, status=400)
+    try:
+        page = max(int(request.query_params.get('page', 1)), 1)
+        page_size = min(max(int(request.query_params.get('page_size', 20)), 1), 100)
+    except ValueError:
+        return Response({"error": "page and page_size must be integers"}, status=400)
+
+    rows, ranked = search_index.search(q, kind, limit=page_size, offset=(page - 1) * page_size)
+    return Response({
+        "query": q,
+        "page": page,
+        "ranked": ranked,
+        "has_more": len(rows) > page_size,
+        "results": rows[:page_size],
+    })
+
+@api_view(['GET'])
+def planner_job_status(request, job_id):
+    job = PlannerJob.objects.filter(id=job_id).first()
+    if job is None:
+        return Response({"error": "Job not found"}, status=404)
+    return Response(PlannerJobSerializer(job).data)
+
+# List endpoints are cursor-paginated (see scheduler.pagination) and take
+# the query parameters in filter_params, ?ordering= over ordering_fields and
+# ?fields=a,b to return only some columns. GET responses are cached until a
+# table in cache_groups changes (see scheduler.tools.response_cache).
+
+class JudgeViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Judge.objects.all()
     serializer_class = JudgeSerializer
+    cache_groups = ("judges",)
+    filter_params = {"specialization": "specialization", "court": "court"}
+    ordering_fields = ["id", "name", "experience_years"]
+    ordering = ["id"]
 
-class CaseViewSet(viewsets.ModelViewSet):
+class CaseViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Case.objects.all()
     serializer_class = CaseSerializer
+    cache_groups = ("cases", "judges", "lawyers")
+    filter_params = {
+        "case_type": "case_type",
+        "is_resolved": "is_resolved",
+        "judge": "assigned_judge",
+        "lawyer": "lawyers",
+        "analysis_status": "analysis_status",
+        "filed_after": "filed_in__gte",
+        "filed_before": "filed_in__lte",
+    }
+    ordering_fields = ["id", "filed_in", "priority", "urgency", "case_number"]
+    ordering = ["-id"]
+
+    def get_queryset(self):
+        # ?q= narrows the list through the search index
+        queryset = search_index.filter_queryset(super().get_queryset(), "case", self.request.query_params.get('q', ''))
+        lawyers = Prefetch("lawyers", queryset=Lawyer.objects.only("id"))
+        wanted = requested_fields(self.request)
+        if wanted is None:
+            return queryset.prefetch_related(lawyers)
+        # Leave unrequested columns (description, ai_analysis) in the database;
+        # the ordering columns are still needed for the page cursor
+        columns = [f.name for f in Case._meta.concrete_fields if f.name in wanted]
+        queryset = queryset.only(*self.ordering_fields, *columns)
+        return queryset.prefetch_related(lawyers) if "lawyers" in wanted else queryset
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Dashboard counts: all cases, open cases and cases filed per day over the last ?days= (default 7)."""
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            raise ValidationError({"days": "Must be an integer"})
+        since = date.today() - timedelta(days=days - 1)
+        filed = Case.objects.filter(filed_in__gte=since).values("filed_in").annotate(n=Count("id"))
+        return Response({
+            "total": Case.objects.count(),
+            "open": Case.objects.filter(is_resolved=False).count(),
+            "filed_per_day": {row["filed_in"].isoformat(): row["n"] for row in filed},
+        })
+
+    def _use_ai(self):
+        """The optional use_ai flag; form posts send it as a string."""
+        try:
+            return BooleanField().to_internal_value(self.request.data.get('use_ai', True))
+        except ValidationError as e:
+            raise ValidationError({'use_ai': e.detail})
 
     def perform_create(self, serializer):
-        import json
-        from datetime import datetime
-        
-        case = serializer.save()
-        use_ai = self.request.data.get('use_ai', True)  # Default to True (30s timeout)
-        
-        # use_ai True = 30s timeout, False = no timeout
-        timeout = 30 if use_ai else None
-        
-        ai_analysis = analyze_case_with_ai(
-            case_number=case.case_number,
-            case_type=case.case_type,
-            description=case.description,
-            filed_date=case.filed_in,
-            timeout=timeout
-        )
-        
-        case.urgency = ai_analysis['urgency']
-        case.estimated_duration = ai_analysis['estimated_duration']
-        case.priority = calculate_ai_priority(case, ai_analysis)
-        case.ai_analysis = ai_analysis  # Save the full AI analysis
-        case.save()
-        
-        # Log to file for debugging
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'case_number': case.case_number,
-            'case_type': case.case_type,
-            'description': case.description,
-            'used_ai': use_ai,
-            'ai_analysis': ai_analysis,
-            'final_values': {
-                'urgency': case.urgency,
-                'duration': case.estimated_duration,
-                'priority': case.priority
-            }
-        }
-        
-        with open('/tmp/case_ai_analysis.log', 'a') as f:
-            f.write(json.dumps(log_entry, indent=2) + '\n---\n')
-        
-        print(f"  {'AI' if use_ai else 'Rule-based'} Analysis for {case.case_number}:")
-        print(f"  Urgency: {case.urgency}")
-        print(f"  Duration: {case.estimated_duration} min")
-        print(f"  Priority: {case.priority}")
-        print(f"  Reasoning: {ai_analysis.get('reasoning', 'N/A')}")
-    
+        """
+        Saves the case with rule-based values right away; with use_ai the
+        AI analysis runs in the background (poll analysis_status).
+        """
+        use_ai = self._use_ai()
+        data = serializer.validated_data
+        values = rule_based_values(data['case_type'], data.get('description', ''), data['filed_in'])
+        case = serializer.save(analysis_status='pending' if use_ai else 'done', **values)
+        if use_ai:
+            queue_analysis(case.id)
+        print(f"  Case {case.case_number} saved (analysis {case.analysis_status}, priority {case.priority})")
+
     def perform_update(self, serializer):
-        import json
-        from datetime import datetime
-
-        case = serializer.save()
-        use_ai = self.request.data.get('use_ai', True)  # Default to True (30s timeout)
-        
-        # use_ai True = 30s timeout, False = no timeout
-        timeout = 30 if use_ai else None
-        
-        ai_analysis = analyze_case_with_ai(
-            case_number=case.case_number,
-            case_type=case.case_type,
-            description=case.description,
-            filed_date=case.filed_in,
-            timeout=timeout
-        )
+        instance, data = serializer.instance, serializer.validated_data
+        case_type = data.get('case_type', instance.case_type)
+        description = data.get('description', instance.description)
+        filed_in = data.get('filed_in', instance.filed_in)
+        if (case_type, description) == (instance.case_type, instance.description) and instance.ai_analysis:
+            # Nothing the analysis depends on changed; the priority still
+            # depends on filed_in, so recompute it from the stored analysis
+            serializer.save(priority=calculate_ai_priority(
+                SimpleNamespace(case_type=case_type, filed_in=filed_in), instance.ai_analysis))
+            return
+
+        use_ai = self._use_ai()
+        values = rule_based_values(case_type, description, filed_in)
+        case = serializer.save(analysis_status='pending' if use_ai else 'done', **values)
+        if use_ai:
+            queue_analysis(case.id)
+        print(f"  Case {case.case_number} updated (analysis {case.analysis_status}, priority {case.priority})")
+
+    @action(detail=False, methods=['post'], url_path='analyze')
+    def analyze(self, request):
+        """
+        Bulk AI analysis in the background. Body: {"ids": [...]},
+        {"cases": [{case_number, case_type, filed_in, description}, ...]}
+        to import and analyze, or {"unanalyzed": true}; optional "workers"
+        (1 to MAX_API_WORKERS, default 4).
+        """
+        from scheduler.tools.bulk_analysis import import_cases, submit_bulk_analysis, MAX_API_WORKERS
+
+        data = request.data
+        try:
+            workers = int(data.get('workers', 4))
+        except (TypeError, ValueError):
+            return Response({"error": "workers must be an integer"}, status=400)
+        workers = max(1, min(workers, MAX_API_WORKERS))
+        cases = Case.objects.all()
+        if data.get('cases'):
+            try:
+                numbers = import_cases(data['cases'])
+            except ValueError as e:
+                return Response({"error": f"Invalid case row: {e}"}, status=400)
+            cases = cases.filter(case_number__in=numbers)
+        elif data.get('ids'):
+            cases = cases.filter(id__in=data['ids'])
+        elif data.get('unanalyzed'):
+            cases = cases.filter(ai_analysis={})
+        else:
+            return Response({"error": "Provide ids, cases or unanalyzed"}, status=400)
+
+        case_ids = list(cases.values_list('id', flat=True))
+        submit_bulk_analysis(case_ids, workers=workers)
+        return Response({"status": "queued", "cases": len(case_ids)}, status=202)
 
-        case.urgency = ai_analysis['urgency']
-        case.estimated_duration = ai_analysis['estimated_duration']
-        case.priority = calculate_ai_priority(case, ai_analysis)
-        case.ai_analysis = ai_analysis  # Save the full AI analysis
-        
-        case.save()
-        
-        # Log to file for debugging
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'operation': 'update',
-            'case_number': case.case_number,
-            'case_type': case.case_type,
-            'description': case.description,
-            'used_ai': use_ai,
-            'ai_analysis': ai_analysis,
-            'final_values': {
-                'urgency': case.urgency,
-                'duration': case.estimated_duration,
-                'priority': case.priority
-            }
-        }
-        
-        with open('/tmp/case_ai_analysis.log', 'a') as f:
-            f.write(json.dumps(log_entry, indent=2) + '\n---\n')
-        
-        print(f"  {'AI' if use_ai else 'Rule-based'} Analysis (UPDATE) for {case.case_number}:")
-        print(f"  Urgency: {case.urgency}")
-        print(f"  Duration: {case.estimated_duration} min")
-        print(f"  Priority: {case.priority}")
-        print(f"  Reasoning: {ai_analysis.get('reasoning', 'N/A')}")
-
-class LawyerViewSet(viewsets.ModelViewSet):
+class LawyerViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Lawyer.objects.all()
     serializer_class = LawyerSerializer
+    cache_groups = ("lawyers", "cases")
+    filter_params = {"specialization": "specialization"}
+    ordering_fields = ["id", "name", "experience_years", "hourly_rate"]
+    ordering = ["id"]
 
-class ScheduleViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        return super().get_queryset().annotate(case_count=Count("case"))
+
+class ScheduleViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Schedule.objects.all()
     serializer_class = ScheduleSerializer
+    cache_groups = ("schedules", "cases", "judges")
+    filter_params = {"judge": "judge", "case": "case", "room": "room"}
+    ordering_fields = ["id", "start_time", "judge_id"]
+    ordering = ["start_time"]
+
+    def get_queryset(self):
+        queryset = (super().get_queryset().select_related("case", "judge")
+                    .defer("case__description", "case__ai_analysis", "judge__availability", "judge__working_hours"))
+        day = self.request.query_params.get("date")
+        if day:
+            try:
+                start, end = day_range(date.fromisoformat(day))
+            except ValueError:
+                raise ValidationError({"date": "Expected YYYY-MM-DD"})
+            queryset = queryset.filter(start_time__gte=start, start_time__lt=end)
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def record(self, request, pk=None):
+        """
+        Records how long this hearing actually took: {"actual_minutes": N},
+        optional "heard_on" (default the scheduled day). fit_durations
+        learns from these records.
+        """
+        schedule = self.get_object()
+        case = schedule.case
+        serializer = HearingRecordSerializer(data={
+            "actual_minutes": request.data.get("actual_minutes"),
+            "heard_on": request.data.get("heard_on") or timezone.localdate(schedule.start_time).isoformat(),
+        })
+        serializer.is_valid(raise_exception=True)
+        serializer.save(
+            case=case,
+            case_type=case.case_type,
+            complexity=(case.ai_analysis or {}).get("complexity") or "",
+            scheduled_minutes=int((schedule.end_time - schedule.start_time).total_seconds() // 60),
+        )
+        return Response(serializer.data, status=201)
+
+    def perform_destroy(self, instance):
+        # Saves bump the version through post_save; deletes do it here (see scheduler.signals)
+        super().perform_destroy(instance)
+        response_cache.bump("schedules")
 
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User